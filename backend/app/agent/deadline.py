@@ -0,0 +1,87 @@
+"""Per-turn time budget and the degradations applied to meet it"""
+
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# Degradation steps, reported in the chat response
+SHRINK_RETRIEVAL = "shrink_retrieval"
+SKIP_RETRIEVAL = "skip_retrieval"
+CAP_OUTPUT_TOKENS = "cap_output_tokens"
+FAST_PROFILE = "fast_profile"
+DEFER_STORAGE = "defer_storage"
+
+
+def new_deadline() -> float:
+    """Deadline (``time.monotonic()`` seconds) for a turn starting now"""
+    return time.monotonic() + settings.response_slo_seconds
+
+
+def remaining(state: Dict[str, Any]) -> float:
+    """Seconds left before the turn's deadline (infinite when it has none)"""
+    deadline = state.get("deadline")
+    if not deadline or not settings.deadline_degradation:
+        return float("inf")
+    return deadline - time.monotonic()
+
+
+def expected(name: str) -> float:
+    """Recent mean latency of a timed step, in seconds (0 before any data)"""
+    return metrics.mean(name)
+
+
+def degraded(state: Dict[str, Any], *steps: str) -> Dict[str, Any]:
+    """State update recording degradation steps for this turn"""
+    for step in steps:
+        metrics.increment(f"deadline.{step}")
+    return {"degradations": [*state.get("degradations", []), *steps]}
+
+
+def retrieval_step(state: Dict[str, Any]) -> Optional[str]:
+    """Shrink or skip memory retrieval when it would eat into generation's share
+    
+    Generation is what the user waits for, so its expected latency is kept
+    in reserve; retrieval gets whatever slack is left.
+    """
+    slack = remaining(state) - expected("llm.chat")
+    cost = expected("node.retrieve_memory")
+    if not cost or slack >= 2 * cost:
+        return None
+    return SKIP_RETRIEVAL if slack < cost else SHRINK_RETRIEVAL
+
+
+def generation_limits(state: Dict[str, Any], profile: str = "chat", allow_fast: bool = True) -> Dict[str, Any]:
+    """Profile and output-token cap that fit generation into the time left
+    
+    Returns ``{"profile", "num_predict", "steps"}``. With enough time the
+    profile is unchanged and nothing is capped. Otherwise output is capped
+    to what the model can decode in the time left (measured tokens per
+    second, after the expected prompt evaluation), and below
+    ``settings.deadline_fast_fraction`` of the usual latency the turn
+    switches to the "fast" profile, which can be routed to a smaller model.
+    """
+    left = remaining(state)
+    usual = expected(f"llm.{profile}")
+    if not usual or left >= usual:
+        return {"profile": profile, "num_predict": None, "steps": []}
+    
+    eval_seconds = metrics.counters.get(f"llm.{profile}.eval_seconds", 0.0)
+    tokens_per_second = (
+        metrics.counters.get(f"llm.{profile}.output_tokens", 0.0) / eval_seconds
+        if eval_seconds else settings.deadline_tokens_per_second
+    )
+    decode_time = max(left - expected(f"llm.{profile}.prompt_eval"), 0.0)
+    num_predict = max(int(decode_time * tokens_per_second), settings.deadline_min_output_tokens)
+    
+    steps = [CAP_OUTPUT_TOKENS]
+    if allow_fast and left < settings.deadline_fast_fraction * usual:
+        profile = "fast"
+        steps.append(FAST_PROFILE)
+    return {"profile": profile, "num_predict": num_predict, "steps": steps}
+
+
+def storage_deferred(state: Dict[str, Any]) -> bool:
+    """Whether conversation storage should run after the response is sent"""
+    return remaining(state) < expected("node.store_conversation")
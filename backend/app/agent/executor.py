@@ -0,0 +1,301 @@
+"""Tool executor: runs planned actions against the registered tools"""
+
+import asyncio
+import json
+import re
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.agent import deadline
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.serialization import dumps_str
+from app.services.ai_service import ai_service
+from app.tools import tool_registry
+
+# Planned action -> (tool name, arguments). Actions not listed here are
+# handled by the final generation (they need arguments only the LLM can fill).
+ACTION_TOOLS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "check_pending_tasks": ("get_pending_tasks", {}),
+    "get_learning_progress": ("get_learning_progress", {}),
+}
+
+# Optional "now" after the data noun, then the end of the question. Dates
+# ("for tomorrow") are left to the LLM: the lookups take no date.
+_QUERY_END = r"(\s+(right\s+)?now)?[\s?.!]*$"
+
+# Short lookup questions about the user's own data answered straight from
+# SQLite, without any LLM call: (pattern, intent, tool name, arguments).
+# Each pattern needs "my" (or a status word like "pending") and must end on
+# the data noun, so general questions ("what is a task queue?") go to the LLM.
+DATA_QUERIES = [
+    (
+        re.compile(
+            r"^((what('?s| is| are)|show( me)?|list|any)\b.*\b(my|pending|open|outstanding|remaining)\b"
+            r".*\b(tasks?|to-?dos?|to-?do list)"
+            r"|(what('?s| is)|anything)\s+(still\s+)?(pending|open|outstanding)"
+            r"|(what|which)\s+(tasks|to-?dos)\s+(do i have|are (still\s+)?(pending|open|left)))" + _QUERY_END,
+            re.I
+        ),
+        "planning", "get_pending_tasks", {}
+    ),
+    (
+        re.compile(r"^(what('?s| is)|show( me)?|how('?s| is))\b.*\bmy learning progress" + _QUERY_END, re.I),
+        "learning", "get_learning_progress", {}
+    ),
+    (
+        re.compile(
+            r"^(what('?s| is| are)|show( me)?|list)\b.*\b(my|active|current)\b.*\bgoals?" + _QUERY_END,
+            re.I
+        ),
+        "planning", "get_goals", {}
+    ),
+    (
+        re.compile(r"^(what('?s| is| are)|show( me)?|list)\b.*\bmy (saved |stored )?preferences" + _QUERY_END, re.I),
+        "remembering", "get_all_preferences", {}
+    ),
+]
+
+# Words that turn a lookup into a request needing the LLM
+ACTION_WORDS = re.compile(r"\b(plan|schedule|create|add|make|update|prioriti[sz]e|help|why|should)\b", re.I)
+
+DATA_QUERY_MAX_WORDS = 10
+
+
+async def run_tool(tool_name: str, args: Dict[str, Any], action: Optional[str] = None) -> Dict[str, Any]:
+    """Run one tool with its timeout and return a structured result"""
+    start = time.perf_counter()
+    
+    result: Dict[str, Any] = {"tool_name": tool_name, "action": action}
+    # Only tools in the exported schemas; internal ones are never run on a model's say-so
+    if not tool_registry.is_exported(tool_name):
+        result["error"] = f"Unknown tool: {tool_name}"
+        return result
+    
+    timeout = tool_registry.timeout_for(tool_name)
+    
+    try:
+        tool = tool_registry.get(tool_name)
+        # Tools return dicts; they are only encoded at the LLM boundary
+        result["result"] = await asyncio.wait_for(tool.ainvoke(args), timeout=timeout)
+    except asyncio.TimeoutError:
+        metrics.increment(f"tool.{tool_name}.timeout")
+        result["error"] = f"{tool_name} timed out after {timeout}s"
+    except Exception as e:
+        result["error"] = f"{tool_name} failed: {e}"
+    
+    duration = time.perf_counter() - start
+    metrics.observe(f"tool.{tool_name}", duration)
+    result["duration_ms"] = round(duration * 1000, 2)
+    return result
+
+
+async def execute_actions(actions: List[str]) -> List[Dict[str, Any]]:
+    """Run the tools behind the planned actions concurrently
+    
+    The mapped tools are independent reads, so they run in parallel and the
+    slowest one (bounded by its timeout) sets the latency.
+    """
+    calls = [
+        (action, *ACTION_TOOLS[action])
+        for action in actions
+        if action in ACTION_TOOLS
+    ]
+    if not calls:
+        return []
+    
+    return list(await asyncio.gather(*(
+        run_tool(tool_name, args, action) for action, tool_name, args in calls
+    )))
+
+
+def _call_arguments(call: Dict[str, Any]) -> Dict[str, Any]:
+    """Arguments of a native tool call (some models send them as a JSON string)"""
+    arguments = call.get("function", {}).get("arguments") or {}
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments)
+        except json.JSONDecodeError:
+            arguments = {}
+    return arguments
+
+
+async def run_tool_loop(
+    user_input: str,
+    system_prompt: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    state: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Let the model pick and call tools natively, for a bounded number of rounds
+    
+    Each round sends the precomputed tool schemas with the conversation; tool
+    calls from one round run concurrently and their results are appended as
+    ``tool`` messages. When the model answers without calling a tool (or the
+    iteration budget is spent) its answer is final.
+    
+    ``state`` carries the turn deadline: each round's output is capped to
+    the time left, and once the time left is short of a usual round, no
+    further tool round starts after the first and the model answers with
+    what has been gathered.
+    
+    Returns:
+        Dict with ``response``, the structured ``tool_results`` and the
+        ``degradations`` applied to meet the deadline
+    """
+    state = state or {}
+    messages = [
+        {"role": "system", "content": system_prompt},
+        *(history or []),
+        {"role": "user", "content": user_input},
+    ]
+    tool_results: List[Dict[str, Any]] = []
+    steps: List[str] = []
+    
+    for _ in range(settings.max_tool_iterations):
+        # Tool calling needs the tools model, so a late round only caps output
+        limits = deadline.generation_limits(state, "tools", allow_fast=False)
+        if limits["steps"] and tool_results:
+            # No time for another round: answer with what has been gathered
+            metrics.increment("tool_loop.deadline_stop")
+            break
+        steps += limits["steps"]
+        message = await ai_service.chat(
+            messages,
+            tools=tool_registry.schemas,
+            num_predict=limits["num_predict"]
+        )
+        calls = message.get("tool_calls") or []
+        if not calls:
+            return {
+                "response": message.get("content", ""),
+                "tool_results": tool_results,
+                "degradations": list(dict.fromkeys(steps))
+            }
+        
+        messages.append(message)
+        results = await asyncio.gather(*(
+            run_tool(call.get("function", {}).get("name", ""), _call_arguments(call))
+            for call in calls
+        ))
+        for result in results:
+            tool_results.append(result)
+            messages.append({
+                "role": "tool",
+                "tool_name": result["tool_name"],
+                "content": dumps_str(result.get("result", {"error": result.get("error")}))
+            })
+    else:
+        # Iteration budget spent: answer with what has been gathered
+        metrics.increment("tool_loop.budget_exhausted")
+    
+    # The final answer needs no tools, so a late turn may also use the fast profile
+    limits = deadline.generation_limits(state, "tools")
+    steps += limits["steps"]
+    message = await ai_service.chat(messages, profile=limits["profile"], num_predict=limits["num_predict"])
+    return {
+        "response": message.get("content", ""),
+        "tool_results": tool_results,
+        "degradations": list(dict.fromkeys(steps))
+    }
+
+
+def format_tool_results(tool_results: List[Dict[str, Any]]) -> List[str]:
+    """Render tool results as prompt context, one line per tool"""
+    lines = []
+    for tool_result in tool_results:
+        if "error" in tool_result:
+            lines.append(f"- {tool_result['tool_name']}: unavailable ({tool_result['error']})")
+        else:
+            lines.append(f"- {tool_result['tool_name']}: {dumps_str(tool_result['result'])}")
+    return lines
+
+
+def match_data_query(user_input: str) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+    """Match a short lookup question to (intent, tool name, arguments)"""
+    text = user_input.strip()
+    if len(text.split()) > DATA_QUERY_MAX_WORDS or ACTION_WORDS.search(text):
+        return None
+    
+    for pattern, intent, tool_name, args in DATA_QUERIES:
+        if pattern.search(text):
+            return intent, tool_name, args
+    return None
+
+
+def _format_tasks(data: Dict[str, Any]) -> str:
+    tasks = data.get("tasks", [])
+    if not tasks:
+        return "You have no pending tasks. 🎉"
+    lines = [f"You have {len(tasks)} open task{'s' if len(tasks) != 1 else ''}:"]
+    for i, task in enumerate(tasks, 1):
+        line = f"{i}. [{task['priority']}] {task['title']}"
+        if task.get("due_date"):
+            line += f" (due: {task['due_date']})"
+        if task.get("status") == "in_progress":
+            line += " - in progress"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _format_learning(data: Dict[str, Any]) -> str:
+    progress = data.get("progress", [])
+    if not progress:
+        return "You aren't tracking any learning topics yet."
+    lines = ["Your learning progress:"]
+    for item in progress:
+        name = f"{item['topic']} › {item['subtopic']}" if item.get("subtopic") else item["topic"]
+        lines.append(f"- {name}: {item.get('progress', 0)}% ({item.get('status', 'not_started')})")
+    return "\n".join(lines)
+
+
+def _format_goals(data: Dict[str, Any]) -> str:
+    goals = data.get("goals", [])
+    if not goals:
+        return "You have no active goals."
+    lines = ["Your active goals:"]
+    for goal in goals:
+        line = f"- {goal['title']}"
+        if goal.get("target_date"):
+            line += f" (target: {goal['target_date']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _format_preferences(data: Dict[str, Any]) -> str:
+    preferences = data.get("preferences", {})
+    if not preferences:
+        return "You haven't stored any preferences yet."
+    return "Your preferences:\n" + "\n".join(f"- {key}: {value}" for key, value in preferences.items())
+
+
+DATA_FORMATTERS = {
+    "get_pending_tasks": _format_tasks,
+    "get_learning_progress": _format_learning,
+    "get_goals": _format_goals,
+    "get_all_preferences": _format_preferences,
+}
+
+
+async def answer_from_data(user_input: str) -> Optional[Dict[str, Any]]:
+    """Answer a pure data lookup straight from SQLite
+    
+    Returns:
+        Dict with ``intent``, ``response`` and ``tool_result``, or None if the
+        input needs the LLM
+    """
+    match = match_data_query(user_input)
+    if not match:
+        return None
+    
+    intent, tool_name, args = match
+    tool_result = await run_tool(tool_name, args)
+    data = tool_result.get("result")
+    if "error" in tool_result or not isinstance(data, dict) or not data.get("success"):
+        return None
+    
+    metrics.increment("chat.data_only_answers")
+    return {
+        "intent": intent,
+        "response": DATA_FORMATTERS[tool_name](data),
+        "tool_result": tool_result,
+    }
@@ -2,35 +2,71 @@
 
 from langgraph.graph import StateGraph, END
 from app.agent.state import AgentState
+from app.core.config import settings
+from app.core.metrics import track_node
+from app.agent.progress import report_progress
 from app.agent.nodes import (
+    answer_from_data_node,
     detect_intent_node,
     retrieve_memory_node,
     plan_actions_node,
     execute_tools_node,
+    respond_with_intent_node,
+    call_tools_node,
     generate_response_node,
     store_conversation_node,
+    route_after_planning,
+    route_after_data_answer,
 )
 
 
+def graph_node(name: str, fn):
+    """Graph node with latency tracking and progress events"""
+    return track_node(name, report_progress(name, fn))
+
+
 def create_agent_graph() -> StateGraph:
     """Create the agent workflow graph"""
+    if settings.native_tool_calling:
+        return create_tool_calling_graph()
+    if settings.combined_intent_mode:
+        return create_single_call_graph()
     
     # Create graph
     workflow = StateGraph(AgentState)
     
     # Add nodes
-    workflow.add_node("detect_intent", detect_intent_node)
-    workflow.add_node("retrieve_memory", retrieve_memory_node)
-    workflow.add_node("plan_actions", plan_actions_node)
-    workflow.add_node("execute_tools", execute_tools_node)
-    workflow.add_node("generate_response", generate_response_node)
-    workflow.add_node("store_conversation", store_conversation_node)
+    workflow.add_node("answer_from_data", graph_node("answer_from_data", answer_from_data_node))
+    workflow.add_node("detect_intent", graph_node("detect_intent", detect_intent_node))
+    workflow.add_node("retrieve_memory", graph_node("retrieve_memory", retrieve_memory_node))
+    workflow.add_node("plan_actions", graph_node("plan_actions", plan_actions_node))
+    workflow.add_node("execute_tools", graph_node("execute_tools", execute_tools_node))
+    workflow.add_node("generate_response", graph_node("generate_response", generate_response_node))
+    workflow.add_node("store_conversation", graph_node("store_conversation", store_conversation_node))
     
     # Define edges (workflow)
-    workflow.set_entry_point("detect_intent")
-    workflow.add_edge("detect_intent", "retrieve_memory")
-    workflow.add_edge("retrieve_memory", "plan_actions")
-    workflow.add_edge("plan_actions", "execute_tools")
+    # Actions are planned first so memory is only retrieved when the intent's
+    # retrieval policy allows it and a planned action actually uses it.
+    # Pure data lookups are answered from SQLite before any LLM call.
+    workflow.set_entry_point("answer_from_data")
+    workflow.add_conditional_edges(
+        "answer_from_data",
+        route_after_data_answer,
+        {
+            "done": END,
+            "continue": "detect_intent",
+        }
+    )
+    workflow.add_edge("detect_intent", "plan_actions")
+    workflow.add_conditional_edges(
+        "plan_actions",
+        route_after_planning,
+        {
+            "retrieve_memory": "retrieve_memory",
+            "execute_tools": "execute_tools",
+        }
+    )
+    workflow.add_edge("retrieve_memory", "execute_tools")
     workflow.add_edge("execute_tools", "generate_response")
     workflow.add_edge("generate_response", "store_conversation")
     workflow.add_edge("store_conversation", END)
@@ -39,5 +75,68 @@ def create_agent_graph() -> StateGraph:
     return workflow.compile()
 
 
+def create_single_call_graph() -> StateGraph:
+    """Create the single-round-trip workflow graph
+    
+    Intent detection is folded into generation: memory is retrieved with
+    the default policy, then one structured LLM call returns both the intent
+    and the answer, and the intent still drives conversation storage.
+    """
+    workflow = StateGraph(AgentState)
+    
+    workflow.add_node("answer_from_data", graph_node("answer_from_data", answer_from_data_node))
+    workflow.add_node("retrieve_memory", graph_node("retrieve_memory", retrieve_memory_node))
+    workflow.add_node("respond_with_intent", graph_node("respond_with_intent", respond_with_intent_node))
+    workflow.add_node("generate_response", graph_node("generate_response", generate_response_node))
+    workflow.add_node("store_conversation", graph_node("store_conversation", store_conversation_node))
+    
+    workflow.set_entry_point("answer_from_data")
+    workflow.add_conditional_edges(
+        "answer_from_data",
+        route_after_data_answer,
+        {
+            "done": END,
+            "continue": "retrieve_memory",
+        }
+    )
+    workflow.add_edge("retrieve_memory", "respond_with_intent")
+    workflow.add_edge("respond_with_intent", "generate_response")
+    workflow.add_edge("generate_response", "store_conversation")
+    workflow.add_edge("store_conversation", END)
+    
+    return workflow.compile()
+
+
+def create_tool_calling_graph() -> StateGraph:
+    """Create the native tool-calling workflow graph
+    
+    No separate intent classification or action planning: the model sees
+    the tool schemas and calls what it needs inside a bounded loop.
+    """
+    workflow = StateGraph(AgentState)
+    
+    workflow.add_node("answer_from_data", graph_node("answer_from_data", answer_from_data_node))
+    workflow.add_node("retrieve_memory", graph_node("retrieve_memory", retrieve_memory_node))
+    workflow.add_node("call_tools", graph_node("call_tools", call_tools_node))
+    workflow.add_node("generate_response", graph_node("generate_response", generate_response_node))
+    workflow.add_node("store_conversation", graph_node("store_conversation", store_conversation_node))
+    
+    workflow.set_entry_point("answer_from_data")
+    workflow.add_conditional_edges(
+        "answer_from_data",
+        route_after_data_answer,
+        {
+            "done": END,
+            "continue": "retrieve_memory",
+        }
+    )
+    workflow.add_edge("retrieve_memory", "call_tools")
+    workflow.add_edge("call_tools", "generate_response")
+    workflow.add_edge("generate_response", "store_conversation")
+    workflow.add_edge("store_conversation", END)
+    
+    return workflow.compile()
+
+
 # Global agent graph instance
 agent_graph = create_agent_graph()
@@ -1,13 +1,87 @@
 """Agent nodes (processing steps)"""
 
+import asyncio
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set, Tuple
 from langchain_core.messages import HumanMessage, AIMessage
 
+from app.agent import deadline
 from app.agent.state import AgentState
+from app.agent.progress import emit_progress
 from app.services.ai_service import ai_service
+from app.services.memory_ranker import rerank, policy_for
+from app.services.memory_prefetch import memory_prefetcher, RETRIEVAL_SCOPES
+from app.services.prompt_budget import PromptBuilder, budget_for
+from app.core.config import settings
 from app.core.vector_store import vector_store
-from app.tools import all_tools
+from app.core.metrics import metrics
+from app.core.tracing import create_background_task
+from app.agent.executor import execute_actions, format_tool_results, answer_from_data, run_tool_loop
+from app.tools import tool_registry
+
+
+# Deferred conversation writes (kept referenced until they finish)
+_deferred_tasks: Set[asyncio.Task] = set()
+
+# Tool/action plans per intent
+ACTION_PLANS = {
+    "planning": ["check_pending_tasks", "create_daily_plan_or_task"],
+    "learning": ["get_learning_progress", "create_or_update_learning_plan"],
+    "remembering": ["search_memory_or_store_info"],
+    "rewriting": ["rewrite_text"],
+    "decision_making": ["analyze_decision"],
+    "general": ["search_memory", "general_conversation"]
+}
+
+# Actions that use retrieved memory as context
+MEMORY_ACTIONS = {
+    "create_daily_plan_or_task",
+    "create_or_update_learning_plan",
+    "search_memory_or_store_info",
+    "analyze_decision",
+    "search_memory",
+    "general_conversation",
+}
+
+def retrieval_policy_for(intent: str) -> str:
+    """Get the retrieval policy for an intent (defaults to "all")"""
+    policy = settings.memory_retrieval_policy.get(intent, "all")
+    return policy if policy in RETRIEVAL_SCOPES else "all"
+
+
+def route_after_planning(state: AgentState) -> str:
+    """Retrieve memory only if the intent allows it and a planned action needs it"""
+    needs_memory = any(action in MEMORY_ACTIONS for action in state.get("planned_actions", []))
+    
+    if retrieval_policy_for(state.get("intent", "general")) != "none" and needs_memory:
+        return "retrieve_memory"
+    
+    # Account for the retrieval work we skipped
+    metrics.increment("retrieve_memory.skipped")
+    metrics.increment("retrieve_memory.saved_ms", metrics.mean("node.retrieve_memory") * 1000)
+    metrics.increment("retrieve_memory.saved_embed_cpu_ms", metrics.mean("memory.embed.cpu") * 1000)
+    return "execute_tools"
+
+
+async def answer_from_data_node(state: AgentState) -> Dict[str, Any]:
+    """Serve pure data lookups ("what's pending?") straight from SQLite"""
+    user_input = state["user_input"]
+    
+    answer = await answer_from_data(user_input)
+    if not answer:
+        return {}
+    
+    return {
+        "intent": answer["intent"],
+        "tool_results": [answer["tool_result"]],
+        "messages": [HumanMessage(content=user_input), AIMessage(content=answer["response"])],
+        "final_response": answer["response"]
+    }
+
+
+def route_after_data_answer(state: AgentState) -> str:
+    """Skip the LLM pipeline when the data fast path already answered"""
+    return "done" if state.get("final_response") else "continue"
 
 
 async def detect_intent_node(state: AgentState) -> Dict[str, Any]:
@@ -23,23 +97,68 @@ async def detect_intent_node(state: AgentState) -> Dict[str, Any]:
     }
 
 
+def _search_memory(
+    user_input: str,
+    n_results: int,
+    memory_types: Optional[List[str]]
+) -> Tuple[List[float], List[Dict[str, Any]]]:
+    """Query embedding and global top-k candidates across the allowed memory types
+    
+    One ANN query in the unified layout. Runs in a worker thread.
+    """
+    with metrics.timer("memory.embed"):
+        query_embedding = vector_store.embed_query(user_input)
+    with metrics.timer("memory.search"):
+        candidates = vector_store.search(
+            user_input,
+            n_results=n_results,
+            memory_types=memory_types,
+            query_embedding=query_embedding,
+            include_embeddings=True
+        )
+    return query_embedding, candidates
+
+
 async def retrieve_memory_node(state: AgentState) -> Dict[str, Any]:
     """Retrieve relevant memory based on user input"""
     user_input = state["user_input"]
+    intent = state.get("intent", "general")
+    policy = retrieval_policy_for(intent)
+    step = deadline.retrieval_step(state)
+    
+    # Reuse what was fetched while the user was typing, if it matches
+    prefetched = await memory_prefetcher.take(
+        state.get("session_id"), user_input, policy, wait=step is None
+    )
+    if prefetched:
+        query_embedding, candidates = prefetched
+        step = None
+    elif step == deadline.SKIP_RETRIEVAL:
+        return {"retrieved_memory": [], **deadline.degraded(state, step)}
+    else:
+        # Running late: fetch only as many candidates as the prompt can use
+        n_results = policy_for(intent).top_k if step == deadline.SHRINK_RETRIEVAL else settings.memory_top_k
+        
+        # Embedding and the ANN query block, so they run off the event loop
+        query_embedding, candidates = await asyncio.to_thread(
+            _search_memory, user_input, n_results, RETRIEVAL_SCOPES[policy]
+        )
     
-    # Search across all memory types
-    memory_results = vector_store.search_all(user_input, n_results=3)
+    # Keep only relevant, diverse memories for the prompt (MMR is numpy work: off the loop too)
+    results = await asyncio.to_thread(rerank, candidates, policy_for(intent), query_embedding)
     
-    # Flatten results
     retrieved_memory = []
-    for memory_type, results in memory_results.items():
-        for result in results:
-            retrieved_memory.append({
-                "type": memory_type,
-                "content": result["content"],
-                "metadata": result["metadata"]
-            })
+    for result in results:
+        retrieved_memory.append({
+            "type": result["type"],
+            "content": result["content"],
+            "metadata": result["metadata"],
+            "distance": result["distance"],
+            "score": result["score"]
+        })
     
+    if step:
+        return {"retrieved_memory": retrieved_memory, **deadline.degraded(state, step)}
     return {"retrieved_memory": retrieved_memory}
 
 
@@ -48,61 +167,219 @@ async def plan_actions_node(state: AgentState) -> Dict[str, Any]:
     intent = state["intent"]
     user_input = state["user_input"]
     
-    # Define action plans based on intent
-    action_plans = {
-        "planning": ["check_pending_tasks", "create_daily_plan_or_task"],
-        "learning": ["get_learning_progress", "create_or_update_learning_plan"],
-        "remembering": ["search_memory_or_store_info"],
-        "rewriting": ["rewrite_text"],
-        "decision_making": ["analyze_decision"],
-        "general": ["search_memory", "general_conversation"]
-    }
-    
-    planned_actions = action_plans.get(intent, ["general_conversation"])
+    planned_actions = ACTION_PLANS.get(intent, ["general_conversation"])
     
     return {"planned_actions": planned_actions}
 
 
-async def execute_tools_node(state: AgentState) -> Dict[str, Any]:
-    """Execute planned tools based on actions"""
-    user_input = state["user_input"]
-    intent = state["intent"]
-    memory_context = state.get("retrieved_memory", [])
-    
-    # Build context from memory
-    memory_text = ""
-    if memory_context:
-        memory_text = "\n\nRelevant context from memory:\n"
-        for mem in memory_context[:3]:  # Top 3 memories
-            memory_text += f"- [{mem['type']}] {mem['content'][:200]}...\n"
-    
-    # Create response using AI directly (simplified approach)
-    system_prompt = f"""You are ab360, a personal AI assistant. You help with:
+# Static system prompt: identical on every turn, so Ollama can reuse its
+# prompt KV cache. Anything that changes per turn goes in the user prompt.
+SYSTEM_PROMPT = """You are ab360, a personal AI assistant. You help with:
 - Daily planning and task management
 - Learning and self-improvement
 - Memory and information storage
 - Communication assistance
 - Decision support
 
-Current intent: {intent}
-{memory_text}
+Context for the current request (its intent, relevant memories and data from the user's
+records) is given before the user's message. Respond helpfully to the user's request.
+Be concise but thorough."""
+
+
+# Prompt sections by priority when the token budget is tight (higher is kept first)
+TOOL_PRIORITY = 30
+HISTORY_PRIORITY = 20
+MEMORY_PRIORITY = 10
+
 
-Respond helpfully to the user's request. Be concise but thorough."""
+def build_context(
+    memory_lines: List[str],
+    intent: Optional[str] = None,
+    tool_lines: List[str] = ()
+) -> str:
+    """Volatile per-turn context: intent, retrieved memory and tool results"""
+    sections = []
+    if intent:
+        sections.append(f"Current intent: {intent}")
+    
+    if memory_lines:
+        sections.append("Relevant context from memory:\n" + "\n".join(memory_lines))
+    
+    if tool_lines:
+        sections.append("Current data from the user's records:\n" + "\n".join(tool_lines))
+    
+    return "\n\n".join(sections)
+
+
+def build_prompt(
+    user_input: str,
+    memory_context: List[Dict[str, Any]],
+    intent: Optional[str] = None,
+    tool_lines: List[str] = (),
+    history: Optional[List[Dict[str, str]]] = None
+) -> Tuple[str, List[Dict[str, str]]]:
+    """User prompt and history fitted to the intent's prompt token budget
+    
+    The system prompt, the user's message and the history summary are always
+    sent. The rest of the budget goes to tool data first, then to the most
+    recent turns of history, then to memories in rank order; whatever does
+    not fit is dropped from the lowest-value end.
+    """
+    history = history or []
+    summary = [message for message in history if message["role"] == "system"]
+    turns = [message for message in history if message["role"] != "system"]
+    pairs = [turns[i:i + 2] for i in range(0, len(turns), 2)]
+    
+    builder = PromptBuilder(budget_for(intent)).reserve(
+        SYSTEM_PROMPT, user_input, build_context([], intent), *(message["content"] for message in summary)
+    )
+    builder.add("tools", list(tool_lines), TOOL_PRIORITY, settings.prompt_tool_item_tokens)
+    builder.add(
+        "history",
+        ["\n".join(message["content"] for message in pair) for pair in reversed(pairs)],
+        HISTORY_PRIORITY,
+        truncate=False
+    )
+    builder.add(
+        "memory",
+        [f"- [{mem['type']}] {mem['content']}" for mem in memory_context],  # Already re-ranked per intent
+        MEMORY_PRIORITY,
+        settings.prompt_memory_item_tokens
+    )
+    kept = builder.build()
+    
+    metrics.increment(f"prompt.{intent or 'unknown'}.builds")
+    metrics.increment(f"prompt.{intent or 'unknown'}.estimated_tokens", builder.used)
+    
+    kept_pairs = pairs[len(pairs) - len(kept["history"]):]
+    fitted_history = summary + [message for pair in kept_pairs for message in pair]
+    
+    context = build_context(kept["memory"], intent, kept["tools"])
+    if not context:
+        return user_input, fitted_history
+    return f"{context}\n\nUser message: {user_input}", fitted_history
+
+
+def build_user_prompt(
+    user_input: str,
+    memory_context: List[Dict[str, Any]],
+    intent: Optional[str] = None,
+    tool_lines: List[str] = ()
+) -> str:
+    """User prompt with the volatile context placed last, right before the message"""
+    return build_prompt(user_input, memory_context, intent, tool_lines)[0]
+
+
+async def respond_with_intent_node(state: AgentState) -> Dict[str, Any]:
+    """Single-round-trip mode: detect intent and answer in one LLM call"""
+    user_input = state["user_input"]
+    memory_context = state.get("retrieved_memory", [])
     
     try:
-        # Generate response using Ollama
-        response = await ai_service.generate_response(user_input, system_prompt)
+        prompt, history = build_prompt(user_input, memory_context, history=state.get("history"))
+        # The combined call needs its JSON format, so a late turn only caps output
+        limits = deadline.generation_limits(state, "combined", allow_fast=False)
+        # The intent is parsed early from the stream; clients see it before the answer is done
+        result = await ai_service.respond_with_intent(
+            prompt,
+            SYSTEM_PROMPT,
+            on_intent=lambda intent: emit_progress("respond_with_intent", intent=intent),
+            history=history,
+            num_predict=limits["num_predict"]
+        )
+        intent = result["intent"]
+        response = result["response"]
         
         return {
+            "intent": intent,
+            "planned_actions": ACTION_PLANS.get(intent, ["general_conversation"]),
             "tool_results": [{"output": response}],
-            "messages": [AIMessage(content=response)]
+            "messages": [HumanMessage(content=user_input), AIMessage(content=response)],
+            **deadline.degraded(state, *limits["steps"])
+        }
+    except Exception as e:
+        error_msg = f"Error generating response: {str(e)}"
+        return {
+            "intent": "general",
+            "tool_results": [{"error": error_msg}],
+            "messages": [AIMessage(content=error_msg)]
         }
+
+
+async def call_tools_node(state: AgentState) -> Dict[str, Any]:
+    """Native tool-calling mode: the model chooses and calls tools itself"""
+    user_input = state["user_input"]
+    memory_context = state.get("retrieved_memory", [])
+    
+    try:
+        prompt, history = build_prompt(user_input, memory_context, history=state.get("history"))
+        result = await run_tool_loop(prompt, SYSTEM_PROMPT, history, state)
     except Exception as e:
         error_msg = f"Error generating response: {str(e)}"
         return {
+            "intent": "general",
             "tool_results": [{"error": error_msg}],
             "messages": [AIMessage(content=error_msg)]
         }
+    
+    # The tools the model used tell us what the turn was about
+    intent = next(
+        (
+            tool_registry.intent_of(tool_result["tool_name"])
+            for tool_result in result["tool_results"]
+            if tool_registry.intent_of(tool_result["tool_name"])
+        ),
+        "general"
+    )
+    response = result["response"]
+    
+    return {
+        "intent": intent,
+        "tool_results": result["tool_results"] + [{"output": response}],
+        "messages": [HumanMessage(content=user_input), AIMessage(content=response)],
+        **deadline.degraded(state, *result["degradations"])
+    }
+
+
+async def execute_tools_node(state: AgentState) -> Dict[str, Any]:
+    """Execute planned tools based on actions"""
+    user_input = state["user_input"]
+    intent = state["intent"]
+    memory_context = state.get("retrieved_memory", [])
+    
+    # Run the tools behind the planned actions concurrently, then feed their
+    # structured results into a single generation
+    tool_results = await execute_actions(state.get("planned_actions", []))
+    prompt, history = build_prompt(
+        user_input, memory_context, intent, format_tool_results(tool_results), state.get("history")
+    )
+    
+    limits = deadline.generation_limits(state)
+    
+    try:
+        # Generate response using Ollama
+        response = await ai_service.generate_response(
+            prompt,
+            SYSTEM_PROMPT,
+            profile=limits["profile"],
+            session_id=state.get("session_id"),
+            history=history,
+            num_predict=limits["num_predict"],
+            # Memories and tool data are per-turn; only a plain exchange is kept in the session context
+            volatile=bool(memory_context or tool_results)
+        )
+        
+        return {
+            "tool_results": tool_results + [{"output": response}],
+            "messages": [AIMessage(content=response)],
+            **deadline.degraded(state, *limits["steps"])
+        }
+    except Exception as e:
+        error_msg = f"Error generating response: {str(e)}"
+        return {
+            "tool_results": tool_results + [{"error": error_msg}],
+            "messages": [AIMessage(content=error_msg)]
+        }
 
 
 async def generate_response_node(state: AgentState) -> Dict[str, Any]:
@@ -111,6 +388,8 @@ async def generate_response_node(state: AgentState) -> Dict[str, Any]:
     intent = state["intent"]
     tool_results = state.get("tool_results", [])
     
+    update = {}
+    
     # If tool execution provided output, use it
     if tool_results and len(tool_results) > 0:
         last_result = tool_results[-1]
@@ -122,14 +401,19 @@ async def generate_response_node(state: AgentState) -> Dict[str, Any]:
             final_response = "I've processed your request."
     else:
         # Generate response without tools
-        system_prompt = f"""You are ab360, a helpful personal AI assistant.
-The user's intent seems to be: {intent}
-
-Provide a helpful, concise response."""
-        
-        final_response = await ai_service.generate_response(user_input, system_prompt)
+        prompt, history = build_prompt(user_input, [], intent, history=state.get("history"))
+        limits = deadline.generation_limits(state)
+        final_response = await ai_service.generate_response(
+            prompt,
+            SYSTEM_PROMPT,
+            profile=limits["profile"],
+            session_id=state.get("session_id"),
+            history=history,
+            num_predict=limits["num_predict"]
+        )
+        update = deadline.degraded(state, *limits["steps"])
     
-    return {"final_response": final_response}
+    return {"final_response": final_response, **update}
 
 
 async def store_conversation_node(state: AgentState) -> Dict[str, Any]:
@@ -141,10 +425,26 @@ async def store_conversation_node(state: AgentState) -> Dict[str, Any]:
     intent = state["intent"]
     
     # Store if conversation seems important (not just general chat)
-    if intent in ["planning", "learning", "remembering", "decision_making"]:
+    if intent not in ["planning", "learning", "remembering", "decision_making"]:
+        return {}
+    
+    async def store():
         try:
-            await store_conversation(user_input, final_response, intent)
-        except:
-            pass  # Fail silently
+            await store_conversation.ainvoke({
+                "user_input": user_input,
+                "agent_response": final_response,
+                "intent": intent
+            })
+        except Exception as e:
+            # Storing is best effort; cancellation still propagates
+            print(f"[ERROR] Storing conversation failed: {e}")
+    
+    # Running late: embed and store after the response has gone out
+    if deadline.storage_deferred(state):
+        task = create_background_task(store())
+        _deferred_tasks.add(task)
+        task.add_done_callback(_deferred_tasks.discard)
+        return deadline.degraded(state, deadline.DEFER_STORAGE)
     
+    await store()
     return {}
@@ -0,0 +1,42 @@
+"""Node progress events for clients following a chat turn"""
+
+from functools import wraps
+from typing import Any, Callable, Dict
+
+from app.services.turns import current_turn
+
+
+def summarize_update(update: Dict[str, Any]) -> Dict[str, Any]:
+    """What a node's state update tells the client (intent, memories, actions, tools)"""
+    summary: Dict[str, Any] = {}
+    if update.get("intent"):
+        summary["intent"] = update["intent"]
+    if "retrieved_memory" in update:
+        summary["memories"] = len(update["retrieved_memory"])
+    if update.get("planned_actions"):
+        summary["actions"] = update["planned_actions"]
+    tools = [result["tool_name"] for result in update.get("tool_results", []) if "tool_name" in result]
+    if tools:
+        summary["tools"] = tools
+    if update.get("degradations"):
+        summary["degradations"] = update["degradations"]
+    return summary
+
+
+def emit_progress(name: str, **fields: Any) -> None:
+    """Emit a ``progress`` event for node ``name`` on the current turn, if any"""
+    turn = current_turn.get()
+    if turn:
+        turn.emit({"type": "progress", "node": name, **fields})
+
+
+def report_progress(name: str, node: Callable) -> Callable:
+    """Wrap an async graph node so the current turn emits a ``progress`` event when it finishes"""
+    
+    @wraps(node)
+    async def wrapper(state):
+        update = await node(state)
+        emit_progress(name, **summarize_update(update or {}))
+        return update
+    
+    return wrapper
@@ -25,11 +25,18 @@ class AgentState(TypedDict):
     # Messages for chat history
     messages: List[BaseMessage]
     
+    # Earlier turns of the session (summary + recent turns) as chat messages
+    history: List[Dict[str, str]]
+    
     # Final response to user
     final_response: str
     
     # Session ID
     session_id: str
     
+    # Turn deadline (time.monotonic() seconds) and the degradations applied to meet it
+    deadline: float
+    degradations: List[str]
+    
     # Metadata
     metadata: Dict[str, Any]
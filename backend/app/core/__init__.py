@@ -3,5 +3,6 @@
 from app.core.config import settings
 from app.core.database import db
 from app.core.vector_store import vector_store
+from app.core.metrics import metrics
 
-__all__ = ["settings", "db", "vector_store"]
+__all__ = ["settings", "db", "vector_store", "metrics"]
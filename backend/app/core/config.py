@@ -1,7 +1,7 @@
 """Application configuration"""
 
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, Any, List
 from pydantic_settings import BaseSettings
 
 
@@ -16,14 +16,156 @@ class Settings(BaseSettings):
     # Ollama Configuration
     ollama_base_url: str = "http://localhost:11434"
     ollama_model: str = "gpt-oss:120b-cloud"  # Default Ollama model
+    llm_backend: str = "native"  # "native" (built-in async client) or "langchain" (ChatOllama)
+    ollama_timeout: float = 120.0  # seconds per request
+    ollama_keep_alive: str = "5m"  # How long Ollama keeps the model loaded after a call
+    ollama_default_num_ctx: int = 2048  # Ollama's context window for profiles that set no num_ctx
+    
+    # Session context reuse: continue each chat session's Ollama context
+    # instead of re-evaluating earlier turns
+    session_context_reuse: bool = True
+    session_context_max_tokens: int = 6144  # Start a fresh context past this (or the profile's num_ctx if lower)
+    session_context_max_sessions: int = 256  # Cached contexts kept (least recently used dropped)
+    
+    # Session history included in prompts
+    session_max_turns: int = 20  # Summarize once a session holds this many unsummarized turns
+    session_token_budget: int = 1500  # Summarize older turns once history exceeds this
+    session_keep_recent_turns: int = 4  # Turns left verbatim after summarizing
+    session_idle_seconds: int = 1800  # Idle sessions are dropped from memory (kept in SQLite)
+    
+    # Agent mode: how a chat turn reaches its answer (default: intent call, then generation)
+    combined_intent_mode: bool = False  # One LLM call returns intent + answer
+    native_tool_calling: bool = False  # Model calls tools itself via Ollama's tools parameter
+    max_tool_iterations: int = 4  # Tool-calling rounds before forcing a final answer
+    
+    # Generation profiles per call site: temperature, num_predict (max output
+    # tokens), num_ctx, stop and format. Omitted fields use the model's defaults.
+    generation_profiles: Dict[str, Dict[str, Any]] = {
+        "chat": {"temperature": 0.7},
+        "intent": {"temperature": 0.0, "num_predict": 8, "num_ctx": 2048, "stop": ["\n"]},
+        "combined": {"temperature": 0.7, "format": "json"},
+        "planning": {"temperature": 0.3, "format": "json"},
+        "decision": {"temperature": 0.3, "format": "json"},
+        "rewrite": {"temperature": 0.5},
+        "tools": {"temperature": 0.2},
+        "summary": {"temperature": 0.2, "num_predict": 256},
+        "fast": {"temperature": 0.5, "num_predict": 256},  # Used when a turn is running late
+    }
+    # Per-profile field overrides, e.g. {"chat": {"num_ctx": 8192}}
+    generation_profile_overrides: Dict[str, Dict[str, Any]] = {}
+    
+    # Model routing: call type (intent, rewrite, chat, planning, decision, fast) -> model.
+    # Unrouted call types use ollama_model.
+    model_routes: Dict[str, str] = {}  # e.g. {"intent": "llama3.2:1b", "rewrite": "llama3.2:3b"}
+    model_fallbacks: List[str] = []  # Tried in order when a model is missing, failing or busy
+    model_max_in_flight: int = 2  # Concurrent calls per model before falling back
+    model_error_cooldown: float = 30.0  # seconds a model is skipped after a failed call
+    model_check_interval: float = 60.0  # seconds between /api/tags availability checks
     
     # Database
     database_path: str = "./data/ab360.db"
     vector_store_path: str = "./data/chromadb"
     
+    # Memory
+    memory_layout: str = "separate"  # "separate" (one collection per type) or "unified"
+    memory_collection: str = "memory"  # Collection name used by the unified layout
+    memory_top_k: int = 9  # Candidate memories retrieved per turn
+    # Per-intent retrieval policy: "none", "notes" (notes only) or "all"
+    memory_retrieval_policy: Dict[str, str] = {
+        "rewriting": "none",
+        "decision_making": "notes",
+    }
+    
+    # Embeddings: collections are stamped with the model/version that built
+    # them; changing either triggers a background re-index into a shadow collection
+    embedding_model: str = "all-MiniLM-L6-v2"  # Built-in ONNX model, or any Ollama embedding model
+    embedding_version: str = "1"  # Bump to force a re-index with the same model name
+    reindex_batch_size: int = 64
+    reindex_on_startup: bool = True
+    
+    # HNSW index parameters, applied when a collection is created
+    # (existing collections keep theirs until rebuilt). Tune with tune_hnsw.py.
+    hnsw_space: str = "l2"  # l2, cosine or ip (memory_max_distance depends on it)
+    hnsw_m: int = 16
+    hnsw_construction_ef: int = 100
+    hnsw_search_ef: int = 10
+    # Per-collection overrides, e.g. {"conversations": {"m": 32, "search_ef": 64}}
+    hnsw_overrides: Dict[str, Dict[str, Any]] = {}
+    
+    # Memory re-ranking (defaults, overridable per intent)
+    memory_context_k: int = 3  # Memories kept for the prompt
+    memory_max_distance: float = 1.2  # Drop candidates farther than this
+    memory_mmr_lambda: float = 0.7  # 1.0 = pure relevance, 0.0 = pure diversity
+    memory_recency_half_life_days: float = 0.0  # 0 disables recency decay
+    memory_rerank_overrides: Dict[str, Dict[str, float]] = {
+        "planning": {"recency_half_life_days": 7.0},
+        "learning": {"recency_half_life_days": 30.0},
+        "remembering": {"top_k": 5, "max_distance": 1.4},
+        "rewriting": {"top_k": 1, "max_distance": 0.8},
+    }
+    
+    # Speculative retrieval from partial input (POST /api/memory/prefetch)
+    memory_prefetch: bool = True
+    prefetch_min_chars: int = 12  # Shorter input is not worth searching
+    prefetch_min_similarity: float = 0.85  # Submitted text must be this close to reuse results
+    prefetch_ttl_seconds: float = 60.0
+    prefetch_wait_seconds: float = 1.0  # Wait this long for a prefetch of nearly the same text
+    prefetch_max_sessions: int = 256
+    
+    # Prompt budgets (estimated tokens for system prompt, history and context)
+    prompt_token_budget: int = 2048
+    prompt_token_budgets: Dict[str, int] = {"general": 1536}  # Per-intent overrides
+    prompt_chars_per_token: float = 4.0  # Starting estimate; calibrated from Ollama's token counts
+    prompt_memory_item_tokens: int = 150  # Cap per retrieved memory
+    prompt_tool_item_tokens: int = 400  # Cap per tool result
+    
     # Performance
     max_response_time: int = 3  # seconds
     
+    # Turn deadline: late turns shrink or skip retrieval, cap output, switch
+    # to the "fast" profile and defer storage to hold the SLO
+    response_slo_seconds: float = 8.0  # Target latency per chat turn, counted from admission
+    deadline_degradation: bool = True
+    deadline_fast_fraction: float = 0.5  # Switch to "fast" below this share of the usual generation time
+    deadline_tokens_per_second: float = 20.0  # Decode speed assumed until one is measured
+    deadline_min_output_tokens: int = 64  # Output is never capped below this
+    
+    # Chat admission: concurrency, queueing and per-session rate limits for /api/chat
+    chat_max_in_flight: int = 2  # Turns running at once; the rest wait in the queue
+    chat_queue_size: int = 8  # Turns beyond this many waiting are rejected with 503
+    chat_queue_timeout: float = 10.0  # seconds a turn may wait for a slot before a 503
+    session_rate_per_minute: float = 20.0  # Token bucket refill per session (429 when empty)
+    session_burst: int = 5  # Messages a session may send back to back
+    disconnect_poll_seconds: float = 0.25  # How often a running chat turn checks its client is still there
+    
+    # WebSocket chat (/api/ws)
+    ws_max_queued_events: int = 256  # Unsent events before token events are dropped
+    
+    # Responses: list endpoints stream rows in batches; larger responses are gzipped
+    list_batch_size: int = 500  # Rows fetched and encoded per chunk
+    response_gzip_min_bytes: int = 4096  # Compress responses at least this large (0 disables)
+    
+    # Tracing: spans per request (Server-Timing header, GET /api/debug/traces)
+    tracing: bool = True
+    trace_buffer_size: int = 100  # Recent traces kept in memory
+    trace_max_spans: int = 512  # Spans kept per trace (the rest are counted as dropped)
+    trace_export_path: str = ""  # Append finished traces as OTLP JSON lines (empty disables)
+    
+    # Tools
+    tool_timeout: float = 5.0  # seconds, per tool call
+    # Per-tool overrides; the LLM-backed tools get the time of a generation.
+    # Write tools without an entry run to completion.
+    tool_timeouts: Dict[str, float] = {"create_daily_plan": 120.0, "create_learning_plan": 120.0}
+    
+    # Background jobs (POST /api/jobs/)
+    job_workers: int = 1  # Concurrent background jobs (keeps the LLM free for chat)
+    
+    # Decision analysis and rewriting of long texts
+    decision_fan_out: bool = True  # Analyze each decision option in its own call, then merge
+    decision_concurrency: int = 3  # Option analyses in flight at once
+    rewrite_chunk_chars: int = 2000  # Longer texts are rewritten in chunks of about this size
+    rewrite_concurrency: int = 3  # Chunks rewritten at once
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -3,8 +3,69 @@
 import sqlite3
 from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 from app.core.config import settings
+from app.core.tracing import tracer
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor whose statements show up as ``sqlite.<verb>`` spans in the current trace"""
+    
+    @staticmethod
+    def _span(sql: str):
+        verb = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else "execute"
+        return tracer.span(f"sqlite.{verb}", **{"db.statement": " ".join(sql.split())[:200]})
+    
+    def execute(self, sql, parameters=()):
+        with self._span(sql):
+            return super().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        with self._span(sql):
+            return super().executemany(sql, seq_of_parameters)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection handing out ``TracedCursor``"""
+    
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+    
+    # The built-in shortcuts create a plain cursor; route them through ours
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class RowBatches:
+    """A query's rows as dicts, fetched a batch at a time; owns its connection
+    
+    The connection closes after the last batch, or on ``close()`` - which
+    also works before the first batch, when a client leaves early.
+    """
+    
+    def __init__(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor, batch_size: int):
+        self.conn: Optional[sqlite3.Connection] = conn
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.columns = [column[0] for column in cursor.description]
+    
+    def __iter__(self) -> "RowBatches":
+        return self
+    
+    def __next__(self) -> List[Dict[str, Any]]:
+        rows = self.cursor.fetchmany(self.batch_size) if self.conn is not None else []
+        if not rows:
+            self.close()
+            raise StopIteration
+        return [dict(zip(self.columns, row)) for row in rows]
+    
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
 
 
 class Database:
@@ -17,7 +78,7 @@ class Database:
     @contextmanager
     def get_connection(self):
         """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=TracedConnection)
         conn.row_factory = sqlite3.Row
         try:
             yield conn
@@ -28,6 +89,20 @@ class Database:
         finally:
             conn.close()
     
+    def iter_rows(self, query: str, params: tuple = (), batch_size: int = 500) -> RowBatches:
+        """Run a query now and return its rows as dicts, in batches of ``batch_size``
+        
+        For streaming responses: batches are fetched on demand (possibly from
+        different worker threads) and the connection closes after the last one,
+        or when the consumer calls ``close()``.
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=TracedConnection)
+        try:
+            return RowBatches(conn, conn.execute(query, params), batch_size)
+        except Exception:
+            conn.close()
+            raise
+    
     def init_db(self):
         """Initialize database tables"""
         with self.get_connection() as conn:
@@ -122,6 +197,47 @@ class Database:
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            
+            # Background jobs table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT DEFAULT 'queued',
+                    params TEXT,
+                    progress REAL DEFAULT 0,
+                    partial_results TEXT DEFAULT '[]',
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            """)
+            
+            # Chat sessions: rolling summary of turns no longer kept verbatim
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    summary TEXT DEFAULT '',
+                    summarized_upto INTEGER DEFAULT 0,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS session_turns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    user_message TEXT NOT NULL,
+                    assistant_message TEXT NOT NULL,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_session_turns_session ON session_turns (session_id, id)"
+            )
 
 
 # Global database instance
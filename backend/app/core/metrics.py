@@ -0,0 +1,93 @@
+"""In-process metrics (counters and latency summaries)"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, Callable
+
+from app.core.tracing import tracer
+
+
+class Metrics:
+    """Lightweight metrics registry
+    
+    Counters are plain totals; timings keep a sliding window of recent
+    observations (seconds) for mean/percentile summaries.
+    """
+    
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._window = window
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.timings: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self._window))
+    
+    def increment(self, name: str, value: float = 1) -> None:
+        """Increment a counter"""
+        with self._lock:
+            self.counters[name] += value
+    
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a timing observation"""
+        with self._lock:
+            self.timings[name].append(seconds)
+    
+    def mean(self, name: str) -> float:
+        """Mean of the recent observations for a timing (0 if none)"""
+        with self._lock:
+            values = list(self.timings.get(name, ()))
+        return sum(values) / len(values) if values else 0.0
+    
+    @contextmanager
+    def timer(self, name: str):
+        """Time a block: records ``<name>`` (wall) and ``<name>.cpu`` (thread CPU)"""
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+            self.observe(f"{name}.cpu", time.thread_time() - cpu_start)
+    
+    def summary(self, name: str) -> Dict[str, float]:
+        """Count, mean, p50 and p99 (milliseconds) for a timing"""
+        with self._lock:
+            values = sorted(self.timings.get(name, ()))
+        if not values:
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0}
+        
+        def percentile(p: float) -> float:
+            return values[min(int(p * len(values)), len(values) - 1)] * 1000
+        
+        return {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values) * 1000, 2),
+            "p50_ms": round(percentile(0.50), 2),
+            "p99_ms": round(percentile(0.99), 2),
+        }
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """All counters and timing summaries"""
+        with self._lock:
+            counters = dict(self.counters)
+            names = list(self.timings)
+        return {
+            "counters": counters,
+            "timings": {name: self.summary(name) for name in sorted(names)},
+        }
+
+
+def track_node(name: str, node: Callable) -> Callable:
+    """Wrap an async graph node so its latency is recorded as ``node.<name>`` (and traced)"""
+    
+    @wraps(node)
+    async def wrapper(state):
+        with metrics.timer(f"node.{name}"), tracer.span(f"node.{name}"):
+            return await node(state)
+    
+    return wrapper
+
+
+# Global metrics instance
+metrics = Metrics()
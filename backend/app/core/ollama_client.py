@@ -0,0 +1,209 @@
+"""Minimal native async client for the Ollama HTTP API"""
+
+import asyncio
+import json
+import time
+from typing import Optional, Dict, Any, List, AsyncIterator
+
+import httpx
+
+from app.core.config import settings
+from app.core.tracing import Span, tracer
+
+
+class OllamaError(Exception):
+    """Ollama returned an error response"""
+    
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"Ollama request failed with status {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class OllamaClient:
+    """Thin async wrapper over /api/chat, /api/generate, /api/embeddings and /api/tags
+    
+    Keeps one pooled ``httpx.AsyncClient`` per event loop, so calls reuse
+    connections instead of paying a TCP handshake each time, and passes
+    ``options``, ``format``, ``keep_alive`` and ``tools`` straight through.
+    Responses are returned as Ollama's JSON (final stats such as
+    ``eval_count`` and ``prompt_eval_duration`` included).
+    """
+    
+    def __init__(self, base_url: Optional[str] = None, timeout: Optional[float] = None):
+        self.base_url = base_url or settings.ollama_base_url
+        self.timeout = httpx.Timeout(timeout or settings.ollama_timeout, connect=5.0)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+            self._loop = loop
+        return self._client
+    
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
+    @staticmethod
+    def _payload(model: str, stream: bool, **fields: Any) -> Dict[str, Any]:
+        payload = {"model": model, "stream": stream, "keep_alive": settings.ollama_keep_alive}
+        payload.update({key: value for key, value in fields.items() if value is not None})
+        return payload
+    
+    @staticmethod
+    def _raise_for_status(response: httpx.Response, body: Optional[bytes] = None) -> None:
+        if response.status_code != 200:
+            try:
+                detail = json.loads(body if body is not None else response.content).get("error", "")
+            except (ValueError, AttributeError):
+                detail = (body if body is not None else response.content).decode(errors="replace")[:200]
+            raise OllamaError(response.status_code, detail)
+    
+    @staticmethod
+    def _trace_stats(span: Optional[Span], stats: Dict[str, Any], end_ns: int) -> None:
+        """Split a traced call into Ollama's own phases: queue, load, prefill and generation
+        
+        The phases are laid back to back ending when the response did; time
+        before them was spent waiting for Ollama (its request queue, or the
+        network).
+        """
+        if span is None or not stats.get("total_duration"):
+            return
+        load_ns = stats.get("load_duration", 0)
+        prefill_ns = stats.get("prompt_eval_duration", 0)
+        generation_ns = stats.get("eval_duration", 0)
+        generation_start = end_ns - generation_ns
+        prefill_start = generation_start - prefill_ns
+        load_start = prefill_start - load_ns
+        
+        if load_start > span.start_ns:
+            tracer.record("ollama.queue", span.start_ns, load_start, parent=span)
+        if load_ns:
+            tracer.record("ollama.load", load_start, prefill_start, parent=span)
+        if prefill_ns:
+            tracer.record("ollama.prefill", prefill_start, generation_start, parent=span, tokens=stats.get("prompt_eval_count", 0))
+        if generation_ns:
+            tracer.record("ollama.generation", generation_start, end_ns, parent=span, tokens=stats.get("eval_count", 0))
+        span.set(
+            prompt_tokens=stats.get("prompt_eval_count", 0),
+            output_tokens=stats.get("eval_count", 0),
+            tokens_per_second=round(stats.get("eval_count", 0) / (generation_ns / 1e9), 1) if generation_ns else 0.0,
+            queue_ms=round(max(load_start - span.start_ns, 0) / 1e6, 1),
+        )
+    
+    async def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        with tracer.span(f"ollama.{path.rsplit('/', 1)[-1]}", model=payload["model"]) as span:
+            response = await self.client.post(path, json=payload)
+            self._raise_for_status(response)
+            result = response.json()
+            self._trace_stats(span, result, time.time_ns())
+            return result
+    
+    async def _stream(self, path: str, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        # Not made the current span: an async generator's context belongs to its consumer
+        span = tracer.start_span(f"ollama.{path.rsplit('/', 1)[-1]}", model=payload["model"], stream=True)
+        try:
+            async with self.client.stream("POST", path, json=payload) as response:
+                if response.status_code != 200:
+                    self._raise_for_status(response, await response.aread())
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if "error" in chunk:
+                        raise OllamaError(response.status_code, chunk["error"])
+                    if span is not None and "ttft_ms" not in span.attributes:
+                        span.set(ttft_ms=round((time.time_ns() - span.start_ns) / 1e6, 1))
+                    if chunk.get("done"):
+                        self._trace_stats(span, chunk, time.time_ns())
+                    yield chunk
+                    if chunk.get("done"):
+                        break
+        except (Exception, asyncio.CancelledError) as e:
+            if span is not None:
+                span.end(e)
+            raise
+        finally:
+            if span is not None:
+                span.end()
+    
+    async def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[str] = None,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        keep_alive: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One non-streaming /api/chat call"""
+        return await self._post("/api/chat", self._payload(
+            model, False, messages=messages, options=options, format=format, tools=tools, keep_alive=keep_alive
+        ))
+    
+    async def stream_chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[str] = None,
+        keep_alive: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream /api/chat chunks; the last one (``done``) carries the stats"""
+        payload = self._payload(model, True, messages=messages, options=options, format=format, keep_alive=keep_alive)
+        async for chunk in self._stream("/api/chat", payload):
+            yield chunk
+    
+    async def generate(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        keep_alive: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One non-streaming /api/generate call"""
+        return await self._post("/api/generate", self._payload(
+            model, False, prompt=prompt, system=system, options=options, format=format,
+            context=context, keep_alive=keep_alive
+        ))
+    
+    async def stream_generate(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        format: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        keep_alive: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream /api/generate chunks; the last one carries the stats and ``context``"""
+        payload = self._payload(
+            model, True, prompt=prompt, system=system, options=options, format=format,
+            context=context, keep_alive=keep_alive
+        )
+        async for chunk in self._stream("/api/generate", payload):
+            yield chunk
+    
+    async def embeddings(self, model: str, prompt: str, keep_alive: Optional[str] = None) -> List[float]:
+        """Embedding vector for one text"""
+        result = await self._post("/api/embeddings", self._payload(model, False, prompt=prompt, keep_alive=keep_alive))
+        return result.get("embedding", [])
+    
+    async def tags(self) -> List[str]:
+        """Names of the locally available models"""
+        response = await self.client.get("/api/tags", timeout=2.0)
+        self._raise_for_status(response)
+        return [m["name"] for m in response.json().get("models", [])]
+
+
+# Global Ollama client
+ollama_client = OllamaClient()
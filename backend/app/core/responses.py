@@ -0,0 +1,64 @@
+"""Response classes for the fast JSON path, and response compression"""
+
+from typing import Any, Iterable, List
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.types import Message, Receive, Scope, Send
+
+from app.core.serialization import dumps, encode_array
+from app.core.tracing import tracer
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson (when installed); the app's default response class"""
+    
+    def render(self, content: Any) -> bytes:
+        with tracer.span("serialize.json") as span:
+            body = dumps(content)
+            if span is not None:
+                span.set(bytes=len(body))
+            return body
+
+
+class JSONArrayResponse(StreamingResponse):
+    """A JSON array streamed from batches of rows, never held in memory as a whole
+    
+    Rows go out as they are fetched, without a pydantic model per row; the
+    endpoint's ``response_model`` still documents their shape.
+    """
+    
+    def __init__(self, batches: Iterable[List[Any]], status_code: int = 200, **kwargs):
+        self.chunks = encode_array(batches)
+        super().__init__(self.chunks, status_code=status_code, media_type="application/json", **kwargs)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # A client that disconnects mid-stream leaves the generator suspended;
+            # closing it releases the rows' database connection now, not at GC
+            self.chunks.close()
+
+
+class StreamAwareGZipResponder(GZipResponder):
+    """Leaves Server-Sent Events uncompressed (gzip would hold events back until its buffer fills)"""
+    
+    async def send_with_gzip(self, message: Message) -> None:
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith("text/event-stream"):
+                self.content_encoding_set = True  # Pass the body through untouched
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Gzip responses of at least ``minimum_size`` bytes for clients that accept it"""
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = StreamAwareGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
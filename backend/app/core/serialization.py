@@ -0,0 +1,66 @@
+"""JSON encoding: orjson when installed, the standard library otherwise"""
+
+import json
+import time
+from typing import Any, Iterable, Iterator, List
+
+try:
+    import orjson
+except ImportError:  # Optional: `poetry add orjson` for the fast path
+    orjson = None
+
+from app.core.tracing import tracer
+
+
+def _default(value: Any) -> str:
+    # Whatever neither encoder knows (datetimes for json, sets, Decimals, ...) goes out as text
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def dumps_str(value: Any) -> str:
+    """Encode to a JSON string (for prompts, tool messages and TEXT columns)"""
+    return dumps(value).decode()
+
+
+def loads(data: Any) -> Any:
+    """Decode JSON from str or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_array(batches: Iterable[List[Any]]) -> Iterator[bytes]:
+    """Encode batches of items as one JSON array, a chunk per batch
+    
+    Each batch is encoded in a single call, so the per-item cost stays
+    inside the encoder instead of Python. ``batches`` is closed (when it
+    can be) once encoding ends, early or not.
+    """
+    yield b"["
+    first = True
+    start_ns = time.time_ns()
+    encode_ns = items = 0
+    try:
+        for batch in batches:
+            if not batch:
+                continue
+            encode_start = time.perf_counter_ns()
+            body = dumps(batch)[1:-1]
+            encode_ns += time.perf_counter_ns() - encode_start
+            items += len(batch)
+            yield body if first else b"," + body
+            first = False
+    finally:
+        close = getattr(batches, "close", None)
+        if close is not None:
+            close()
+    yield b"]"
+    # One span for the encoding time across all batches (fetching and sending excluded)
+    tracer.record("serialize.json_array", start_ns, start_ns + encode_ns, items=items)
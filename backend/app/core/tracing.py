@@ -0,0 +1,294 @@
+"""Per-request tracing: spans, Server-Timing headers, recent traces and OTLP JSON export"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import wraps
+from typing import Any, Callable, Coroutine, Deque, Dict, Iterator, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+class Span:
+    """One timed operation within a trace"""
+    
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+    
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any], start_ns: Optional[int] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+    
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+    
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+    
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+    
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Trace:
+    """The spans of one request or chat turn, under a root span"""
+    
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = os.urandom(16).hex()
+        self.root = Span(name, self.trace_id, None, attributes)
+        self.spans: List[Span] = [self.root]
+        self.dropped = 0
+    
+    def add(self, span: Span) -> None:
+        if len(self.spans) < settings.trace_max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+    
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value: total time per span name, plus the request total"""
+        totals: Dict[str, float] = OrderedDict()
+        for span in self.spans[1:]:
+            if span.end_ns is not None:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        entries = [f"{name};dur={duration:.1f}" for name, duration in totals.items()]
+        entries.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(entries)
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start_ns": self.root.start_ns,
+            "duration_ms": round(self.root.duration_ms, 3),
+            "spans": len(self.spans),
+            "error": self.root.error,
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self.summary(), "dropped_spans": self.dropped, "span_list": [span.to_dict() for span in self.spans]}
+    
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON ``ExportTraceServiceRequest`` for this trace"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": settings.app_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "app.core.tracing"},
+                    "spans": [span.to_otlp() for span in self.spans],
+                }],
+            }]
+        }
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def create_background_task(coro: Coroutine) -> asyncio.Task:
+    """Start a task that outlives the current request or turn, outside its trace
+    
+    Tasks inherit the caller's context, so without this a background task
+    would keep adding spans to a trace that has already been finished and
+    exported.
+    """
+    context = copy_context()
+    context.run(current_trace.set, None)
+    context.run(current_span.set, None)
+    return asyncio.create_task(coro, context=context)
+
+
+class Tracer:
+    """Collects spans for the trace of the current request or chat turn
+    
+    Spans nest through context variables, so graph node tasks and
+    ``asyncio.to_thread`` work started inside a trace report into it.
+    Outside a trace every call is a cheap no-op. Finished traces are kept
+    in a ring buffer of ``settings.trace_buffer_size`` and, when
+    ``settings.trace_export_path`` is set, appended to that file as OTLP
+    JSON lines (one ``ExportTraceServiceRequest`` per trace, the format of
+    the OpenTelemetry Collector's file exporter).
+    """
+    
+    def __init__(self):
+        self._recent: Deque[Trace] = deque(maxlen=settings.trace_buffer_size)
+        self._export_lock = threading.Lock()
+    
+    @contextmanager
+    def trace(self, name: str, **attributes: Any) -> Iterator[Optional[Trace]]:
+        """Trace a request or turn; yields None when tracing is off"""
+        if not settings.tracing:
+            yield None
+            return
+        
+        trace = Trace(name, attributes)
+        trace_token = current_trace.set(trace)
+        span_token = current_span.set(trace.root)
+        try:
+            yield trace
+        except BaseException as e:
+            trace.root.end(e)
+            raise
+        finally:
+            trace.root.end()
+            current_span.reset(span_token)
+            current_trace.reset(trace_token)
+            self._finish(trace)
+    
+    def start_span(self, name: str, parent: Optional[Span] = None, start_ns: Optional[int] = None, **attributes: Any) -> Optional[Span]:
+        """Start a span without making it current (for async generators); call ``end`` on it"""
+        trace = current_trace.get()
+        if trace is None:
+            return None
+        parent = parent or current_span.get()
+        span = Span(name, trace.trace_id, parent.span_id if parent else None, attributes, start_ns)
+        trace.add(span)
+        return span
+    
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Time a block as a child of the current span; yields None outside a trace"""
+        span = self.start_span(name, **attributes)
+        if span is None:
+            yield None
+            return
+        
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(e)
+            raise
+        finally:
+            span.end()
+            current_span.reset(token)
+    
+    def record(self, name: str, start_ns: int, end_ns: int, parent: Optional[Span] = None, **attributes: Any) -> None:
+        """Add an already finished span (e.g. a phase timed by Ollama itself)"""
+        span = self.start_span(name, parent, start_ns, **attributes)
+        if span is not None:
+            span.end_ns = end_ns
+    
+    def traced(self, name: str) -> Callable:
+        """Decorator: run each call of a sync or async function in a span"""
+        
+        def decorator(fn: Callable) -> Callable:
+            if asyncio.iscoroutinefunction(fn):
+                @wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+            
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        
+        return decorator
+    
+    def _finish(self, trace: Trace) -> None:
+        self._recent.append(trace)
+        if settings.trace_export_path:
+            try:
+                line = json.dumps(trace.to_otlp(), separators=(",", ":"))
+                with self._export_lock, open(settings.trace_export_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except Exception as e:
+                print(f"[-] Trace export failed: {e}")
+    
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Summaries of the most recent traces, newest first"""
+        return [trace.summary() for trace in list(self._recent)[::-1][:limit]]
+    
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """A recent trace with all its spans"""
+        for trace in list(self._recent):
+            if trace.trace_id == trace_id:
+                return trace.to_dict()
+        return None
+
+
+class TracingMiddleware:
+    """Trace every HTTP request and report its spans in ``Server-Timing``
+    
+    The header covers the spans finished when the response starts; spans
+    of a streamed body still land in the recorded trace. ``X-Trace-Id``
+    points at the trace in ``GET /api/debug/traces/{trace_id}``.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.tracing or scope["path"].startswith("/api/debug"):
+            await self.app(scope, receive, send)
+            return
+        
+        with tracer.trace(f"{scope['method']} {scope['path']}", **{"http.method": scope["method"], "http.target": scope["path"]}) as trace:
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    trace.root.set(**{"http.status_code": message["status"]})
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", trace.server_timing())
+                    headers.append("X-Trace-Id", trace.trace_id)
+                await send(message)
+            
+            await self.app(scope, receive, send_with_timing)
+
+
+# Global tracer
+tracer = Tracer()
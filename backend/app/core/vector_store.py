@@ -1,118 +1,431 @@
 """ChromaDB vector store for memory"""
 
 import chromadb
+from chromadb.api.types import Documents, Embeddings, EmbeddingFunction
 from chromadb.config import Settings as ChromaSettings
-from typing import List, Dict, Any, Optional
+from chromadb.utils import embedding_functions
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+import threading
+import httpx
 import json
 
 from app.core.config import settings
+from app.core.tracing import tracer
+
+
+# Memory type -> legacy per-type collection name
+MEMORY_TYPES = {
+    "note": "notes",
+    "learning": "learning",
+    "conversation": "conversations",
+}
+
+COLLECTION_DESCRIPTIONS = {
+    "notes": "User notes and information",
+    "learning": "Learning summaries and progress",
+    "conversations": "Important conversation history",
+}
+UNIFIED_DESCRIPTION = "Unified memory (notes, learning, conversations)"
+
+# Embedding model assumed for collections created before stamps existed
+LEGACY_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+LEGACY_EMBEDDING_VERSION = "1"
+
+
+class OllamaEmbeddingFunction(EmbeddingFunction):
+    """Embeddings from an Ollama embedding model (e.g. nomic-embed-text)"""
+    
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+    
+    def __call__(self, input: Documents) -> Embeddings:
+        embeddings = []
+        with httpx.Client(timeout=60.0) as client:
+            for text in input:
+                response = client.post(
+                    f"{settings.ollama_base_url}/api/embeddings",
+                    json={"model": self.model_name, "prompt": text}
+                )
+                response.raise_for_status()
+                embeddings.append(response.json()["embedding"])
+        return embeddings
+
+
+def index_metadata(collection_name: str) -> Dict[str, Any]:
+    """HNSW parameters for a collection (settings defaults + per-collection overrides)"""
+    params = {
+        "space": settings.hnsw_space,
+        "m": settings.hnsw_m,
+        "construction_ef": settings.hnsw_construction_ef,
+        "search_ef": settings.hnsw_search_ef,
+    }
+    params.update(settings.hnsw_overrides.get(collection_name, {}))
+    return {
+        "hnsw:space": str(params["space"]),
+        "hnsw:M": int(params["m"]),
+        "hnsw:construction_ef": int(params["construction_ef"]),
+        "hnsw:search_ef": int(params["search_ef"]),
+    }
 
 
 class VectorStore:
-    """ChromaDB vector store manager"""
+    """ChromaDB vector store manager
+    
+    Supports two layouts (``settings.memory_layout``):
+    - separate: one collection per memory type (notes, learning, conversations)
+    - unified: a single collection with a ``type`` metadata field, so a
+      search over all memory is one ANN query with the type filter pushed down
+    """
     
     def __init__(self):
         self.client = chromadb.PersistentClient(
             path=settings.vector_store_path,
             settings=ChromaSettings(anonymized_telemetry=False)
         )
+        self.unified = settings.memory_layout == "unified"
+        self.embedding_model: Tuple[str, str] = (settings.embedding_model, settings.embedding_version)
+        self._embedding_functions: Dict[str, Any] = {}
+        self.embedding_function = self.embedding_function_for(settings.embedding_model)
+        
+        # Serializes writes against collection swaps during re-indexing
+        self.write_lock = threading.RLock()
         
         # Create collections
-        self.notes_collection = self.client.get_or_create_collection(
-            name="notes",
-            metadata={"description": "User notes and information"}
+        if self.unified:
+            self.memory_collection = self._get_or_create(settings.memory_collection, UNIFIED_DESCRIPTION)
+        else:
+            self.notes_collection = self._get_or_create("notes", COLLECTION_DESCRIPTIONS["notes"])
+            self.learning_collection = self._get_or_create("learning", COLLECTION_DESCRIPTIONS["learning"])
+            self.conversations_collection = self._get_or_create(
+                "conversations",
+                COLLECTION_DESCRIPTIONS["conversations"]
+            )
+    
+    def embedding_function_for(self, model: str):
+        """Get (and cache) the embedding function for a model"""
+        if model not in self._embedding_functions:
+            if model == LEGACY_EMBEDDING_MODEL:
+                self._embedding_functions[model] = embedding_functions.DefaultEmbeddingFunction()
+            else:
+                self._embedding_functions[model] = OllamaEmbeddingFunction(model)
+        return self._embedding_functions[model]
+    
+    @staticmethod
+    def stamp_of(collection) -> Tuple[str, str]:
+        """Embedding model and version a collection was built with"""
+        metadata = collection.metadata or {}
+        return (
+            metadata.get("embedding:model", LEGACY_EMBEDDING_MODEL),
+            str(metadata.get("embedding:version", LEGACY_EMBEDDING_VERSION))
         )
+    
+    def is_stale(self, collection) -> bool:
+        """Whether a collection was built with a different embedding model/version"""
+        return self.stamp_of(collection) != self.embedding_model
+    
+    def create_collection(self, name: str, description: str, index_name: Optional[str] = None):
+        """Create a collection stamped with the configured embedding model
         
-        self.learning_collection = self.client.get_or_create_collection(
-            name="learning",
-            metadata={"description": "Learning summaries and progress"}
+        Args:
+            name: Collection name
+            description: Human-readable description
+            index_name: Collection whose HNSW overrides apply (defaults to ``name``)
+        """
+        model, version = self.embedding_model
+        return self.client.create_collection(
+            name=name,
+            metadata={
+                "description": description,
+                "embedding:model": model,
+                "embedding:version": version,
+                **index_metadata(index_name or name),
+            },
+            embedding_function=self.embedding_function
         )
+    
+    def _get_or_create(self, name: str, description: str):
+        """Get a collection (with the embedding function it was built with), creating it if missing"""
+        try:
+            collection = self.client.get_collection(name=name)
+        except ValueError:
+            return self.create_collection(name, description)
         
-        self.conversations_collection = self.client.get_or_create_collection(
-            name="conversations",
-            metadata={"description": "Important conversation history"}
-        )
+        model, _ = self.stamp_of(collection)
+        return self.client.get_collection(name=name, embedding_function=self.embedding_function_for(model))
     
-    def add_note(self, note_id: str, content: str, metadata: Optional[Dict] = None) -> None:
-        """Add a note to vector store"""
+    def collections(self) -> Dict[str, Any]:
+        """Collections of the active layout, by name"""
+        if self.unified:
+            return {settings.memory_collection: self.memory_collection}
+        return {name: getattr(self, f"{name}_collection") for name in MEMORY_TYPES.values()}
+    
+    def swap_collection(self, name: str, replacement) -> None:
+        """Atomically replace a live collection with a rebuilt one
+        
+        The replacement takes over the collection's name and the old one is
+        dropped. Callers hold ``write_lock`` so no write lands in between.
+        """
+        with self.write_lock:
+            attribute = "memory_collection" if self.unified else f"{name}_collection"
+            current = getattr(self, attribute)
+            
+            current.modify(name=f"{name}__retired")
+            replacement.modify(name=name)
+            setattr(self, attribute, replacement)
+            self.client.delete_collection(name=f"{name}__retired")
+    
+    def _collection_for(self, memory_type: str):
+        """Get the collection holding a memory type"""
+        if self.unified:
+            return self.memory_collection
+        return getattr(self, f"{MEMORY_TYPES[memory_type]}_collection")
+    
+    def _where_for(self, memory_types: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        """Build the type filter for the unified collection"""
+        if not self.unified or not memory_types:
+            return None
+        if len(memory_types) == 1:
+            return {"type": memory_types[0]}
+        return {"type": {"$in": list(memory_types)}}
+    
+    @tracer.traced("chroma.add")
+    def _add(self, memory_type: str, memory_id: str, content: str, metadata: Optional[Dict]) -> None:
+        """Add a memory of the given type"""
         metadata = metadata or {}
         metadata["created_at"] = datetime.now().isoformat()
-        metadata["type"] = "note"
+        metadata["type"] = memory_type
+        
+        with self.write_lock:
+            self._collection_for(memory_type).add(
+                ids=[memory_id],
+                documents=[content],
+                metadatas=[metadata]
+            )
+    
+    @tracer.traced("chroma.query")
+    def _query(
+        self,
+        collection,
+        query: str,
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None,
+        include_embeddings: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Run one ANN query, embedding the query text unless an embedding is given"""
+        include = ["metadatas", "documents", "distances"]
+        if include_embeddings:
+            include.append("embeddings")
+        
+        # A collection still awaiting re-index must be queried in its own embedding space
+        if query_embedding is not None and self.is_stale(collection):
+            query_embedding = None
         
-        self.notes_collection.add(
-            ids=[note_id],
-            documents=[content],
-            metadatas=[metadata]
+        if query_embedding is not None:
+            results = collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=where,
+                include=include
+            )
+        else:
+            results = collection.query(
+                query_texts=[query],
+                n_results=n_results,
+                where=where,
+                include=include
+            )
+        return self._format_results(results)
+    
+    def _search(self, memory_type: str, query: str, n_results: int) -> List[Dict[str, Any]]:
+        """Search a single memory type"""
+        return self._query(
+            self._collection_for(memory_type),
+            query,
+            n_results,
+            where=self._where_for([memory_type])
         )
     
+    @tracer.traced("chroma.embed")
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query once so it can be reused across searches and re-ranking"""
+        return list(self.embedding_function([query])[0])
+    
+    def add_note(self, note_id: str, content: str, metadata: Optional[Dict] = None) -> None:
+        """Add a note to vector store"""
+        self._add("note", note_id, content, metadata)
+    
     def add_learning_summary(self, summary_id: str, content: str, metadata: Optional[Dict] = None) -> None:
         """Add a learning summary to vector store"""
-        metadata = metadata or {}
-        metadata["created_at"] = datetime.now().isoformat()
-        metadata["type"] = "learning"
-        
-        self.learning_collection.add(
-            ids=[summary_id],
-            documents=[content],
-            metadatas=[metadata]
-        )
+        self._add("learning", summary_id, content, metadata)
     
     def add_conversation(self, conv_id: str, content: str, metadata: Optional[Dict] = None) -> None:
         """Add important conversation to vector store"""
-        metadata = metadata or {}
-        metadata["created_at"] = datetime.now().isoformat()
-        metadata["type"] = "conversation"
-        
-        self.conversations_collection.add(
-            ids=[conv_id],
-            documents=[content],
-            metadatas=[metadata]
-        )
+        self._add("conversation", conv_id, content, metadata)
     
     def search_notes(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         """Search for relevant notes"""
-        results = self.notes_collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
-        return self._format_results(results)
+        return self._search("note", query, n_results)
     
     def search_learning(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         """Search for relevant learning content"""
-        results = self.learning_collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
-        return self._format_results(results)
+        return self._search("learning", query, n_results)
     
     def search_conversations(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
         """Search for relevant past conversations"""
-        results = self.conversations_collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
-        return self._format_results(results)
+        return self._search("conversation", query, n_results)
+    
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        memory_types: Optional[List[str]] = None,
+        query_embedding: Optional[List[float]] = None,
+        include_embeddings: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Search memory and return the global top-k, best first
+        
+        Each result carries its memory ``type``. In the unified layout this is a
+        single ANN query; in the separate layout each collection is queried and
+        the results are merged by distance. Pass ``query_embedding`` to skip
+        re-embedding the query, and ``include_embeddings`` to get the stored
+        vectors back (used by re-ranking).
+        """
+        memory_types = memory_types or list(MEMORY_TYPES)
+        
+        if self.unified:
+            hits = self._query(
+                self.memory_collection,
+                query,
+                n_results,
+                where=self._where_for(memory_types),
+                query_embedding=query_embedding,
+                include_embeddings=include_embeddings
+            )
+            for hit in hits:
+                hit["type"] = hit["metadata"].get("type", "")
+        else:
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
+            
+            hits = []
+            for memory_type in memory_types:
+                for hit in self._query(
+                    self._collection_for(memory_type),
+                    query,
+                    n_results,
+                    query_embedding=query_embedding,
+                    include_embeddings=include_embeddings
+                ):
+                    hit["type"] = memory_type
+                    hits.append(hit)
+            hits.sort(key=lambda hit: hit["distance"] if hit["distance"] is not None else float("inf"))
+            hits = hits[:n_results]
+        
+        return hits
     
     def search_all(self, query: str, n_results: int = 3) -> Dict[str, List[Dict[str, Any]]]:
-        """Search across all collections"""
-        return {
-            "notes": self.search_notes(query, n_results),
-            "learning": self.search_learning(query, n_results),
-            "conversations": self.search_conversations(query, n_results)
-        }
+        """Search across all collections
+        
+        In the unified layout this returns the global best
+        ``n_results * 3`` memories grouped by type, instead of a fixed
+        ``n_results`` per type.
+        """
+        if not self.unified:
+            return {
+                "notes": self.search_notes(query, n_results),
+                "learning": self.search_learning(query, n_results),
+                "conversations": self.search_conversations(query, n_results)
+            }
+        
+        grouped: Dict[str, List[Dict[str, Any]]] = {name: [] for name in MEMORY_TYPES.values()}
+        for hit in self.search(query, n_results * len(MEMORY_TYPES)):
+            collection_name = MEMORY_TYPES.get(hit.pop("type"))
+            if collection_name:
+                grouped[collection_name].append(hit)
+        return grouped
+    
+    @tracer.traced("chroma.get")
+    def get_memories(self, memory_type: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Get stored memories of one type (raw ChromaDB ``get`` result)"""
+        return self._collection_for(memory_type).get(
+            where=self._where_for([memory_type]),
+            limit=limit
+        )
+    
+    @tracer.traced("chroma.delete")
+    def _delete(self, memory_type: str, memory_id: str) -> None:
+        """Delete a memory of the given type"""
+        with self.write_lock:
+            self._collection_for(memory_type).delete(ids=[memory_id], where=self._where_for([memory_type]))
     
     def delete_note(self, note_id: str) -> None:
         """Delete a note"""
-        self.notes_collection.delete(ids=[note_id])
+        self._delete("note", note_id)
     
     def delete_learning(self, learning_id: str) -> None:
         """Delete a learning entry"""
-        self.learning_collection.delete(ids=[learning_id])
+        self._delete("learning", learning_id)
     
     def delete_conversation(self, conv_id: str) -> None:
         """Delete a conversation"""
-        self.conversations_collection.delete(ids=[conv_id])
+        self._delete("conversation", conv_id)
+    
+    def migrate_to_unified(self, batch_size: int = 100, drop_legacy: bool = False) -> Dict[str, int]:
+        """Copy the per-type collections into the unified collection
+        
+        Stored embeddings are copied as-is when both sides use the same
+        embedding model (no re-embedding) and writes are upserts, so the
+        migration can safely be re-run.
+        
+        Returns:
+            Number of memories copied per type
+        """
+        target = self._get_or_create(settings.memory_collection, UNIFIED_DESCRIPTION)
+        
+        copied = {}
+        for memory_type, collection_name in MEMORY_TYPES.items():
+            try:
+                source = self.client.get_collection(name=collection_name)
+            except ValueError:
+                copied[memory_type] = 0
+                continue
+            
+            # Stored vectors are only reusable within the same embedding space
+            same_model = self.stamp_of(source) == self.stamp_of(target)
+            
+            count = 0
+            offset = 0
+            while True:
+                batch = source.get(
+                    limit=batch_size,
+                    offset=offset,
+                    include=["embeddings", "documents", "metadatas"]
+                )
+                if not batch["ids"]:
+                    break
+                
+                metadatas = []
+                for metadata in batch["metadatas"]:
+                    metadata = dict(metadata or {})
+                    metadata["type"] = memory_type
+                    metadatas.append(metadata)
+                
+                target.upsert(
+                    ids=batch["ids"],
+                    embeddings=batch["embeddings"] if same_model else None,
+                    documents=batch["documents"],
+                    metadatas=metadatas
+                )
+                count += len(batch["ids"])
+                offset += len(batch["ids"])
+            
+            copied[memory_type] = count
+            if drop_legacy:
+                self.client.delete_collection(name=collection_name)
+        
+        return copied
     
     def _format_results(self, results: Dict) -> List[Dict[str, Any]]:
         """Format ChromaDB results into a clean list"""
@@ -125,6 +438,8 @@ class VectorStore:
                     "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
                     "distance": results["distances"][0][i] if results.get("distances") else None
                 })
+                if results.get("embeddings"):
+                    formatted[-1]["embedding"] = results["embeddings"][0][i]
         return formatted
 
 
@@ -5,7 +5,9 @@ from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 from app.core.config import settings
-from app.routes import chat_router, tasks_router, memory_router
+from app.core.responses import FastJSONResponse, CompressionMiddleware
+from app.core.tracing import TracingMiddleware
+from app.routes import chat_router, chat_ws_router, tasks_router, memory_router, jobs_router
 
 # Configure logging
 logging.basicConfig(
@@ -19,7 +21,8 @@ app = FastAPI(
     title=settings.app_name,
     description="Personal desktop AI assistant",
     version="0.1.0",
-    debug=settings.debug
+    debug=settings.debug,
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS for desktop app
@@ -31,10 +34,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (list endpoints, search results)
+if settings.response_gzip_min_bytes:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.response_gzip_min_bytes)
+
+# Trace requests (added last, so it is outermost and the total covers every middleware)
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(chat_router)
+app.include_router(chat_ws_router)
 app.include_router(tasks_router)
 app.include_router(memory_router)
+app.include_router(jobs_router)
 
 
 @app.on_event("startup")
@@ -43,13 +55,30 @@ async def startup_event():
     logger.info(f"Starting {settings.app_name}...")
     logger.info("Database initialized")
     logger.info("Vector store initialized")
+    
+    if settings.reindex_on_startup:
+        from app.services.reindex import reindex_job
+        job = reindex_job.start()
+        if job["state"] == "running":
+            logger.info(f"Embedding model changed, re-indexing {job['collections']} in background")
     logger.info("AI models initialized")
+    
+    from app.tools import tool_registry
+    logger.info(f"Tool registry ready ({len(tool_registry.schemas)} tool schemas)")
+    
+    from app.services.jobs import job_manager
+    interrupted = job_manager.recover()
+    if interrupted:
+        logger.info(f"Marked {interrupted} interrupted background job(s) as failed")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event handler"""
     logger.info(f"Shutting down {settings.app_name}...")
+    
+    from app.core.ollama_client import ollama_client
+    await ollama_client.aclose()
 
 
 @app.get("/")
@@ -13,13 +13,18 @@ from app.models.schemas import (
     MemoryCreate,
     Memory,
     MemorySearchRequest,
+    MemoryPrefetchRequest,
     LearningTopic,
     LearningPlanRequest,
+    DailyPlanRequest,
     DecisionRequest,
     DecisionResponse,
     RewriteRequest,
     RewriteResponse,
     AgentState,
+    JobStatus,
+    JobSubmit,
+    Job,
 )
 
 __all__ = [
@@ -35,11 +40,16 @@ __all__ = [
     "MemoryCreate",
     "Memory",
     "MemorySearchRequest",
+    "MemoryPrefetchRequest",
     "LearningTopic",
     "LearningPlanRequest",
+    "DailyPlanRequest",
     "DecisionRequest",
     "DecisionResponse",
     "RewriteRequest",
     "RewriteResponse",
     "AgentState",
+    "JobStatus",
+    "JobSubmit",
+    "Job",
 ]
@@ -46,6 +46,7 @@ class ChatResponse(BaseModel):
     intent: Optional[str] = None
     tool_calls: Optional[List[str]] = None
     session_id: str
+    degradations: Optional[List[str]] = None  # Steps taken to answer within the latency SLO
 
 
 # Task Models
@@ -97,6 +98,11 @@ class MemorySearchRequest(BaseModel):
     n_results: int = 5
 
 
+class MemoryPrefetchRequest(BaseModel):
+    session_id: str
+    text: str  # Partial input typed so far
+
+
 # Learning Models
 class LearningTopic(BaseModel):
     id: Optional[int] = None
@@ -114,6 +120,12 @@ class LearningPlanRequest(BaseModel):
     difficulty: Optional[str] = "beginner"
 
 
+# Planning Models
+class DailyPlanRequest(BaseModel):
+    focus_areas: str
+    available_hours: str = "8"
+
+
 # Decision Models
 class DecisionRequest(BaseModel):
     question: str
@@ -149,3 +161,31 @@ class AgentState(BaseModel):
     tool_results: List[Dict[str, Any]] = []
     final_response: str = ""
     session_id: str = ""
+
+
+# Background Job Models
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobSubmit(BaseModel):
+    kind: str  # daily_plan, learning_plan, decision_analysis, rewrite
+    params: Dict[str, Any] = {}
+
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    params: Dict[str, Any] = {}
+    progress: float = 0
+    partial_results: List[Any] = []
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
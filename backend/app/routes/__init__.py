@@ -1,7 +1,9 @@
 """API routes"""
 
 from app.routes.chat import router as chat_router
+from app.routes.chat_ws import router as chat_ws_router
 from app.routes.tasks import router as tasks_router
 from app.routes.memory import router as memory_router
+from app.routes.jobs import router as jobs_router
 
-__all__ = ["chat_router", "tasks_router", "memory_router"]
+__all__ = ["chat_router", "chat_ws_router", "tasks_router", "memory_router", "jobs_router"]
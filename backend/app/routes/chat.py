@@ -1,57 +1,124 @@
 """Chat endpoint"""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+import time
 import uuid
 
-from app.models import ChatRequest, ChatResponse
+from app.models import ChatRequest, ChatResponse, RewriteRequest, RewriteResponse
+from app.services import ai_service
+from app.services.model_router import model_router
+from app.services.session_store import session_store
+from app.services.turns import turn_registry, TurnCancelled, EventCallback, DISCONNECTED
+from app.services.admission import admission_controller, AdmissionRejected
 from app.agent import agent_graph
+from app.agent.deadline import new_deadline
+from app.core.metrics import metrics
+from app.core.tracing import tracer
 
 router = APIRouter(prefix="/api", tags=["chat"])
 
 
+def _initial_state(message: str, session_id: str, turn_deadline: float) -> Dict[str, Any]:
+    """Agent state for a new turn"""
+    return {
+        "user_input": message,
+        "intent": "",
+        "retrieved_memory": [],
+        "planned_actions": [],
+        "tool_results": [],
+        "messages": [],
+        "history": session_store.history(session_id),
+        "final_response": "",
+        "session_id": session_id,
+        "deadline": turn_deadline,
+        "degradations": [],
+        "metadata": {
+            "timestamp": datetime.now().isoformat()
+        }
+    }
+
+
+async def run_chat_turn(
+    message: str,
+    session_id: Optional[str] = None,
+    http_request: Optional[Request] = None,
+    on_event: Optional[EventCallback] = None
+) -> ChatResponse:
+    """Run one message through the agent
+    
+    Shared by ``POST /api/chat`` and the WebSocket channel.
+    
+    Raises:
+        AdmissionRejected: if the server is saturated or the session is over its rate
+        TurnCancelled: if the turn was superseded, cancelled or its client went away
+    """
+    # Generate session ID if not provided
+    session_id = session_id or str(uuid.uuid4())
+    
+    async def admitted_turn() -> Tuple[Dict[str, Any], float]:
+        async with admission_controller.admit(session_id):
+            # The time budget starts at admission; queueing has its own timeout
+            turn_deadline = new_deadline()
+            return await agent_graph.ainvoke(_initial_state(message, session_id, turn_deadline)), turn_deadline
+    
+    # The turn is registered before it queues for admission: a newer message
+    # in the session (which supersedes it) or the client going away stops it
+    # while queued as well as while running
+    result, turn_deadline = await turn_registry.run(session_id, admitted_turn(), http_request, on_event)
+    response = result.get("final_response", "I'm not sure how to respond to that.")
+    session_store.append(session_id, message, response)
+    if time.monotonic() > turn_deadline:
+        metrics.increment("deadline.missed")
+    
+    # Extract tool calls for logging
+    tool_calls = []
+    for tool_result in result.get("tool_results", []):
+        if "tool_name" in tool_result:
+            tool_calls.append(tool_result["tool_name"])
+    
+    return ChatResponse(
+        response=response,
+        intent=result.get("intent"),
+        tool_calls=tool_calls if tool_calls else None,
+        session_id=session_id,
+        degradations=result.get("degradations") or None
+    )
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """Main chat endpoint - processes user input through agent"""
     try:
-        # Generate session ID if not provided
-        session_id = request.session_id or str(uuid.uuid4())
-        
-        # Create initial state
-        initial_state = {
-            "user_input": request.message,
-            "intent": "",
-            "retrieved_memory": [],
-            "planned_actions": [],
-            "tool_results": [],
-            "messages": [],
-            "final_response": "",
-            "session_id": session_id,
-            "metadata": {
-                "timestamp": datetime.now().isoformat()
-            }
-        }
-        
-        # Run through agent graph
-        result = await agent_graph.ainvoke(initial_state)
-        
-        # Extract tool calls for logging
-        tool_calls = []
-        for tool_result in result.get("tool_results", []):
-            if "tool_name" in tool_result:
-                tool_calls.append(tool_result["tool_name"])
-        
-        return ChatResponse(
-            response=result.get("final_response", "I'm not sure how to respond to that."),
-            intent=result.get("intent"),
-            tool_calls=tool_calls if tool_calls else None,
-            session_id=session_id
+        return await run_chat_turn(request.message, request.session_id, http_request)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)}
         )
-    
+    except TurnCancelled as e:
+        # 499: client closed the request (nginx convention)
+        raise HTTPException(status_code=499 if e.reason == DISCONNECTED else 409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
 
+@router.post("/chat/{session_id}/cancel")
+async def cancel_chat(session_id: str):
+    """Stop the session's running turn and the generation behind it"""
+    return {"cancelled": turn_registry.cancel(session_id)}
+
+
+@router.post("/rewrite", response_model=RewriteResponse)
+async def rewrite(request: RewriteRequest):
+    """Rewrite text in a tone - long texts are rewritten in parallel chunks"""
+    try:
+        rewritten = await ai_service.rewrite_text(request.text, request.tone.value, request.instructions)
+        return RewriteResponse(original=request.text, rewritten=rewritten, tone=request.tone.value)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rewriting text: {str(e)}")
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -60,3 +127,31 @@ async def health_check():
         "service": "ab360",
         "timestamp": datetime.now().isoformat()
     }
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Per-node latency and counter metrics, plus chat admission load"""
+    return {**metrics.snapshot(), "admission": admission_controller.status()}
+
+
+@router.get("/debug/traces")
+async def get_traces(limit: int = 20):
+    """Most recent request and chat-turn traces, newest first"""
+    return {"traces": tracer.recent(limit)}
+
+
+@router.get("/debug/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """One recent trace with its spans (the X-Trace-Id of a response)"""
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (only recent traces are kept)")
+    return trace
+
+
+@router.get("/models")
+async def get_models():
+    """Model routes per call type, availability, load and latency per model"""
+    await model_router.refresh()
+    return model_router.status()
@@ -0,0 +1,162 @@
+"""WebSocket chat channel: many sessions over one connection"""
+
+import asyncio
+from typing import Any, Dict
+
+from fastapi import APIRouter, WebSocket
+
+from app.routes.chat import run_chat_turn
+from app.services.admission import AdmissionRejected
+from app.services.memory_prefetch import memory_prefetcher
+from app.services.turns import turn_registry, TurnCancelled, CANCELLED, DISCONNECTED, SUPERSEDED
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.serialization import dumps_str, loads
+from app.core.tracing import tracer
+
+router = APIRouter(prefix="/api", tags=["chat"])
+
+
+class ChatSocket:
+    """One client connection multiplexing any number of chat sessions
+    
+    Client messages (JSON):
+        {"type": "chat", "session_id", "message"}  start a turn (supersedes the session's running one)
+        {"type": "cancel", "session_id"}           stop the session's running turn
+        {"type": "prefetch", "session_id", "text"} speculative retrieval from partial input
+    
+    Server messages, all tagged with ``session_id``:
+        {"type": "progress", "node", ...}  a graph node finished (intent, memories, tools, ...)
+                                           or detected the intent mid-stream
+        {"type": "token", "content"}       streamed response text
+        {"type": "done", ...ChatResponse}  the turn's final response
+        {"type": "cancelled", "reason"}    the turn was superseded or cancelled
+        {"type": "error", "status", "detail", "retry_after"}
+    
+    Outgoing messages go through one queue drained by a single sender, so
+    events from concurrent turns never interleave mid-frame. While more
+    than ``settings.ws_max_queued_events`` wait (a slow client), token
+    events are dropped; the ``done`` event always carries the full response.
+    """
+    
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.outbox: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self.turns: Dict[str, asyncio.Task] = {}
+    
+    def send(self, event: Dict[str, Any]) -> None:
+        if event.get("type") == "token" and self.outbox.qsize() >= settings.ws_max_queued_events:
+            metrics.increment("ws.tokens_dropped")
+            return
+        self.outbox.put_nowait(event)
+    
+    async def _sender(self) -> None:
+        while True:
+            event = await self.outbox.get()
+            await self.websocket.send_text(dumps_str(event))
+    
+    async def _receiver(self) -> None:
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                data = loads(message.get("text") or message.get("bytes") or "")
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                self.handle(data)
+            else:
+                self.send({"type": "error", "status": 422, "detail": "Messages must be JSON objects"})
+    
+    async def _run_turn(self, session_id: str, message: str) -> None:
+        try:
+            with tracer.trace("WS chat", session_id=session_id) as trace:
+                response = await run_chat_turn(message, session_id, on_event=self.send)
+            done = {"type": "done", **response.model_dump()}
+            if trace is not None:
+                done.update(trace_id=trace.trace_id, server_timing=trace.server_timing())
+            self.send(done)
+        except AdmissionRejected as e:
+            self.send({
+                "type": "error",
+                "session_id": session_id,
+                "status": e.status_code,
+                "detail": str(e),
+                "retry_after": e.retry_after,
+            })
+        except TurnCancelled as e:
+            self.send({"type": "cancelled", "session_id": session_id, "reason": e.reason})
+        except Exception as e:
+            self.send({
+                "type": "error",
+                "session_id": session_id,
+                "status": 500,
+                "detail": f"Error processing request: {str(e)}",
+            })
+    
+    def _forget(self, session_id: str, task: asyncio.Task) -> None:
+        if self.turns.get(session_id) is task:
+            del self.turns[session_id]
+    
+    def _cancel(self, session_id: str, reason: str) -> None:
+        """Stop the session's turn, whether it has started or not"""
+        task = self.turns.get(session_id)
+        if not turn_registry.cancel(session_id, reason) and task and task.cancel():
+            # Not started yet, so no turn reports the cancellation
+            self.send({"type": "cancelled", "session_id": session_id, "reason": reason})
+    
+    def handle(self, data: Dict[str, Any]) -> None:
+        kind = data.get("type")
+        session_id = data.get("session_id")
+        if not session_id:
+            self.send({"type": "error", "status": 422, "detail": "session_id is required"})
+        elif kind == "chat" and data.get("message"):
+            # An earlier turn of the session that has not started yet would
+            # otherwise be orphaned here and still run
+            self._cancel(session_id, SUPERSEDED)
+            task = self.turns[session_id] = asyncio.create_task(self._run_turn(session_id, data["message"]))
+            task.add_done_callback(lambda done: self._forget(session_id, done))
+        elif kind == "cancel":
+            self._cancel(session_id, CANCELLED)
+        elif kind == "prefetch":
+            memory_prefetcher.prefetch(session_id, data.get("text", ""))
+        else:
+            self.send({
+                "type": "error",
+                "session_id": session_id,
+                "status": 422,
+                "detail": f"Unsupported message: {kind}",
+            })
+    
+    async def serve(self) -> None:
+        """Receive and send until the client goes away or sending fails"""
+        receiver = asyncio.create_task(self._receiver())
+        sender = asyncio.create_task(self._sender())
+        metrics.increment("ws.connections")
+        try:
+            await asyncio.wait({receiver, sender}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Nobody is left to read the answers; free the model for others
+            for session_id, task in list(self.turns.items()):
+                turn_registry.cancel(session_id, DISCONNECTED)
+                task.cancel()  # Not started yet
+            receiver.cancel()
+            sender.cancel()
+        
+        if sender.done() and not sender.cancelled() and sender.exception():
+            print(f"[ERROR] WebSocket send failed: {sender.exception()}")
+            metrics.increment("ws.send_failed")
+            try:
+                await self.websocket.close(code=1011)
+            except Exception:
+                pass  # Already broken
+        elif receiver.done() and not receiver.cancelled() and receiver.exception():
+            raise receiver.exception()
+
+
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket):
+    """Chat over a WebSocket, streaming progress and tokens per session"""
+    await websocket.accept()
+    await ChatSocket(websocket).serve()
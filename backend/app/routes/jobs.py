@@ -0,0 +1,65 @@
+"""Background job endpoints"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+
+from app.models import Job, JobSubmit
+from app.core.responses import FastJSONResponse
+from app.core.serialization import dumps_str
+from app.services.jobs import job_manager
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.post("/", response_model=Job)
+async def submit_job(request: JobSubmit):
+    """Submit a long-running job - returns immediately with the job ID"""
+    try:
+        return job_manager.submit(request.kind, request.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/", response_model=List[Job])
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """List recent jobs, optionally filtered by status"""
+    try:
+        # Stored rows already have the Job shape; skip re-validating each one
+        return FastJSONResponse(job_manager.list(status, limit))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    """Poll a job's status, progress and (partial) results"""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/stream")
+async def stream_job(job_id: str):
+    """Stream job updates as Server-Sent Events until the job finishes"""
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        async for job in job_manager.stream(job_id):
+            yield f"data: {dumps_str(job)}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    if not job_manager.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job_manager.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job is not running")
+    return {"message": f"Job {job_id} cancelled"}
@@ -3,13 +3,25 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
 
-from app.models import MemoryCreate, Memory, MemorySearchRequest
+from app.models import MemoryCreate, Memory, MemorySearchRequest, MemoryPrefetchRequest
 from app.core.vector_store import vector_store
+from app.services.memory_prefetch import memory_prefetcher
+from app.services.reindex import reindex_job
 from datetime import datetime
 
 router = APIRouter(prefix="/api/memory", tags=["memory"])
 
 
+@router.post("/prefetch", status_code=202)
+async def prefetch_memory(request: MemoryPrefetchRequest):
+    """Start retrieving memory for partial input while the user is still typing
+    
+    Results are cached under the session and reused by the next chat message
+    if its text is close enough.
+    """
+    return {"scheduled": memory_prefetcher.prefetch(request.session_id, request.text)}
+
+
 @router.post("/search")
 async def search_memory(request: MemorySearchRequest):
     """Search memory across all types or specific type"""
@@ -37,6 +49,37 @@ async def search_memory(request: MemorySearchRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/reindex")
+async def get_reindex_status():
+    """Embedding model stamps per collection and re-index progress"""
+    model, version = vector_store.embedding_model
+    collections = {}
+    for name, collection in vector_store.collections().items():
+        stamp_model, stamp_version = vector_store.stamp_of(collection)
+        collections[name] = {
+            "embedding_model": stamp_model,
+            "embedding_version": stamp_version,
+            "stale": vector_store.is_stale(collection),
+            "count": collection.count(),
+        }
+    
+    return {
+        "embedding_model": model,
+        "embedding_version": version,
+        "collections": collections,
+        "job": reindex_job.status()
+    }
+
+
+@router.post("/reindex")
+async def start_reindex(force: bool = False):
+    """Re-embed stale collections (or all with force=true) in the background"""
+    try:
+        return reindex_job.start(force=force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/")
 async def create_memory(memory: MemoryCreate):
     """Store a new memory"""
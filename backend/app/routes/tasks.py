@@ -4,7 +4,9 @@ from fastapi import APIRouter, HTTPException
 from typing import List, Optional
 
 from app.models import Task, TaskCreate, TaskUpdate
+from app.core.config import settings
 from app.core.database import db
+from app.core.responses import JSONArrayResponse
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
@@ -13,19 +15,17 @@ router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 async def get_tasks(status: Optional[str] = None):
     """Get all tasks, optionally filtered by status"""
     try:
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            if status:
-                cursor.execute(
-                    "SELECT * FROM tasks WHERE status = ? ORDER BY created_at DESC",
-                    (status,)
-                )
-            else:
-                cursor.execute("SELECT * FROM tasks ORDER BY created_at DESC")
-            
-            tasks = [Task(**dict(row)) for row in cursor.fetchall()]
-            return tasks
+        # Rows already match the Task model (all columns are TEXT/INTEGER), so
+        # they are streamed straight from SQLite without a model per row
+        if status:
+            rows = db.iter_rows(
+                "SELECT * FROM tasks WHERE status = ? ORDER BY created_at DESC",
+                (status,),
+                settings.list_batch_size
+            )
+        else:
+            rows = db.iter_rows("SELECT * FROM tasks ORDER BY created_at DESC", (), settings.list_batch_size)
+        return JSONArrayResponse(rows)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,153 @@
+"""Admission control for chat turns: bounded concurrency, bounded queue, per-session rate"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tracing import tracer
+
+RATE_LIMITED = "rate_limited"
+QUEUE_FULL = "queue_full"
+QUEUE_TIMEOUT = "queue_timeout"
+
+
+class AdmissionRejected(Exception):
+    """A chat turn was not admitted; retry after ``retry_after`` seconds"""
+    
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Request rejected ({reason}), retry after {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = max(math.ceil(retry_after), 1)
+        # 429 for a session over its own rate, 503 when the server is saturated
+        self.status_code = 429 if reason == RATE_LIMITED else 503
+
+
+class TokenBucket:
+    """Refills at ``rate`` tokens per second up to ``burst``"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+    
+    def take(self) -> float:
+        """Take a token; returns 0, or the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Gate in front of the agent graph
+    
+    At most ``settings.chat_max_in_flight`` turns run at once; others wait
+    in FIFO order in a queue of ``settings.chat_queue_size``. A full queue,
+    or a wait longer than ``settings.chat_queue_timeout``, is rejected
+    right away with a ``Retry-After`` estimate instead of piling more work
+    onto Ollama. Each session also has a token bucket
+    (``settings.session_rate_per_minute``, ``settings.session_burst``) so
+    one busy session cannot crowd out the others.
+    """
+    
+    MAX_BUCKETS = 1024
+    
+    def __init__(self):
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+    
+    def _bucket(self, session_id: str) -> TokenBucket:
+        bucket = self._buckets.pop(session_id, None) or TokenBucket(
+            settings.session_rate_per_minute / 60, settings.session_burst
+        )
+        self._buckets[session_id] = bucket
+        while len(self._buckets) > self.MAX_BUCKETS:
+            self._buckets.popitem(last=False)
+        return bucket
+    
+    def _retry_after(self) -> float:
+        """Time for the queue ahead to drain at the recent turn latency"""
+        turn_seconds = metrics.mean("admission.turn") or 1.0
+        return turn_seconds * (len(self._waiters) + 1) / settings.chat_max_in_flight
+    
+    def _reject(self, reason: str, retry_after: float) -> AdmissionRejected:
+        metrics.increment(f"admission.rejected.{reason}")
+        return AdmissionRejected(reason, retry_after)
+    
+    def _release(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < settings.chat_max_in_flight:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot passes straight to the waiter
+                self.in_flight += 1
+                waiter.set_result(None)
+    
+    async def _wait_for_slot(self) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        metrics.increment("admission.queued")
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), settings.chat_queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                return  # Admitted just as the timeout fired
+            waiter.cancel()
+            self._waiters.remove(waiter)
+            raise self._reject(QUEUE_TIMEOUT, self._retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # Admitted, but the caller is gone
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+    
+    @asynccontextmanager
+    async def admit(self, session_id: str) -> AsyncIterator[None]:
+        """Hold a turn slot for the block, or raise ``AdmissionRejected``"""
+        wait = self._bucket(session_id).take()
+        if wait:
+            raise self._reject(RATE_LIMITED, wait)
+        
+        start = time.perf_counter()
+        if self.in_flight < settings.chat_max_in_flight and not self._waiters:
+            self.in_flight += 1
+        elif len(self._waiters) >= settings.chat_queue_size:
+            raise self._reject(QUEUE_FULL, self._retry_after())
+        else:
+            with tracer.span("admission.wait", queued=len(self._waiters)):
+                await self._wait_for_slot()
+        metrics.observe("admission.queue_wait", time.perf_counter() - start)
+        metrics.increment("admission.admitted")
+        
+        admitted = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics.observe("admission.turn", time.perf_counter() - admitted)
+            self._release()
+    
+    def status(self) -> Dict[str, Any]:
+        """Current load and queue wait"""
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": settings.chat_max_in_flight,
+            "queued": len(self._waiters),
+            "queue_size": settings.chat_queue_size,
+            "queue_wait": metrics.summary("admission.queue_wait"),
+        }
+
+
+# Global admission controller
+admission_controller = AdmissionController()
@@ -1,131 +1,345 @@
 """AI model service layer"""
 
+import asyncio
 import os
-from typing import Optional, Dict, Any, List
-from langchain.schema import HumanMessage, SystemMessage
-from langchain.chat_models.base import BaseChatModel
+import re
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, AsyncIterator, Callable, Iterable, Tuple
 import httpx
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.ollama_client import ollama_client, OllamaError
+from app.services.model_router import model_router, call_type_for
+from app.services.generation_profiles import GenerationProfile, profile_for
+from app.services.prompt_budget import PromptBuilder, budget_for, token_estimator
+from app.services.structured_output import IncrementalJSONParser, ItemCallback, item_sink, repair_json
+from app.services.text_chunks import split_text, join_chunks
+from app.services.turns import current_turn
+
+
+VALID_INTENTS = ["planning", "learning", "remembering", "rewriting", "decision_making", "general"]
+
+INTENT_DESCRIPTIONS = """- planning: Creating schedules, organizing tasks, time management
+- learning: Studying, learning new topics, tracking progress
+- remembering: Storing or retrieving information, notes
+- rewriting: Improving text, changing tone, grammar correction
+- decision_making: Comparing options, making choices
+- general: General conversation or unclear intent"""
+
+# Profiles whose output is the answer itself, streamed to the client as it generates
+STREAMED_PROFILES = {"chat", "fast"}
+
+# Tokens kept free for the answer in a session context when the profile sets no num_predict
+SESSION_REPLY_RESERVE = 512
+
+# Matches the intent label as soon as it has streamed in
+INTENT_PATTERN = re.compile(r'"intent"\s*:\s*"([a-z_]+)"')
 
 
 class AIService:
     """AI model service using Ollama"""
     
     def __init__(self):
-        self.model: Optional[BaseChatModel] = None
+        self.available = False
+        self.model = None  # ChatOllama, only with the "langchain" backend
         self.model_name: str = ""
+        # session_id -> (model, Ollama context tokens, reply that ends them) from the session's last turn
+        self._session_contexts: "OrderedDict[str, Tuple[str, List[int], str]]" = OrderedDict()
         self._init_ollama()
     
     def _init_ollama(self):
         """Initialize Ollama model"""
         print("[*] Initializing Ollama...")
         
+        # Test if Ollama is running and model exists
         try:
-            from langchain_community.chat_models import ChatOllama
+            response = httpx.get(f"{settings.ollama_base_url}/api/tags", timeout=2.0)
+            if response.status_code != 200:
+                print("[-] Ollama is not responding")
+                return
             
-            # Test if Ollama is running and model exists
-            try:
-                response = httpx.get(f"{settings.ollama_base_url}/api/tags", timeout=2.0)
-                if response.status_code == 200:
-                    # Verify model exists
-                    models = response.json().get('models', [])
-                    model_names = [m['name'] for m in models]
-                    
-                    if settings.ollama_model not in model_names:
-                        print(f"[-] Model '{settings.ollama_model}' not found")
-                        print(f"    Available models: {', '.join(model_names)}")
-                        return
-                    
-                    self.model = ChatOllama(
-                        base_url=settings.ollama_base_url,
-                        model=settings.ollama_model,
-                        temperature=0.7,
-                        format="json" if "cloud" in settings.ollama_model else None,
-                    )
-                    self.model_name = f"Ollama ({settings.ollama_model})"
-                    print(f"[+] Using model: {self.model_name}")
-                    print(f"[+] Model verified and ready")
-                else:
-                    print("[-] Ollama is not responding")
-            except (httpx.ConnectError, httpx.TimeoutException):
-                print("[-] Ollama not running")
-                print("    Install from: https://ollama.ai")
-                print(f"    Then run: ollama pull {settings.ollama_model}")
+            # Verify model exists (or a fallback for it)
+            models = response.json().get('models', [])
+            model_names = [m['name'] for m in models]
+            model_router.set_available(model_names)
+            
+            if not any(model in model_names for model in model_router.candidates("chat")):
+                print(f"[-] Model '{settings.ollama_model}' not found")
+                print(f"    Available models: {', '.join(model_names)}")
+                return
+            
+            if settings.llm_backend == "langchain" and not self._init_langchain():
+                return
+            
+            self.available = True
+            self.model_name = f"Ollama ({settings.ollama_model})"
+            print(f"[+] Using model: {self.model_name} via {settings.llm_backend} client")
+            print(f"[+] Model verified and ready")
+        except (httpx.ConnectError, httpx.TimeoutException):
+            print("[-] Ollama not running")
+            print("    Install from: https://ollama.ai")
+            print(f"    Then run: ollama pull {settings.ollama_model}")
+        except Exception as e:
+            print(f"[-] Ollama initialization failed: {e}")
+    
+    def _init_langchain(self) -> bool:
+        """Create the ChatOllama model used by the "langchain" backend"""
+        try:
+            from langchain_community.chat_models import ChatOllama
         except ImportError:
             print("[-] langchain-community not installed")
             print("    Run: poetry add langchain-community")
-        except Exception as e:
-            print(f"[-] Ollama initialization failed: {e}")
+            return False
+        
+        # Sampling and output format are set per call from the generation profile
+        self.model = ChatOllama(
+            base_url=settings.ollama_base_url,
+            model=settings.ollama_model,
+        )
+        return True
     
+    @staticmethod
+    def _record_generation(
+        profile: GenerationProfile,
+        start: float,
+        info: Optional[Dict[str, Any]],
+        output_chars: int = 0
+    ) -> None:
+        """Record latency and token counts of one call under its profile
+        
+        ``output_chars`` (length of the generated text) calibrates the prompt
+        token estimator against the model's real tokenizer.
+        """
+        metrics.observe(f"llm.{profile.name}", time.perf_counter() - start)
+        info = info or {}
+        metrics.increment(f"llm.{profile.name}.prompt_tokens", info.get("prompt_eval_count", 0))
+        metrics.increment(f"llm.{profile.name}.output_tokens", info.get("eval_count", 0))
+        if output_chars and info.get("eval_count"):
+            token_estimator.calibrate(output_chars, info["eval_count"])
+        if info.get("prompt_eval_duration"):
+            metrics.observe(f"llm.{profile.name}.prompt_eval", info["prompt_eval_duration"] / 1e9)
+        if info.get("eval_duration"):
+            metrics.increment(f"llm.{profile.name}.eval_seconds", info["eval_duration"] / 1e9)
     
     async def generate_response(
         self,
         prompt: str,
-        system_prompt: Optional[str] = None
+        system_prompt: Optional[str] = None,
+        profile: str = "chat",
+        session_id: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        num_predict: Optional[int] = None,
+        volatile: bool = False
     ) -> str:
-        """Generate AI response using Ollama"""
-        if not self.model:
+        """Generate AI response using Ollama
+        
+        ``history`` (earlier turns as chat messages) goes between the system
+        prompt and the new prompt. With a ``session_id`` (and
+        ``settings.session_context_reuse``), the call continues the session's
+        Ollama context from its previous turn instead, so the earlier turns
+        are not evaluated again; ``volatile`` marks a prompt carrying per-turn
+        data (memories, tool results) that must not stay in that context.
+        ``num_predict`` caps the output tokens below
+        the profile's limit. Inside a chat turn that has an event listener,
+        answer tokens are streamed to it as they are generated.
+        """
+        if not self.available:
             return "Error: Ollama not initialized. Please install and run Ollama from https://ollama.ai"
         
+        generation = profile_for(profile, num_predict)
+        turn = current_turn.get()
+        on_token = turn.emit_token if turn and turn.on_event and profile in STREAMED_PROFILES else None
+        start = time.perf_counter()
         try:
-            messages = []
-            if system_prompt:
-                messages.append(SystemMessage(content=system_prompt))
-            messages.append(HumanMessage(content=prompt))
+            messages = self._messages(prompt, system_prompt, history)
             
-            print(f"[DEBUG] Sending to Ollama: {settings.ollama_model}")
-            response = await self.model.ainvoke(messages)
-            print(f"[DEBUG] Response received: {len(response.content)} chars")
-            return response.content
+            async with model_router.use(call_type_for(profile)) as model:
+                print(f"[DEBUG] Sending to Ollama: {model} ({generation.name})")
+                if self.model is not None:
+                    text, info = await self._generate_langchain(model, messages, generation)
+                elif session_id and settings.session_context_reuse:
+                    text, info = await self._generate_in_session(
+                        model, prompt, system_prompt, generation, session_id, history, on_token, volatile
+                    )
+                elif on_token:
+                    text, info = await self._collect(ollama_client.stream_chat(
+                        model, messages, options=generation.options(), format=generation.format
+                    ), on_token)
+                else:
+                    result = await ollama_client.chat(
+                        model, messages, options=generation.options(), format=generation.format
+                    )
+                    text, info = result.get("message", {}).get("content", ""), result
+            self._record_generation(generation, start, info, len(text))
+            print(f"[DEBUG] Response received: {len(text)} chars")
+            return text
         
         except Exception as e:
             error_msg = str(e)
             print(f"[ERROR] Ollama call failed: {error_msg}")
             
-            # Try direct API call as fallback
+            # Try /api/generate as fallback (the router skips the model that just failed)
             try:
                 print("[*] Trying direct Ollama API...")
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    payload = {
-                        "model": settings.ollama_model,
-                        "prompt": f"{system_prompt}\n\nUser: {prompt}" if system_prompt else prompt,
-                        "stream": False
-                    }
-                    response = await client.post(
-                        f"{settings.ollama_base_url}/api/generate",
-                        json=payload
+                async with model_router.use(call_type_for(profile)) as model:
+                    result = await ollama_client.generate(
+                        model,
+                        prompt,
+                        system=system_prompt,
+                        options=generation.options(),
+                        format=generation.format
                     )
-                    if response.status_code == 200:
-                        result = response.json()
-                        print("[+] Direct API call successful")
-                        return result.get('response', 'No response from model')
-                    else:
-                        print(f"[-] Direct API failed: {response.status_code}")
-                        return f"Error: Ollama request failed with status {response.status_code}"
+                self._record_generation(generation, start, result, len(result.get("response", "")))
+                print("[+] Direct API call successful")
+                return result.get('response', 'No response from model')
+            except OllamaError as fallback_error:
+                print(f"[-] Direct API failed: {fallback_error.status_code}")
+                return f"Error: Ollama request failed with status {fallback_error.status_code}"
             except Exception as fallback_error:
                 print(f"[ERROR] Fallback also failed: {fallback_error}")
                 return f"Error: Could not connect to Ollama. {error_msg}"
     
+    async def _generate_in_session(
+        self,
+        model: str,
+        prompt: str,
+        system_prompt: Optional[str],
+        generation: GenerationProfile,
+        session_id: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        volatile: bool = False
+    ) -> Tuple[str, Dict[str, Any]]:
+        """One /api/generate call continuing the session's Ollama context
+        
+        The cached context is used only while it is still the conversation:
+        it must end with the last reply in ``history`` (a turn answered any
+        other way breaks the chain) and leave room in the profile's
+        ``num_ctx`` for the prompt and the answer. Otherwise the turn starts
+        cold from ``history``, summary included. A ``volatile`` exchange
+        (one whose prompt carries memories or tool data) is not cached, so
+        that text is never carried into later turns.
+        """
+        num_ctx = min(generation.num_ctx or settings.ollama_default_num_ctx, settings.session_context_max_tokens)
+        needed = token_estimator.count(prompt) + (generation.num_predict or SESSION_REPLY_RESERVE)
+        cached = self._session_contexts.pop(session_id, None)
+        context = None
+        if cached and cached[0] == model and history and history[-1]["content"] == cached[2]:
+            if len(cached[1]) + needed <= num_ctx:
+                context = cached[1]
+            else:
+                metrics.increment("session.contexts.full")
+        
+        if not context and history:
+            # Cold start: the earlier turns are not in any Ollama context yet
+            earlier = "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in history)
+            prompt = f"Conversation so far:\n{earlier}\n\n{prompt}"
+        
+        request = dict(
+            # The context already starts with the system prompt
+            system=None if context else system_prompt,
+            options=generation.options(),
+            format=generation.format,
+            context=context
+        )
+        if on_token:
+            text, result = await self._collect(ollama_client.stream_generate(model, prompt, **request), on_token)
+        else:
+            result = await ollama_client.generate(model, prompt, **request)
+            text = result.get("response", "")
+        
+        new_context = result.get("context")
+        if volatile:
+            metrics.increment("session.contexts.volatile")
+        elif new_context and len(new_context) < num_ctx:
+            self._session_contexts[session_id] = (model, new_context, text)
+            while len(self._session_contexts) > settings.session_context_max_sessions:
+                self._session_contexts.popitem(last=False)
+        
+        turn = "cached" if context else "cold"
+        metrics.increment(f"session.turns.{turn}")
+        metrics.observe(f"session.prompt_eval.{turn}", result.get("prompt_eval_duration", 0) / 1e9)
+        return text, result
+    
+    @staticmethod
+    async def _collect(
+        chunks: AsyncIterator[Dict[str, Any]],
+        on_token: Callable[[str], None]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Join a streamed /api/chat or /api/generate response, passing each piece to ``on_token``
+        
+        Returns the text and the final chunk (stats, and ``context`` for /api/generate).
+        """
+        parts = []
+        info: Dict[str, Any] = {}
+        async for chunk in chunks:
+            piece = chunk["message"].get("content", "") if "message" in chunk else chunk.get("response", "")
+            if piece:
+                parts.append(piece)
+                on_token(piece)
+            if chunk.get("done"):
+                info = chunk
+        return "".join(parts), info
+    
+    def forget_session(self, session_id: str) -> None:
+        """Drop a session's cached Ollama context"""
+        self._session_contexts.pop(session_id, None)
+    
+    @staticmethod
+    def _messages(
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> List[Dict[str, str]]:
+        """Chat messages: system prompt, then history, then the new prompt"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.extend(history or [])
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    async def _generate_langchain(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        generation: GenerationProfile
+    ) -> Tuple[str, Dict[str, Any]]:
+        """One generation through ChatOllama (the "langchain" backend)"""
+        from langchain.schema import AIMessage, HumanMessage, SystemMessage
+        
+        message_types = {"system": SystemMessage, "assistant": AIMessage}
+        langchain_messages = [
+            message_types.get(m["role"], HumanMessage)(content=m["content"])
+            for m in messages
+        ]
+        options = {key: value for key, value in generation.options().items() if key != "stop"}
+        result = await self.model.agenerate(
+            [langchain_messages],
+            model=model,
+            stop=generation.stop or None,
+            format=generation.format,
+            **options
+        )
+        output = result.generations[0][0]
+        return output.text, output.generation_info or {}
+    
     async def detect_intent(self, user_input: str) -> str:
         """Detect user intent from input"""
-        system_prompt = """You are an intent classifier. Classify the user's input into one of these intents:
-- planning: Creating schedules, organizing tasks, time management
-- learning: Studying, learning new topics, tracking progress
-- remembering: Storing or retrieving information, notes
-- rewriting: Improving text, changing tone, grammar correction
-- decision_making: Comparing options, making choices
-- general: General conversation or unclear intent
+        system_prompt = f"""You are an intent classifier. Classify the user's input into one of these intents:
+{INTENT_DESCRIPTIONS}
 
 Respond with ONLY the intent name, nothing else."""
         
         try:
-            intent = await self.generate_response(user_input, system_prompt)
+            intent = await self.generate_response(user_input, system_prompt, profile="intent")
             intent = intent.strip().lower()
             
             # Validate intent
-            valid_intents = ["planning", "learning", "remembering", "rewriting", "decision_making", "general"]
-            if intent not in valid_intents:
+            if intent not in VALID_INTENTS:
                 return "general"
             
             return intent
@@ -133,19 +347,362 @@ Respond with ONLY the intent name, nothing else."""
             print(f"Error detecting intent: {e}")
             return "general"
     
-    async def rewrite_text(self, text: str, tone: str, instructions: Optional[str] = None) -> str:
-        """Rewrite text with specified tone"""
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        format: Optional[str] = None,
+        profile: str = "tools",
+        num_predict: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """One non-streaming /api/chat call with native tool support
+        
+        ``num_predict`` caps the output tokens for this call.
+        
+        Returns:
+            The assistant message (``content`` and, if the model called tools, ``tool_calls``)
+        """
+        if not self.available:
+            return {
+                "role": "assistant",
+                "content": "Error: Ollama not initialized. Please install and run Ollama from https://ollama.ai"
+            }
+        
+        generation = profile_for(profile, num_predict)
+        start = time.perf_counter()
+        async with model_router.use(call_type_for(profile)) as model:
+            result = await ollama_client.chat(
+                model,
+                messages,
+                options=generation.options(),
+                format=format or generation.format,
+                tools=tools or None
+            )
+        self._record_generation(generation, start, result, len(result.get("message", {}).get("content") or ""))
+        return result.get("message", {})
+    
+    async def stream_chat(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        format: Optional[str] = None,
+        profile: str = "chat",
+        history: Optional[List[Dict[str, str]]] = None,
+        num_predict: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Stream response content from Ollama's /api/chat as it is generated"""
+        messages = self._messages(prompt, system_prompt, history)
+        
+        generation = profile_for(profile, num_predict)
+        start = time.perf_counter()
+        output_chars = 0
+        async with model_router.use(call_type_for(profile)) as model:
+            async for chunk in ollama_client.stream_chat(
+                model, messages, options=generation.options(), format=format or generation.format
+            ):
+                content = chunk.get("message", {}).get("content", "")
+                if content:
+                    output_chars += len(content)
+                    yield content
+                if chunk.get("done"):
+                    self._record_generation(generation, start, chunk, output_chars)
+    
+    async def generate_structured(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        stream_keys: Iterable[str] = (),
+        on_item: Optional[ItemCallback] = None,
+        profile: str = "planning"
+    ) -> Dict[str, Any]:
+        """Generate a JSON response, parsing it while it streams
+        
+        Every element of the arrays named in ``stream_keys`` is passed to
+        ``on_item(key, element)`` (or the ``item_sink`` context callback) as
+        soon as it closes. The full output is parsed with ``repair_json``, so
+        fences, stray prose, trailing commas and truncation do not need
+        another LLM call.
+        
+        Returns:
+            Dict with the parsed ``data`` (None if unrecoverable) and the raw ``text``
+        """
+        on_item = on_item or item_sink.get()
+        parser = IncrementalJSONParser(stream_keys)
+        
+        def feed(text: str) -> None:
+            for key, item in parser.feed(text):
+                metrics.increment("structured.streamed_items")
+                if on_item:
+                    on_item(key, item)
+        
+        if self.available:
+            try:
+                async for chunk in self.stream_chat(prompt, system_prompt, profile=profile):
+                    feed(chunk)
+            except Exception as e:
+                print(f"[ERROR] Structured Ollama stream failed: {e}")
+        if not parser.buffer:
+            feed(await self.generate_response(prompt, system_prompt, profile=profile))
+        
+        text = parser.buffer
+        try:
+            data = json.loads(text)
+        except ValueError:
+            try:
+                data = repair_json(text)
+                metrics.increment("structured.repaired")
+            except ValueError:
+                metrics.increment("structured.unparseable")
+                data = None
+        return {"data": data, "text": text}
+    
+    async def respond_with_intent(
+        self,
+        user_input: str,
+        system_prompt: str,
+        on_intent: Optional[Callable[[str], None]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        num_predict: Optional[int] = None
+    ) -> Dict[str, str]:
+        """Classify intent and answer in a single LLM round trip
+        
+        The model returns ``{"intent": ..., "response": ...}`` with the intent
+        first, so the label is parsed from the stream (and ``on_intent`` called)
+        long before the answer finishes generating.
+        
+        Returns:
+            Dict with ``intent`` and ``response``
+        """
+        if not self.available:
+            return {
+                "intent": "general",
+                "response": "Error: Ollama not initialized. Please install and run Ollama from https://ollama.ai"
+            }
+        
+        combined_prompt = f"""{system_prompt}
+
+First classify the user's input into one of these intents:
+{INTENT_DESCRIPTIONS}
+
+Respond with a JSON object, intent first:
+{{"intent": "<intent name>", "response": "<your answer to the user>"}}"""
+        
+        start = time.perf_counter()
+        intent = None
+        buffer = ""
+        try:
+            async for chunk in self.stream_chat(
+                user_input, combined_prompt, profile="combined", history=history, num_predict=num_predict
+            ):
+                buffer += chunk
+                if intent is None:
+                    match = INTENT_PATTERN.search(buffer)
+                    if match:
+                        intent = match.group(1) if match.group(1) in VALID_INTENTS else "general"
+                        metrics.observe("llm.combined.time_to_intent", time.perf_counter() - start)
+                        if on_intent:
+                            on_intent(intent)
+        except Exception as e:
+            print(f"[ERROR] Combined Ollama call failed: {e}")
+            if not buffer:
+                # Fall back to the two-call path
+                intent = await self.detect_intent(user_input)
+                response = await self.generate_response(
+                    user_input, system_prompt, history=history, num_predict=num_predict
+                )
+                return {"intent": intent, "response": response}
+        
+        metrics.observe("llm.combined.total", time.perf_counter() - start)
+        
+        # Truncated or malformed output is repaired; the raw JSON never reaches the user
+        try:
+            result = repair_json(buffer)
+        except ValueError:
+            result = None
+        if isinstance(result, dict):
+            response = str(result.get("response", ""))
+            intent = intent or result.get("intent", "general")
+        else:
+            response = "" if buffer.lstrip().startswith(("{", "`")) else buffer.strip()
+        if not response:
+            response = "Sorry, I couldn't finish that answer. Please try again."
+        
+        if intent not in VALID_INTENTS:
+            intent = "general"
+        return {"intent": intent, "response": response}
+    
+    async def rewrite_text(
+        self,
+        text: str,
+        tone: str,
+        instructions: Optional[str] = None,
+        on_chunk: Optional[Callable[[int, str], None]] = None
+    ) -> str:
+        """Rewrite text with specified tone
+        
+        Texts longer than ``settings.rewrite_chunk_chars`` are split at
+        paragraph/sentence boundaries and the chunks rewritten concurrently
+        (``settings.rewrite_concurrency`` at a time), each with the same tone
+        instructions and the neighbouring text as context. ``on_chunk`` is
+        called with (index, rewritten chunk) in document order as soon as
+        each chunk and all chunks before it are done.
+        """
         system_prompt = f"""You are a professional text editor. Rewrite the given text in a {tone} tone.
 Make improvements to grammar, clarity, and style while maintaining the original meaning.
 {f'Additional instructions: {instructions}' if instructions else ''}
 
 Return ONLY the rewritten text, no explanations."""
         
-        return await self.generate_response(text, system_prompt)
+        chunks = split_text(text, settings.rewrite_chunk_chars)
+        if len(chunks) < 2:
+            rewritten = await self.generate_response(text, system_prompt, profile="rewrite")
+            if on_chunk:
+                on_chunk(0, rewritten)
+            return rewritten
+        
+        system_prompt += """
+You are rewriting one section of a longer document. Text marked as context belongs to the
+neighbouring sections: use it for continuity, but rewrite ONLY the section."""
+        
+        semaphore = asyncio.Semaphore(settings.rewrite_concurrency)
+        results: Dict[int, str] = {}
+        next_index = 0
+        
+        async def rewrite(index: int) -> None:
+            nonlocal next_index
+            prompt = self._rewrite_chunk_prompt(chunks, index)
+            async with semaphore:
+                with metrics.timer("rewrite.chunk"):
+                    results[index] = (await self.generate_response(prompt, system_prompt, profile="rewrite")).strip()
+            # Emit every chunk that is now ready, in order
+            while next_index in results:
+                if on_chunk:
+                    on_chunk(next_index, results[next_index])
+                next_index += 1
+        
+        await asyncio.gather(*(rewrite(i) for i in range(len(chunks))))
+        metrics.increment("rewrite.chunks", len(chunks))
+        return join_chunks([(results[i], separator) for i, (_, separator) in enumerate(chunks)])
+    
+    @staticmethod
+    def _rewrite_chunk_prompt(chunks: List[Tuple[str, str]], index: int, context_chars: int = 300) -> str:
+        """Prompt for one chunk, with the end of the previous and start of the next as context"""
+        parts = []
+        if index > 0:
+            parts.append(f"[Context - previous section, do not rewrite]\n...{chunks[index - 1][0][-context_chars:]}")
+        parts.append(f"[Section to rewrite]\n{chunks[index][0]}")
+        if index + 1 < len(chunks):
+            parts.append(f"[Context - next section, do not rewrite]\n{chunks[index + 1][0][:context_chars]}...")
+        return "\n\n".join(parts)
     
-    async def analyze_decision(self, question: str, options: list) -> Dict[str, Any]:
-        """Analyze decision options"""
-        options_text = "\n".join([f"{i+1}. {opt}" for i, opt in enumerate(options)])
+    async def analyze_decision(
+        self,
+        question: str,
+        options: list,
+        on_option: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Analyze decision options
+        
+        In fan-out mode (the default) each option is analyzed in its own call,
+        at most ``settings.decision_concurrency`` at a time, and a short merge
+        call adds the overall analysis. ``on_option`` is called with each
+        option's details as soon as they arrive. A malformed response only
+        loses that option's pros and cons.
+        """
+        if not settings.decision_fan_out or len(options) < 2:
+            return await self._analyze_decision_single(question, options, on_option)
+        
+        semaphore = asyncio.Semaphore(settings.decision_concurrency)
+        
+        async def analyze(option: str) -> Dict[str, Any]:
+            async with semaphore:
+                with metrics.timer("decision.option"):
+                    details = await self._analyze_option(question, option, options)
+            if on_option:
+                on_option(details)
+            return details
+        
+        option_details = list(await asyncio.gather(*(analyze(option) for option in options)))
+        
+        with metrics.timer("decision.merge"):
+            merged = await self._merge_decision(question, option_details)
+        return {**merged, "option_details": option_details}
+    
+    async def _analyze_option(self, question: str, option: str, options: list) -> Dict[str, Any]:
+        """Pros and cons of a single option"""
+        others = ", ".join(str(other) for other in options if other != option)
+        prompt = f"""Question: {question}
+Option to analyze: {option}
+Other options being considered: {others}
+
+List the pros and cons of this option only. Do NOT make the final decision for the user.
+Format your response as JSON with this structure:
+{{"option": "{option}", "pros": ["pro1", "pro2"], "cons": ["con1", "con2"]}}"""
+        
+        system_prompt = "You are a decision analysis assistant. Provide balanced, objective analysis without forcing decisions."
+        output = await self.generate_structured(prompt, system_prompt, profile="decision")
+        
+        details = output["data"]
+        if not isinstance(details, dict):
+            metrics.increment("decision.option_parse_failed")
+            return {"option": option, "pros": [], "cons": [], "analysis": output["text"]}
+        
+        details["option"] = option
+        # Models sometimes send a single string (or null) instead of a list
+        for key in ("pros", "cons"):
+            details[key] = self._as_list(details.get(key))
+        return details
+    
+    @staticmethod
+    def _as_list(value: Any) -> List[Any]:
+        """A JSON value as a list of items"""
+        if value is None or value == "":
+            return []
+        if isinstance(value, list):
+            return value
+        return [value]
+    
+    @staticmethod
+    def _option_token_share(reserved: str, option_count: int) -> int:
+        """Prompt tokens each option may use within the decision budget"""
+        free = budget_for("decision_making", "decision") - token_estimator.count(reserved)
+        return max(free // max(option_count, 1), PromptBuilder.MIN_PARTIAL_TOKENS)
+    
+    async def _merge_decision(self, question: str, option_details: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Overall analysis and considerations from the per-option results"""
+        # Pros and cons get half of each option's share, so long lists cannot crowd out the rest
+        share = self._option_token_share(question, len(option_details)) // 2
+        summary = "\n".join(
+            f"- {d['option']}: pros: {token_estimator.truncate('; '.join(map(str, d['pros'])), share) or 'n/a'}; "
+            f"cons: {token_estimator.truncate('; '.join(map(str, d['cons'])), share) or 'n/a'}"
+            for d in option_details
+        )
+        prompt = f"""Question: {question}
+
+Per-option analysis:
+{summary}
+
+In 2-3 sentences, compare the options and name the factors that matter most. Do NOT make the final decision for the user.
+Format your response as JSON with this structure:
+{{"analysis": "short comparison", "considerations": ["important factor 1", "important factor 2"]}}"""
+        
+        system_prompt = "You are a decision analysis assistant. Provide balanced, objective analysis without forcing decisions."
+        output = await self.generate_structured(prompt, system_prompt, profile="decision")
+        
+        merged = output["data"]
+        if isinstance(merged, dict):
+            return {"analysis": merged.get("analysis", ""), "considerations": merged.get("considerations", [])}
+        return {"analysis": output["text"], "considerations": []}
+    
+    async def _analyze_decision_single(
+        self,
+        question: str,
+        options: list,
+        on_option: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Analyze all options in one call, streaming option details as they close"""
+        share = self._option_token_share(question, len(options))
+        options_text = "\n".join([f"{i+1}. {token_estimator.truncate(str(opt), share)}" for i, opt in enumerate(options)])
         
         prompt = f"""Question: {question}
 
@@ -165,14 +722,17 @@ Format your response as JSON with this structure:
         
         system_prompt = "You are a decision analysis assistant. Provide balanced, objective analysis without forcing decisions."
         
-        response = await self.generate_response(prompt, system_prompt)
+        output = await self.generate_structured(
+            prompt,
+            system_prompt,
+            stream_keys=("option_details",),
+            profile="decision",
+            on_item=(lambda key, details: on_option(details)) if on_option else None
+        )
         
-        # Try to parse as JSON, fallback to text if fails
-        try:
-            import json
-            return json.loads(response)
-        except:
-            return {"analysis": response}
+        if isinstance(output["data"], dict):
+            return output["data"]
+        return {"analysis": output["text"]}
 
 
 # Global AI service instance
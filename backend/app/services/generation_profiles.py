@@ -0,0 +1,40 @@
+"""Generation profiles: per-call-site sampling and output limits"""
+
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+
+class GenerationProfile(BaseModel):
+    """How the model generates for one kind of call"""
+    
+    name: str
+    temperature: Optional[float] = None
+    num_predict: Optional[int] = None  # Max output tokens
+    num_ctx: Optional[int] = None  # Context window
+    stop: List[str] = []
+    format: Optional[str] = None  # "json" for structured output, None for free text
+    
+    def options(self) -> Dict[str, Any]:
+        """Ollama ``options`` for this profile (unset fields are left to the model)"""
+        options = {
+            key: getattr(self, key)
+            for key in ("temperature", "num_predict", "num_ctx")
+            if getattr(self, key) is not None
+        }
+        if self.stop:
+            options["stop"] = self.stop
+        return options
+
+
+def profile_for(name: str, num_predict_cap: Optional[int] = None) -> GenerationProfile:
+    """Get a generation profile (settings defaults + overrides; unknown names use "chat")
+    
+    ``num_predict_cap`` lowers the profile's output limit for one call.
+    """
+    profile = dict(settings.generation_profiles.get(name, settings.generation_profiles.get("chat", {})))
+    profile.update(settings.generation_profile_overrides.get(name, {}))
+    if num_predict_cap:
+        profile["num_predict"] = min(profile.get("num_predict") or num_predict_cap, num_predict_cap)
+    return GenerationProfile(name=name, **profile)
@@ -0,0 +1,262 @@
+"""Background jobs for long-running LLM tools"""
+
+import asyncio
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Callable, Awaitable, AsyncIterator, Type
+
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.metrics import metrics
+from app.core.tracing import create_background_task, tracer
+from app.core.serialization import dumps_str, loads
+from app.models import DailyPlanRequest, DecisionRequest, LearningPlanRequest, RewriteRequest
+from app.services.ai_service import ai_service
+from app.services.structured_output import item_sink
+from app.services.text_chunks import split_text
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+def _timestamp() -> str:
+    """Current UTC time in SQLite's CURRENT_TIMESTAMP format (as created_at is stored)"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class JobContext:
+    """Handle passed to a job handler for reporting progress"""
+    
+    def __init__(self, manager: "JobManager", job_id: str):
+        self.manager = manager
+        self.job_id = job_id
+    
+    def report(self, progress: Optional[float] = None, partial: Any = None) -> None:
+        """Record progress (0-1) and/or append a partial result"""
+        fields: Dict[str, Any] = {}
+        if progress is not None:
+            fields["progress"] = max(0.0, min(progress, 1.0))
+        if fields or partial is not None:
+            self.manager._update(self.job_id, partial=partial, **fields)
+
+
+JobHandler = Callable[[Dict[str, Any], JobContext], Awaitable[Any]]
+
+
+class JobManager:
+    """Runs jobs in the background with bounded concurrency
+    
+    Jobs are persisted in the ``jobs`` table. At most ``settings.job_workers``
+    run at once, so long plans and analyses queue up behind each other
+    instead of crowding interactive chat off the model.
+    """
+    
+    def __init__(self):
+        self.handlers: Dict[str, JobHandler] = {}
+        self.param_models: Dict[str, Type[BaseModel]] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+    
+    def register(self, kind: str, params: Optional[Type[BaseModel]] = None):
+        """Decorator registering a handler for a job kind, with the model its params must match"""
+        def decorator(handler: JobHandler) -> JobHandler:
+            self.handlers[kind] = handler
+            if params is not None:
+                self.param_models[kind] = params
+            return handler
+        return decorator
+    
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.job_workers)
+        return self._semaphore
+    
+    def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a job and return it immediately
+        
+        Raises:
+            ValueError: for an unknown kind or params the kind does not accept
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'. Available: {', '.join(self.handlers)}")
+        
+        model = self.param_models.get(kind)
+        if model is not None:
+            try:
+                params = model(**params).model_dump(mode="json", exclude_none=True)
+            except ValidationError as e:
+                problems = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+                raise ValueError(f"Invalid params for job '{kind}': {problems}")
+        
+        job_id = str(uuid.uuid4())
+        with db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, params) VALUES (?, ?, 'queued', ?)",
+                (job_id, kind, dumps_str(params))
+            )
+        
+        self._tasks[job_id] = create_background_task(self._run(job_id, kind, params))
+        metrics.increment(f"jobs.{kind}.submitted")
+        return self.get(job_id)
+    
+    async def _run(self, job_id: str, kind: str, params: Dict[str, Any]) -> None:
+        try:
+            async with self.semaphore:
+                self._update(job_id, status="running", started_at=_timestamp())
+                context = JobContext(self, job_id)
+                # Each job gets its own trace, apart from the request that submitted it
+                with metrics.timer(f"jobs.{kind}"), tracer.trace(f"job {kind}", job_id=job_id):
+                    result = await self.handlers[kind](params, context)
+                self._update(
+                    job_id,
+                    status="completed",
+                    progress=1.0,
+                    result=dumps_str(result),
+                    finished_at=_timestamp()
+                )
+        except asyncio.CancelledError:
+            self._update(job_id, status="cancelled", finished_at=_timestamp())
+        except Exception as e:
+            print(f"[ERROR] Job {job_id} ({kind}) failed: {e}")
+            self._update(job_id, status="failed", error=str(e), finished_at=_timestamp())
+        finally:
+            self._tasks.pop(job_id, None)
+    
+    def _update(self, job_id: str, partial: Any = None, **fields: Any) -> None:
+        """Persist job fields, append ``partial`` to the partial results, and notify stream subscribers"""
+        assignments = [f"{name} = ?" for name in fields]
+        values = list(fields.values())
+        if partial is not None:
+            # Appended in SQL, so each report writes only the new partial, not the whole list
+            assignments.append("partial_results = json_insert(partial_results, '$[#]', json(?))")
+            values.append(dumps_str(partial))
+        with db.get_connection() as conn:
+            conn.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ?", (*values, job_id))
+        
+        job = self.get(job_id)
+        for queue in self._subscribers.get(job_id, []):
+            queue.put_nowait(job)
+    
+    @staticmethod
+    def _row_to_job(row) -> Dict[str, Any]:
+        job = dict(row)
+        job["params"] = loads(job["params"] or "{}")
+        job["partial_results"] = loads(job["partial_results"] or "[]")
+        job["result"] = loads(job["result"]) if job["result"] else None
+        return job
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by ID"""
+        with db.get_connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+    
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Recent jobs, newest first"""
+        with db.get_connection() as conn:
+            if status:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                    (status, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+    
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job"""
+        task = self._tasks.get(job_id)
+        if not task:
+            return False
+        task.cancel()
+        return True
+    
+    async def stream(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the job's current state, then every update until it finishes"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[job_id].append(queue)
+        try:
+            job = self.get(job_id)
+            while job:
+                yield job
+                if job["status"] in TERMINAL_STATUSES:
+                    break
+                job = await queue.get()
+        finally:
+            self._subscribers[job_id].remove(queue)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+    
+    def recover(self) -> int:
+        """Fail jobs left unfinished by a previous process"""
+        with db.get_connection() as conn:
+            cursor = conn.execute(
+                """UPDATE jobs SET status = 'failed', error = 'Interrupted by restart',
+                       finished_at = CURRENT_TIMESTAMP
+                   WHERE status IN ('queued', 'running')"""
+            )
+            return cursor.rowcount
+
+
+# Global job manager
+job_manager = JobManager()
+
+
+def _tool_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """A tool's result dict, raising if the tool reported a failure (so the job fails)"""
+    if not result.get("success", True):
+        raise RuntimeError(result.get("error") or "Tool failed")
+    return result
+
+
+@job_manager.register("daily_plan", DailyPlanRequest)
+async def daily_plan_job(params: Dict[str, Any], job: JobContext) -> Any:
+    """Run create_daily_plan in the background, one partial per plan block"""
+    from app.tools.planner import create_daily_plan
+    
+    job.report(progress=0.1)
+    item_sink.set(lambda key, block: job.report(partial=block))
+    return _tool_result(await create_daily_plan.ainvoke(params))
+
+
+@job_manager.register("learning_plan", LearningPlanRequest)
+async def learning_plan_job(params: Dict[str, Any], job: JobContext) -> Any:
+    """Run create_learning_plan in the background, one partial per subtopic"""
+    from app.tools.learning_tracker import create_learning_plan
+    
+    job.report(progress=0.1)
+    item_sink.set(lambda key, subtopic: job.report(partial=subtopic))
+    return _tool_result(await create_learning_plan.ainvoke(params))
+
+
+@job_manager.register("decision_analysis", DecisionRequest)
+async def decision_analysis_job(params: Dict[str, Any], job: JobContext) -> Any:
+    """Run AIService.analyze_decision in the background, one partial per option"""
+    options = params["options"]
+    done = 0
+    
+    def on_option(details: Dict[str, Any]) -> None:
+        nonlocal done
+        done += 1
+        job.report(progress=0.9 * done / len(options), partial=details)
+    
+    job.report(progress=0.05)
+    return await ai_service.analyze_decision(params["question"], options, on_option=on_option)
+
+
+@job_manager.register("rewrite", RewriteRequest)
+async def rewrite_job(params: Dict[str, Any], job: JobContext) -> Any:
+    """Rewrite a long text in the background, one partial per chunk in order"""
+    total = max(1, len(split_text(params["text"], settings.rewrite_chunk_chars)))
+    
+    def on_chunk(index: int, chunk: str) -> None:
+        job.report(progress=(index + 1) / total, partial={"index": index, "text": chunk})
+    
+    rewritten = await ai_service.rewrite_text(
+        params["text"], params.get("tone", "professional"), params.get("instructions"), on_chunk=on_chunk
+    )
+    return {"original": params["text"], "rewritten": rewritten, "tone": params.get("tone", "professional")}
@@ -0,0 +1,151 @@
+"""Speculative memory retrieval from partial chat input"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tracing import create_background_task
+from app.core.vector_store import vector_store
+
+# Retrieval policy -> memory types searched
+RETRIEVAL_SCOPES: Dict[str, Optional[List[str]]] = {
+    "none": [],
+    "notes": ["note"],
+    "all": None,  # every type
+}
+
+# (query embedding, candidates) per retrieval policy
+PrefetchResults = Dict[str, Tuple[List[float], List[Dict[str, Any]]]]
+
+
+def similarity(a: str, b: str) -> float:
+    """How close two inputs are (0-1), ignoring case and surrounding whitespace"""
+    return SequenceMatcher(None, a.strip().lower(), b.strip().lower()).ratio()
+
+
+class PrefetchEntry:
+    """A session's latest prefetched retrieval and the one in flight"""
+    
+    def __init__(self):
+        self.text = ""
+        self.results: PrefetchResults = {}
+        self.fetched_at = 0.0
+        self.running_text = ""
+        self.pending: Optional[Tuple[str, Dict[str, Optional[List[str]]]]] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class MemoryPrefetcher:
+    """Embed and search partial input while the user is still typing
+    
+    The chat UI sends debounced partial input to ``prefetch``; the query
+    embedding and candidate memories for each retrieval policy are cached
+    under the session. When the message is submitted, ``take`` hands them to
+    ``retrieve_memory_node`` if the final text is within
+    ``settings.prefetch_min_similarity`` of the prefetched text (waiting
+    briefly for a prefetch that is still running), so retrieval is off the
+    critical path. Only the latest partial input per session is searched;
+    newer input arriving mid-search replaces any queued one.
+    """
+    
+    def __init__(self):
+        self._entries: "OrderedDict[str, PrefetchEntry]" = OrderedDict()
+    
+    def prefetch(self, session_id: str, text: str, scopes: Optional[Dict[str, Optional[List[str]]]] = None) -> bool:
+        """Start retrieval for partial input; returns False if there is nothing new to do
+        
+        ``scopes`` maps the retrieval policies to prefetch to their memory
+        types (default: every policy in ``RETRIEVAL_SCOPES`` that searches).
+        """
+        if scopes is None:
+            scopes = {policy: types for policy, types in RETRIEVAL_SCOPES.items() if policy != "none"}
+        text = text.strip()
+        if not settings.memory_prefetch or len(text) < settings.prefetch_min_chars:
+            return False
+        
+        entry = self._entries.get(session_id)
+        if entry is None:
+            entry = self._entries[session_id] = PrefetchEntry()
+            while len(self._entries) > settings.prefetch_max_sessions:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(session_id)
+        
+        if text in (entry.text, entry.running_text):
+            return False
+        entry.pending = (text, scopes)
+        if entry.task is None or entry.task.done():
+            entry.task = create_background_task(self._run(entry))
+        metrics.increment("memory.prefetch.requests")
+        return True
+    
+    async def _run(self, entry: PrefetchEntry) -> None:
+        while entry.pending:
+            text, scopes = entry.pending
+            entry.pending = None
+            entry.running_text = text
+            try:
+                with metrics.timer("memory.prefetch"):
+                    results = await asyncio.to_thread(self._search, text, scopes)
+            except Exception as e:
+                print(f"[-] Memory prefetch failed: {e}")
+                continue
+            finally:
+                entry.running_text = ""
+            entry.text, entry.results, entry.fetched_at = text, results, time.monotonic()
+    
+    @staticmethod
+    def _search(text: str, scopes: Dict[str, Optional[List[str]]]) -> PrefetchResults:
+        query_embedding = vector_store.embed_query(text)
+        return {
+            policy: (
+                query_embedding,
+                vector_store.search(
+                    text,
+                    n_results=settings.memory_top_k,
+                    memory_types=memory_types,
+                    query_embedding=query_embedding,
+                    include_embeddings=True
+                )
+            )
+            for policy, memory_types in scopes.items()
+        }
+    
+    async def take(
+        self,
+        session_id: Optional[str],
+        text: str,
+        policy: str,
+        wait: bool = True
+    ) -> Optional[Tuple[List[float], List[Dict[str, Any]]]]:
+        """Prefetched (query embedding, candidates) for the submitted text, if close enough
+        
+        The session's entry is consumed either way: the next message starts
+        a fresh prefetch. With ``wait=False`` only finished results are used.
+        """
+        entry = self._entries.pop(session_id, None) if session_id else None
+        if entry is None:
+            return None
+        
+        # A prefetch of nearly this text is still running: its result beats starting over
+        running = entry.running_text or (entry.pending[0] if entry.pending else "")
+        if wait and running and similarity(running, text) >= settings.prefetch_min_similarity:
+            try:
+                await asyncio.wait_for(asyncio.shield(entry.task), settings.prefetch_wait_seconds)
+            except asyncio.TimeoutError:
+                pass
+        
+        fresh = time.monotonic() - entry.fetched_at <= settings.prefetch_ttl_seconds
+        if entry.results and fresh and policy in entry.results and similarity(entry.text, text) >= settings.prefetch_min_similarity:
+            metrics.increment("memory.prefetch.hits")
+            return entry.results[policy]
+        
+        metrics.increment("memory.prefetch.misses")
+        return None
+
+
+# Global memory prefetcher
+memory_prefetcher = MemoryPrefetcher()
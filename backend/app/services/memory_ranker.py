@@ -0,0 +1,122 @@
+"""Memory re-ranking (relevance cut-off, recency decay, MMR diversity)"""
+
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import numpy as np
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+
+class RerankPolicy(BaseModel):
+    """How retrieved memories are filtered and ordered for one intent"""
+    
+    top_k: int
+    max_distance: float
+    mmr_lambda: float
+    recency_half_life_days: float
+
+
+def policy_for(intent: str) -> RerankPolicy:
+    """Get the re-ranking policy for an intent (settings defaults + per-intent overrides)"""
+    policy = {
+        "top_k": settings.memory_context_k,
+        "max_distance": settings.memory_max_distance,
+        "mmr_lambda": settings.memory_mmr_lambda,
+        "recency_half_life_days": settings.memory_recency_half_life_days,
+    }
+    policy.update(settings.memory_rerank_overrides.get(intent, {}))
+    policy["top_k"] = int(policy["top_k"])
+    return RerankPolicy(**policy)
+
+
+def _recency_weights(memories: List[Dict[str, Any]], half_life_days: float) -> np.ndarray:
+    """Exponential decay over each memory's ``created_at``"""
+    now = datetime.now()
+    ages = np.zeros(len(memories))
+    for i, memory in enumerate(memories):
+        created_at = memory.get("metadata", {}).get("created_at")
+        try:
+            ages[i] = max((now - datetime.fromisoformat(created_at)).total_seconds(), 0) / 86400
+        except (TypeError, ValueError):
+            ages[i] = 0.0
+    return np.power(0.5, ages / half_life_days)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so dot products are cosine similarities"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def rerank(
+    memories: List[Dict[str, Any]],
+    policy: RerankPolicy,
+    query_embedding: Optional[List[float]] = None
+) -> List[Dict[str, Any]]:
+    """Filter and order candidate memories
+    
+    1. Drop candidates whose distance exceeds ``policy.max_distance``
+    2. Score relevance (cosine similarity to the query, or ``1 / (1 + distance)``
+       when embeddings are unavailable), decayed by age if configured
+    3. Pick ``policy.top_k`` with maximal marginal relevance so near-duplicates
+       don't crowd out other useful context
+    
+    Args:
+        memories: Candidates from ``vector_store.search`` (best first)
+        policy: Re-ranking policy for the current intent
+        query_embedding: Query vector; required for MMR diversity
+    
+    Returns:
+        Selected memories, each with a ``score``
+    """
+    candidates = [
+        m for m in memories
+        if m.get("distance") is None or m["distance"] <= policy.max_distance
+    ]
+    if not candidates or policy.top_k <= 0:
+        return []
+    
+    # Collections awaiting re-index may live in a different embedding space
+    has_embeddings = query_embedding is not None and all(
+        m.get("embedding") is not None and len(m["embedding"]) == len(query_embedding)
+        for m in candidates
+    )
+    
+    if has_embeddings:
+        vectors = _normalize(np.asarray([m["embedding"] for m in candidates], dtype=np.float32))
+        query_vector = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        relevance = vectors @ query_vector
+    else:
+        distances = np.asarray([m.get("distance") or 0.0 for m in candidates], dtype=np.float32)
+        relevance = 1.0 / (1.0 + distances)
+    
+    if policy.recency_half_life_days > 0:
+        relevance = relevance * _recency_weights(candidates, policy.recency_half_life_days)
+    
+    k = min(policy.top_k, len(candidates))
+    
+    if not has_embeddings or policy.mmr_lambda >= 1.0:
+        order = np.argsort(-relevance)[:k]
+    else:
+        # Maximal marginal relevance over the pairwise similarity matrix
+        similarity = vectors @ vectors.T
+        selected: List[int] = []
+        max_similarity = np.full(len(candidates), -np.inf)
+        available = np.ones(len(candidates), dtype=bool)
+        for _ in range(k):
+            redundancy = np.where(np.isfinite(max_similarity), max_similarity, 0.0)
+            mmr = policy.mmr_lambda * relevance - (1 - policy.mmr_lambda) * redundancy
+            mmr[~available] = -np.inf
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            available[best] = False
+            max_similarity = np.maximum(max_similarity, similarity[best])
+        order = selected
+    
+    ranked = []
+    for i in order:
+        memory = {key: value for key, value in candidates[i].items() if key != "embedding"}
+        memory["score"] = float(relevance[i])
+        ranked.append(memory)
+    return ranked
@@ -0,0 +1,135 @@
+"""Model routing: pick an Ollama model per call type, with fallback"""
+
+import time
+from contextlib import asynccontextmanager
+from collections import defaultdict
+from typing import Dict, Any, List, Set, AsyncIterator
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.tracing import tracer
+from app.core.ollama_client import ollama_client, OllamaError
+from app.services.turns import current_turn
+
+# Generation profile -> call type it is routed as
+PROFILE_CALL_TYPES = {
+    "intent": "intent",
+    "rewrite": "rewrite",
+    "summary": "rewrite",
+    "chat": "chat",
+    "combined": "chat",
+    "tools": "chat",
+    "planning": "planning",
+    "decision": "decision",
+    "fast": "fast",
+}
+
+
+class ModelRouter:
+    """Maps call types to models and tracks which models are usable
+    
+    Each call type has a preferred model (``settings.model_routes``, default
+    ``settings.ollama_model``) followed by ``settings.model_fallbacks``. A
+    model is skipped while it is missing from ``/api/tags``, cooling down
+    after an error, or already running ``settings.model_max_in_flight`` calls.
+    """
+    
+    def __init__(self):
+        self.available: Set[str] = set()
+        self._checked_at = 0.0
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._cooldown_until: Dict[str, float] = {}
+    
+    def candidates(self, call_type: str) -> List[str]:
+        """Models for a call type, in order of preference"""
+        models = [settings.model_routes.get(call_type, settings.ollama_model), *settings.model_fallbacks, settings.ollama_model]
+        return list(dict.fromkeys(models))
+    
+    def set_available(self, model_names: List[str]) -> None:
+        """Record the models Ollama reported"""
+        self.available = set(model_names)
+        self._checked_at = time.monotonic()
+    
+    async def refresh(self, force: bool = False) -> None:
+        """Re-read ``/api/tags`` if the cached list is older than ``settings.model_check_interval``"""
+        if not force and time.monotonic() - self._checked_at < settings.model_check_interval:
+            return
+        try:
+            self.set_available(await ollama_client.tags())
+        except (httpx.HTTPError, OllamaError, ValueError) as e:
+            # Keep the last known list; try again on the next interval
+            print(f"[-] Could not refresh Ollama model list: {e}")
+            self._checked_at = time.monotonic()
+    
+    def _usable(self, model: str) -> bool:
+        return model in self.available and self._cooldown_until.get(model, 0.0) <= time.monotonic()
+    
+    async def select(self, call_type: str) -> str:
+        """Best model for a call type right now"""
+        await self.refresh()
+        candidates = self.candidates(call_type)
+        usable = [model for model in candidates if self._usable(model)]
+        for model in usable:
+            if self._in_flight[model] < settings.model_max_in_flight:
+                break
+        else:
+            # Everything is busy: queue on the least loaded usable model
+            model = min(usable, key=lambda m: self._in_flight[m]) if usable else candidates[0]
+        
+        if model != candidates[0]:
+            metrics.increment(f"model_router.{call_type}.fallback")
+        return model
+    
+    @asynccontextmanager
+    async def use(self, call_type: str) -> AsyncIterator[str]:
+        """Select a model and track the call's latency and errors against it
+        
+        Calls made for a chat turn are registered with it, so cancelling the
+        turn cancels them too.
+        """
+        model = await self.select(call_type)
+        self._in_flight[model] += 1
+        start = time.perf_counter()
+        turn = current_turn.get()
+        try:
+            with tracer.span(f"llm.{call_type}", model=model):
+                if turn:
+                    with turn.call(model):
+                        yield model
+                else:
+                    yield model
+        except Exception:
+            metrics.increment(f"model.{model}.errors")
+            self._cooldown_until[model] = time.monotonic() + settings.model_error_cooldown
+            raise
+        finally:
+            self._in_flight[model] -= 1
+            metrics.observe(f"model.{model}", time.perf_counter() - start)
+    
+    def status(self) -> Dict[str, Any]:
+        """Routes, availability, load and latency per model"""
+        now = time.monotonic()
+        models = sorted(set(self.available) | {m for call_type in PROFILE_CALL_TYPES.values() for m in self.candidates(call_type)})
+        return {
+            "routes": {call_type: self.candidates(call_type) for call_type in sorted(set(PROFILE_CALL_TYPES.values()))},
+            "models": {
+                model: {
+                    "available": model in self.available,
+                    "cooling_down": self._cooldown_until.get(model, 0.0) > now,
+                    "in_flight": self._in_flight.get(model, 0),
+                    "latency": metrics.summary(f"model.{model}"),
+                }
+                for model in models
+            },
+        }
+
+
+def call_type_for(profile: str) -> str:
+    """Call type a generation profile is routed as"""
+    return PROFILE_CALL_TYPES.get(profile, "chat")
+
+
+# Global model router
+model_router = ModelRouter()
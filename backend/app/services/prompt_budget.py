@@ -0,0 +1,144 @@
+"""Token-budgeted prompt assembly"""
+
+import threading
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.generation_profiles import profile_for
+
+
+class TokenEstimator:
+    """Character-based token estimate, calibrated against Ollama's counts
+    
+    Starts from ``settings.prompt_chars_per_token`` and follows the ratio of
+    generated characters to ``eval_count`` reported by Ollama (output tokens
+    are always counted in full, unlike prompt tokens served from the KV
+    cache), so estimates track the tokenizer of the model actually in use.
+    """
+    
+    def __init__(self, chars_per_token: Optional[float] = None, smoothing: float = 0.1):
+        self.chars_per_token = chars_per_token or settings.prompt_chars_per_token
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+    
+    def count(self, text: str) -> int:
+        """Estimated tokens in a text"""
+        return int(len(text) / self.chars_per_token) + 1 if text else 0
+    
+    def calibrate(self, chars: int, tokens: int) -> None:
+        """Fold one observed (characters, tokens) pair into the ratio"""
+        if tokens < 16 or chars <= 0:
+            return  # Too short to say anything about the tokenizer
+        ratio = min(max(chars / tokens, 1.5), 8.0)
+        with self._lock:
+            self.chars_per_token += self.smoothing * (ratio - self.chars_per_token)
+    
+    def truncate(self, text: str, tokens: int) -> str:
+        """Cut a text to about ``tokens`` tokens at a word boundary"""
+        if self.count(text) <= tokens:
+            return text
+        limit = max(int((tokens - 1) * self.chars_per_token) - 3, 0)
+        cut = text[:limit]
+        if " " in cut[limit // 2:]:
+            cut = cut[:cut.rindex(" ")]
+        return cut.rstrip() + "..."
+
+
+# Global token estimator
+token_estimator = TokenEstimator()
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimated tokens in a text"""
+    return token_estimator.count(text)
+
+
+def budget_for(intent: Optional[str] = None, profile: str = "chat") -> int:
+    """Prompt token budget for an intent, capped by the profile's context window"""
+    budget = settings.prompt_token_budgets.get(intent or "", settings.prompt_token_budget)
+    generation = profile_for(profile)
+    if generation.num_ctx:
+        budget = min(budget, generation.num_ctx - (generation.num_predict or 512))
+    return budget
+
+
+class PromptSection:
+    """Pieces of one kind of prompt content, most valuable first"""
+    
+    def __init__(
+        self,
+        name: str,
+        items: List[str],
+        priority: int,
+        max_item_tokens: Optional[int] = None,
+        truncate: bool = True
+    ):
+        self.name = name
+        self.items = items
+        self.priority = priority
+        self.max_item_tokens = max_item_tokens
+        self.truncate = truncate
+
+
+class PromptBuilder:
+    """Fit prompt sections into a token budget by priority
+    
+    Required text (system prompt, the user's message) is counted first.
+    Sections are then filled in priority order, each taking its items (most
+    valuable first) while they fit, so the budget runs out on the
+    lowest-priority, lowest-value pieces. An item that does not fit is
+    truncated when the section allows it and enough budget is left,
+    otherwise it and the rest of its section are dropped.
+    """
+    
+    # Smallest remainder worth filling with a truncated item
+    MIN_PARTIAL_TOKENS = 32
+    
+    def __init__(self, budget: int, estimator: TokenEstimator = token_estimator):
+        self.budget = budget
+        self.estimator = estimator
+        self.used = 0
+        self._sections: List[PromptSection] = []
+    
+    def reserve(self, *texts: str) -> "PromptBuilder":
+        """Count text that is always sent in full"""
+        self.used += sum(self.estimator.count(text) for text in texts if text)
+        return self
+    
+    def add(
+        self,
+        name: str,
+        items: List[str],
+        priority: int,
+        max_item_tokens: Optional[int] = None,
+        truncate: bool = True
+    ) -> "PromptBuilder":
+        """Add a section; higher ``priority`` sections are filled first"""
+        self._sections.append(PromptSection(name, items, priority, max_item_tokens, truncate))
+        return self
+    
+    def build(self) -> Dict[str, List[str]]:
+        """Kept items per section, in the order they were given"""
+        kept: Dict[str, List[str]] = {}
+        remaining = self.budget - self.used
+        trimmed = 0
+        for section in sorted(self._sections, key=lambda s: -s.priority):
+            items = kept.setdefault(section.name, [])
+            for index, item in enumerate(section.items):
+                if section.max_item_tokens:
+                    item = self.estimator.truncate(item, section.max_item_tokens)
+                tokens = self.estimator.count(item)
+                if tokens > remaining and section.truncate and remaining >= self.MIN_PARTIAL_TOKENS:
+                    item = self.estimator.truncate(item, remaining)
+                    tokens = self.estimator.count(item)
+                if tokens > remaining:
+                    trimmed += len(section.items) - index
+                    break
+                items.append(item)
+                remaining -= tokens
+        
+        self.used = self.budget - remaining
+        if trimmed:
+            metrics.increment("prompt.trimmed_items", trimmed)
+        return kept
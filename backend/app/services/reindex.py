@@ -0,0 +1,160 @@
+"""Online re-indexing of memory collections after an embedding model change"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+from app.core.vector_store import vector_store, COLLECTION_DESCRIPTIONS, UNIFIED_DESCRIPTION
+
+
+class ReindexJob:
+    """Rebuilds stale collections with the configured embedding model
+    
+    Each collection is re-embedded in batches into a shadow collection while
+    queries keep hitting the live one. Writes made meanwhile (new or changed
+    documents, deletions) are caught up under the store's write lock, then
+    the shadow is swapped in atomically.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._reset("idle", [])
+    
+    def _reset(self, state: str, collections: List[str]) -> None:
+        self.state = state
+        self.collections = collections
+        self.current: Optional[str] = None
+        self.total = 0
+        self.done = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self, force: bool = False) -> Dict[str, Any]:
+        """Start re-indexing stale collections (or all of them with ``force``)"""
+        with self._lock:
+            if self.running:
+                return self.status()
+            
+            stale = [
+                name for name, collection in vector_store.collections().items()
+                if force or vector_store.is_stale(collection)
+            ]
+            if not stale:
+                self._reset("up_to_date", [])
+                return self.status()
+            
+            self._reset("running", stale)
+            self.total = sum(vector_store.collections()[name].count() for name in stale)
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="reindex", daemon=True)
+            self._thread.start()
+            return self.status()
+    
+    def _run(self) -> None:
+        try:
+            for name in self.collections:
+                self.current = name
+                self._rebuild(name)
+            self.state = "completed"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"[ERROR] Re-index failed: {e}")
+        finally:
+            self.current = None
+            self.finished_at = time.time()
+    
+    def _rebuild(self, name: str) -> None:
+        """Rebuild one collection into a shadow and swap it in"""
+        source = vector_store.collections()[name]
+        shadow_name = f"{name}__reindex"
+        description = COLLECTION_DESCRIPTIONS.get(name, UNIFIED_DESCRIPTION)
+        
+        # Drop a shadow left over from an interrupted run
+        try:
+            vector_store.client.delete_collection(name=shadow_name)
+        except ValueError:
+            pass
+        shadow = vector_store.create_collection(shadow_name, description, index_name=name)
+        
+        offset = 0
+        while True:
+            batch = source.get(
+                limit=settings.reindex_batch_size,
+                offset=offset,
+                include=["documents", "metadatas"]
+            )
+            if not batch["ids"]:
+                break
+            shadow.upsert(ids=batch["ids"], documents=batch["documents"], metadatas=batch["metadatas"])
+            offset += len(batch["ids"])
+            self.done += len(batch["ids"])
+            self.total = max(self.total, self.done)  # Writes may land mid-rebuild
+        
+        # Catch up with writes made during the rebuild, then swap. Documents
+        # added or changed in place since they were copied differ from their
+        # shadow copy, so compare content rather than just IDs.
+        with vector_store.write_lock:
+            current = source.get(include=["documents", "metadatas"])
+            copied = shadow.get(include=["documents", "metadatas"])
+            copies = {
+                memory_id: (document, metadata)
+                for memory_id, document, metadata in zip(copied["ids"], copied["documents"], copied["metadatas"])
+            }
+            
+            changed = [
+                i for i, memory_id in enumerate(current["ids"])
+                if copies.get(memory_id) != (current["documents"][i], current["metadatas"][i])
+            ]
+            if changed:
+                shadow.upsert(
+                    ids=[current["ids"][i] for i in changed],
+                    documents=[current["documents"][i] for i in changed],
+                    metadatas=[current["metadatas"][i] for i in changed]
+                )
+                self.total += len(changed)
+                self.done += len(changed)
+            
+            removed = list(set(copies) - set(current["ids"]))
+            if removed:
+                shadow.delete(ids=removed)
+            
+            vector_store.swap_collection(name, shadow)
+    
+    def status(self) -> Dict[str, Any]:
+        """Progress, throughput and ETA of the current (or last) run"""
+        elapsed = None
+        throughput = None
+        eta = None
+        if self.started_at:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+            if elapsed > 0 and self.done:
+                throughput = self.done / elapsed
+                if self.state == "running":
+                    eta = max(self.total - self.done, 0) / throughput
+        
+        return {
+            "state": self.state,
+            "collections": self.collections,
+            "current": self.current,
+            "done": self.done,
+            "total": self.total,
+            "progress": round(self.done / self.total, 4) if self.total else None,
+            "throughput_per_sec": round(throughput, 2) if throughput else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            "elapsed_seconds": round(elapsed, 1) if elapsed is not None else None,
+            "error": self.error,
+        }
+
+
+# Global re-index job
+reindex_job = ReindexJob()
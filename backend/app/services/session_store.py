@@ -0,0 +1,183 @@
+"""Chat session history: bounded in memory, persisted in SQLite, summarized as it grows"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Set
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.metrics import metrics
+from app.core.tracing import create_background_task
+from app.services.ai_service import ai_service
+from app.services.prompt_budget import estimate_tokens
+
+SUMMARY_PROMPT = """Summarize this conversation between a user and their assistant for the assistant's
+own future reference. Keep facts, decisions, preferences, open questions and commitments;
+drop pleasantries. Write at most 120 words in plain prose.
+
+{summary}Conversation:
+{turns}"""
+
+
+class Turn:
+    """One user message and the assistant's answer"""
+    
+    def __init__(self, turn_id: int, user: str, assistant: str):
+        self.id = turn_id
+        self.user = user
+        self.assistant = assistant
+        self.tokens = estimate_tokens(user) + estimate_tokens(assistant)
+
+
+class Session:
+    """A session's summary and the turns not yet folded into it"""
+    
+    def __init__(self, session_id: str, summary: str = "", turns: Iterable[Turn] = ()):
+        self.id = session_id
+        self.summary = summary
+        # Unbounded on purpose: turns leave only once a summary covering them is saved
+        self.turns: Deque[Turn] = deque(turns)
+        self.last_active = time.monotonic()
+        self.summarizing = False
+    
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(turn.tokens for turn in self.turns)
+
+
+class SessionStore:
+    """Per-session conversation history for prompts
+    
+    Each active session keeps its unsummarized turns in memory, written
+    through to SQLite so a session survives restarts and idle eviction.
+    When a session's history exceeds ``settings.session_token_budget`` or
+    holds ``settings.session_max_turns`` turns, its older turns are folded
+    into a rolling summary in the background, keeping the last
+    ``settings.session_keep_recent_turns`` verbatim. Turns are dropped only
+    after the summary covering them is saved, so a slow or failed summary
+    never loses any (the next turn retries). The prompt cost of history
+    therefore stays flat however long the session runs.
+    """
+    
+    def __init__(self):
+        self._sessions: Dict[str, Session] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._last_sweep = time.monotonic()
+    
+    def get(self, session_id: str) -> Session:
+        """Session from memory, or loaded from SQLite"""
+        self._evict_idle()
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._load(session_id)
+            self._sessions[session_id] = session
+        session.last_active = time.monotonic()
+        return session
+    
+    def _load(self, session_id: str) -> Session:
+        with db.get_connection() as conn:
+            row = conn.execute(
+                "SELECT summary, summarized_upto FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            summary, summarized_upto = (row["summary"], row["summarized_upto"]) if row else ("", 0)
+            rows = conn.execute(
+                """SELECT id, user_message, assistant_message FROM session_turns
+                   WHERE session_id = ? AND id > ? ORDER BY id""",
+                (session_id, summarized_upto)
+            ).fetchall()
+        turns = [Turn(r["id"], r["user_message"], r["assistant_message"]) for r in rows]
+        return Session(session_id, summary or "", turns)
+    
+    def _evict_idle(self) -> None:
+        """Drop sessions idle longer than ``settings.session_idle_seconds`` from memory"""
+        now = time.monotonic()
+        if now - self._last_sweep < 60:
+            return
+        self._last_sweep = now
+        idle = [
+            session_id for session_id, session in self._sessions.items()
+            if now - session.last_active > settings.session_idle_seconds and not session.summarizing
+        ]
+        for session_id in idle:
+            del self._sessions[session_id]
+            ai_service.forget_session(session_id)
+        if idle:
+            metrics.increment("sessions.evicted", len(idle))
+    
+    def history(self, session_id: str) -> List[Dict[str, str]]:
+        """Chat messages for the session: its summary, then the recent turns"""
+        session = self.get(session_id)
+        messages = []
+        if session.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation: {session.summary}"})
+        for turn in session.turns:
+            messages.append({"role": "user", "content": turn.user})
+            messages.append({"role": "assistant", "content": turn.assistant})
+        return messages
+    
+    def append(self, session_id: str, user_message: str, assistant_message: str) -> None:
+        """Record a completed turn; start summarizing if the session is over budget"""
+        session = self.get(session_id)
+        with db.get_connection() as conn:
+            conn.execute(
+                """INSERT INTO sessions (id) VALUES (?)
+                   ON CONFLICT(id) DO UPDATE SET updated_at = CURRENT_TIMESTAMP""",
+                (session_id,)
+            )
+            cursor = conn.execute(
+                "INSERT INTO session_turns (session_id, user_message, assistant_message) VALUES (?, ?, ?)",
+                (session_id, user_message, assistant_message)
+            )
+            turn_id = cursor.lastrowid
+        session.turns.append(Turn(turn_id, user_message, assistant_message))
+        
+        over_budget = session.tokens > settings.session_token_budget
+        full = len(session.turns) >= settings.session_max_turns
+        if (over_budget or full) and not session.summarizing and len(session.turns) > settings.session_keep_recent_turns:
+            session.summarizing = True
+            task = create_background_task(self._summarize(session))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _summarize(self, session: Session) -> None:
+        """Fold all but the most recent turns into the session summary"""
+        try:
+            older = list(session.turns)[:-settings.session_keep_recent_turns]
+            turns_text = "\n".join(f"User: {t.user}\nAssistant: {t.assistant}" for t in older)
+            prompt = SUMMARY_PROMPT.format(
+                summary=f"Summary so far: {session.summary}\n\n" if session.summary else "",
+                turns=turns_text
+            )
+            with metrics.timer("sessions.summarize"):
+                summary = (await ai_service.generate_response(prompt, profile="summary")).strip()
+            if not summary or summary.startswith("Error"):
+                return
+            
+            with db.get_connection() as conn:
+                conn.execute(
+                    """UPDATE sessions SET summary = ?, summarized_upto = ?, updated_at = CURRENT_TIMESTAMP
+                       WHERE id = ?""",
+                    (summary, older[-1].id, session.id)
+                )
+            session.summary = summary
+            # Turns added while summarizing stay; only the summarized ones go
+            while session.turns and session.turns[0].id <= older[-1].id:
+                session.turns.popleft()
+            metrics.increment("sessions.summarized_turns", len(older))
+        except Exception as e:
+            print(f"[ERROR] Summarizing session {session.id} failed: {e}")
+        finally:
+            session.summarizing = False
+    
+    def forget(self, session_id: str) -> None:
+        """Delete a session and its history"""
+        self._sessions.pop(session_id, None)
+        ai_service.forget_session(session_id)
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM session_turns WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+
+# Global session store
+session_store = SessionStore()
@@ -0,0 +1,197 @@
+"""Incremental parsing and repair of JSON produced by the LLM"""
+
+import json
+import re
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.I)
+DANGLING_KEY = re.compile(r'[,{]\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+SMART_QUOTES = "“”"
+
+ItemCallback = Callable[[str, Any], None]
+
+# Receives (array key, element) for every streamed element when no explicit
+# callback is given - lets background jobs collect partial results from tools
+item_sink: ContextVar[Optional[ItemCallback]] = ContextVar("structured_item_sink", default=None)
+
+
+class IncrementalJSONParser:
+    """Parse a JSON document as it streams in
+    
+    Tracks nesting and string state one character at a time and emits each
+    element of the arrays named in ``stream_keys`` (at any depth) as soon as
+    that element closes, e.g. every ``{"time": ..., "activity": ...}`` block of
+    a ``"plan"`` array while the rest of the plan is still generating. Leading
+    prose or code fences before the first ``{``/``[`` are ignored.
+    """
+    
+    def __init__(self, stream_keys: Iterable[str] = ()):
+        self.stream_keys = set(stream_keys)
+        self.buffer = ""
+        self._pos = 0
+        self._started = False
+        # Open containers: (bracket, key it is stored under, start offset)
+        self._stack: List[Tuple[str, Optional[str], int]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = ""
+        self._pending_key: Optional[str] = None
+    
+    def _in_tracked_array(self) -> bool:
+        return bool(self._stack) and self._stack[-1][0] == "[" and self._stack[-1][1] in self.stream_keys
+    
+    def _emit(self, start: int, end: int) -> Tuple[str, Any]:
+        text = self.buffer[start:end]
+        try:
+            value = json.loads(text)
+        except ValueError:
+            value = repair_json(text)
+        return self._stack[-1][1], value
+    
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Add streamed text and return the (key, element) pairs completed by it"""
+        self.buffer += text
+        events = []
+        while self._pos < len(self.buffer):
+            i = self._pos
+            ch = self.buffer[i]
+            self._pos += 1
+            
+            if not self._started:
+                if ch not in "{[":
+                    continue
+                self._started = True
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = self.buffer[self._string_start:i + 1]
+                    if self._in_tracked_array():
+                        try:
+                            events.append(self._emit(self._string_start, i + 1))
+                        except ValueError:
+                            pass
+                continue
+            
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and self._stack and self._stack[-1][0] == "{":
+                try:
+                    self._pending_key = json.loads(self._last_string)
+                except ValueError:
+                    self._pending_key = None
+            elif ch in "{[":
+                key = self._pending_key if self._stack and self._stack[-1][0] == "{" else None
+                self._stack.append((ch, key, i))
+                self._pending_key = None
+            elif ch in "}]" and self._stack:
+                _, _, start = self._stack.pop()
+                if self._in_tracked_array():
+                    try:
+                        events.append(self._emit(start, i + 1))
+                    except ValueError:
+                        pass
+            elif ch == ",":
+                self._pending_key = None
+        return events
+
+
+def _clean(text: str) -> Tuple[str, List[str], bool]:
+    """Fix malformations outside strings in one pass
+    
+    Drops trailing commas, maps Python literals to JSON, turns typographic
+    quotes delimiting a string into ``"`` (inside a string they are text)
+    and tracks which containers (and whether a string) are still open at
+    the end.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    smart_string = False
+    escape = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"' or (smart_string and ch in SMART_QUOTES):
+                in_string = False
+                ch = '"'
+            elif ch == "\n":
+                ch = "\\n"
+            out.append(ch)
+            i += 1
+            continue
+        
+        if ch == '"' or ch in SMART_QUOTES:
+            in_string = True
+            smart_string = ch != '"'
+            ch = '"'
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            while out and (out[-1].isspace() or out[-1] == ","):
+                out.pop()
+            if stack:
+                stack.pop()
+        elif ch.isalpha():
+            match = re.match(r"\w+", text[i:])
+            word = match.group(0)
+            out.append(PYTHON_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out), stack, in_string
+
+
+def repair_json(text: str) -> Any:
+    """Parse LLM output as JSON, repairing common malformations
+    
+    Handles code fences, prose before or after the document, smart quotes,
+    trailing commas, Python ``True``/``False``/``None``, raw newlines in
+    strings and truncated output (unterminated strings and containers are
+    closed, a dangling key is dropped).
+    
+    Raises:
+        ValueError: if no JSON document can be recovered
+    """
+    text = CODE_FENCE.sub("", text)
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("No JSON object or array in output")
+    text = text[min(starts):]
+    
+    decoder = json.JSONDecoder()
+    try:
+        return decoder.raw_decode(text)[0]
+    except ValueError:
+        pass
+    
+    cleaned, open_containers, in_string = _clean(text)
+    if in_string:
+        cleaned += '"'
+    try:
+        return decoder.raw_decode(cleaned)[0]
+    except ValueError:
+        pass
+    
+    # Truncated: drop a dangling comma or key, then close what is still open
+    cleaned = cleaned.rstrip().rstrip(",:").rstrip()
+    if open_containers and open_containers[-1] == "{":
+        match = DANGLING_KEY.search(cleaned)
+        if match:
+            cleaned = cleaned[:match.start() + 1].rstrip(",")
+    closers = "".join("}" if bracket == "{" else "]" for bracket in reversed(open_containers))
+    return decoder.raw_decode(cleaned + closers)[0]
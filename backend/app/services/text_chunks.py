@@ -0,0 +1,55 @@
+"""Split long texts into chunks at natural boundaries"""
+
+import re
+from typing import List, Tuple
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# A chunk and the separator that joins it to the previous one
+Chunk = Tuple[str, str]
+
+
+def split_text(text: str, max_chars: int) -> List[Chunk]:
+    """Split text into chunks of roughly max_chars
+    
+    Paragraphs are kept whole when they fit; longer paragraphs are split at
+    sentence boundaries. A single sentence longer than max_chars becomes its
+    own chunk rather than being cut mid-sentence.
+    
+    Returns:
+        (chunk, separator) pairs; ``join_chunks`` puts them back together
+    """
+    pieces: List[Chunk] = []
+    for paragraph in PARAGRAPH_BREAK.split(text.strip()):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append((paragraph, "\n\n"))
+        else:
+            sentences = SENTENCE_END.split(paragraph)
+            pieces.append((sentences[0], "\n\n"))
+            pieces.extend((sentence, " ") for sentence in sentences[1:])
+    
+    chunks: List[Chunk] = []
+    current, current_separator = "", ""
+    for piece, separator in pieces:
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append((current, current_separator))
+            current, current_separator = piece, separator
+        elif current:
+            current += separator + piece
+        else:
+            current, current_separator = piece, separator
+    if current:
+        chunks.append((current, current_separator))
+    return chunks
+
+
+def join_chunks(chunks: List[Chunk]) -> str:
+    """Reassemble chunks with their original separators"""
+    return "".join(
+        (separator if i else "") + chunk
+        for i, (chunk, separator) in enumerate(chunks)
+    )
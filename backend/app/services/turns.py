@@ -0,0 +1,164 @@
+"""Chat turns in flight: cancellation on disconnect, supersession or request"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+SUPERSEDED = "superseded"
+DISCONNECTED = "disconnected"
+CANCELLED = "cancelled"
+
+
+class TurnCancelled(Exception):
+    """A chat turn was stopped before it finished"""
+    
+    def __init__(self, reason: str):
+        super().__init__(f"Turn {reason}")
+        self.reason = reason
+
+
+def decode_rate() -> float:
+    """Measured output tokens per second across all generation profiles"""
+    tokens = seconds = 0.0
+    for name, value in list(metrics.counters.items()):
+        if name.startswith("llm.") and name.endswith(".output_tokens"):
+            tokens += value
+        elif name.startswith("llm.") and name.endswith(".eval_seconds"):
+            seconds += value
+    return tokens / seconds if seconds else settings.deadline_tokens_per_second
+
+
+EventCallback = Callable[[Dict[str, Any]], None]
+
+
+class Turn:
+    """One chat turn: the task running it and the LLM calls it has in flight
+    
+    ``on_event`` (if set) receives progress and token events as the turn
+    runs, each tagged with the session.
+    """
+    
+    def __init__(self, session_id: str, on_event: Optional[EventCallback] = None):
+        self.session_id = session_id
+        self.on_event = on_event
+        self.task: Optional[asyncio.Task] = None
+        self.cancel_reason: Optional[str] = None
+        # Task making the call -> (model, start time)
+        self.calls: Dict[asyncio.Task, Tuple[str, float]] = {}
+    
+    def emit(self, event: Dict[str, Any]) -> None:
+        if self.on_event and not self.cancel_reason:
+            self.on_event({**event, "session_id": self.session_id})
+    
+    def emit_token(self, content: str) -> None:
+        self.emit({"type": "token", "content": content})
+    
+    @contextmanager
+    def call(self, model: str) -> Iterator[None]:
+        """Track an LLM call made by the current task so cancelling stops it too"""
+        task = asyncio.current_task()
+        self.calls[task] = (model, time.monotonic())
+        try:
+            yield
+        finally:
+            self.calls.pop(task, None)
+    
+    def cancel(self, reason: str) -> bool:
+        """Stop the turn and its in-flight LLM calls; returns False if already done"""
+        if self.cancel_reason or self.task is None or self.task.done():
+            return False
+        self.cancel_reason = reason
+        
+        # Graph nodes run in their own tasks, so cancelling the turn alone
+        # would leave their calls running; closing those connections makes
+        # Ollama stop generating
+        now = time.monotonic()
+        tokens_saved = 0.0
+        for task, (model, start) in list(self.calls.items()):
+            usual = metrics.mean(f"model.{model}")
+            tokens_saved += max(usual - (now - start), 0.0) * decode_rate()
+            task.cancel()
+        self.task.cancel()
+        
+        metrics.increment(f"turns.cancelled.{reason}")
+        metrics.increment("turns.cancelled_llm_calls", len(self.calls))
+        metrics.increment("turns.tokens_saved", int(tokens_saved))
+        return True
+
+
+# Turn whose LLM calls the current task belongs to (inherited by graph node tasks)
+current_turn: ContextVar[Optional[Turn]] = ContextVar("current_turn", default=None)
+
+
+class TurnRegistry:
+    """At most one turn per session, queued or running
+    
+    A new message in a session supersedes the turn still in progress there, a
+    client disconnect cancels its own turn, and ``cancel`` stops a session's
+    turn on request. Either way the LLM calls of the turn are cancelled, so
+    a single local model is freed for the next request right away.
+    """
+    
+    def __init__(self):
+        self._turns: Dict[str, Turn] = {}
+    
+    async def run(
+        self,
+        session_id: str,
+        work: Awaitable[Any],
+        request: Optional[Request] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> Any:
+        """Run a turn's work; raises ``TurnCancelled`` if it is stopped early
+        
+        ``request`` is watched for a client disconnect; ``on_event`` receives
+        the turn's progress and token events.
+        """
+        previous = self._turns.get(session_id)
+        if previous:
+            previous.cancel(SUPERSEDED)
+        
+        turn = self._turns[session_id] = Turn(session_id, on_event)
+        token = current_turn.set(turn)
+        try:
+            turn.task = asyncio.ensure_future(work)
+        finally:
+            current_turn.reset(token)
+        
+        watcher = asyncio.create_task(self._watch(turn, request)) if request else None
+        try:
+            return await turn.task
+        except asyncio.CancelledError:
+            if turn.cancel_reason is None:
+                raise
+            raise TurnCancelled(turn.cancel_reason)
+        finally:
+            if watcher:
+                watcher.cancel()
+            if self._turns.get(session_id) is turn:
+                del self._turns[session_id]
+    
+    @staticmethod
+    async def _watch(turn: Turn, request: Request) -> None:
+        """Cancel the turn once its client has gone away"""
+        while not turn.task.done():
+            if await request.is_disconnected():
+                turn.cancel(DISCONNECTED)
+                return
+            await asyncio.sleep(settings.disconnect_poll_seconds)
+    
+    def cancel(self, session_id: str, reason: str = CANCELLED) -> bool:
+        """Stop the session's running turn, if any"""
+        turn = self._turns.get(session_id)
+        return bool(turn) and turn.cancel(reason)
+
+
+# Global turn registry
+turn_registry = TurnRegistry()
@@ -5,6 +5,7 @@ from app.tools.planner import planner_tools
 from app.tools.notes import notes_tools
 from app.tools.learning_tracker import learning_tools
 from app.tools.memory import memory_tools
+from app.tools.registry import tool_registry
 
 # Combine all tools
 all_tools = (
@@ -17,6 +18,7 @@ all_tools = (
 
 __all__ = [
     "all_tools",
+    "tool_registry",
     "task_tools",
     "planner_tools",
     "notes_tools",
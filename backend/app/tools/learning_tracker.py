@@ -1,7 +1,7 @@
 """Learning Tracker Tool"""
 
-import json
 from datetime import datetime
+from typing import Any, Dict
 from langchain.tools import tool
 
 from app.core.database import db
@@ -10,7 +10,7 @@ from app.services.ai_service import ai_service
 
 
 @tool
-async def create_learning_plan(topic: str, time_available: str = "30 minutes", difficulty: str = "beginner") -> str:
+async def create_learning_plan(topic: str, time_available: str = "30 minutes", difficulty: str = "beginner") -> Dict[str, Any]:
     """Create a learning plan for a topic.
     
     Args:
@@ -19,7 +19,7 @@ async def create_learning_plan(topic: str, time_available: str = "30 minutes", d
         difficulty: Difficulty level - beginner, intermediate, advanced (default: beginner)
     
     Returns:
-        JSON string with learning plan
+        Dict with learning plan
     """
     try:
         prompt = f"""Create a learning plan for: {topic}
@@ -44,38 +44,36 @@ Format as JSON:
     "recommendations": ["tip 1", "tip 2"]
 }}"""
         
-        response = await ai_service.generate_response(prompt)
+        output = await ai_service.generate_structured(prompt, stream_keys=("subtopics",))
+        plan = output["data"]
         
-        # Try to parse JSON
-        try:
-            plan = json.loads(response)
-            
-            # Store subtopics in database
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                for subtopic in plan.get("subtopics", []):
-                    cursor.execute(
-                        """INSERT INTO learning_progress (topic, subtopic, status)
-                           VALUES (?, ?, ?)""",
-                        (topic, subtopic.get("name", ""), "not_started")
-                    )
-            
-            return json.dumps({
-                "success": True,
-                "plan": plan
-            })
-        except:
-            return json.dumps({
+        if not isinstance(plan, dict):
+            return {
                 "success": True,
-                "plan_text": response
-            })
+                "plan_text": output["text"]
+            }
+        
+        # Store subtopics in database
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            for subtopic in plan.get("subtopics", []):
+                cursor.execute(
+                    """INSERT INTO learning_progress (topic, subtopic, status)
+                       VALUES (?, ?, ?)""",
+                    (topic, subtopic.get("name", "") if isinstance(subtopic, dict) else str(subtopic), "not_started")
+                )
+        
+        return {
+            "success": True,
+            "plan": plan
+        }
     
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def update_learning_progress(topic: str, subtopic: str, progress: int, notes: str = "") -> str:
+def update_learning_progress(topic: str, subtopic: str, progress: int, notes: str = "") -> Dict[str, Any]:
     """Update learning progress for a topic.
     
     Args:
@@ -85,7 +83,7 @@ def update_learning_progress(topic: str, subtopic: str, progress: int, notes: st
         notes: Progress notes (optional)
     
     Returns:
-        JSON string with result
+        Dict with result
     """
     try:
         with db.get_connection() as conn:
@@ -109,7 +107,7 @@ def update_learning_progress(topic: str, subtopic: str, progress: int, notes: st
             )
             
             if cursor.rowcount == 0:
-                return json.dumps({"success": False, "error": "Topic/subtopic not found"})
+                return {"success": False, "error": "Topic/subtopic not found"}
             
             # Store in vector memory if notes provided
             if notes:
@@ -121,23 +119,23 @@ def update_learning_progress(topic: str, subtopic: str, progress: int, notes: st
                     "progress": progress
                 })
             
-            return json.dumps({
+            return {
                 "success": True,
                 "message": f"Progress updated: {topic} - {subtopic} ({progress}%)"
-            })
+            }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def get_learning_progress(topic: str = "") -> str:
+def get_learning_progress(topic: str = "") -> Dict[str, Any]:
     """Get learning progress, optionally filtered by topic.
     
     Args:
         topic: Filter by topic (optional)
     
     Returns:
-        JSON string with learning progress
+        Dict with learning progress
     """
     try:
         with db.get_connection() as conn:
@@ -153,13 +151,13 @@ def get_learning_progress(topic: str = "") -> str:
             
             progress = [dict(row) for row in cursor.fetchall()]
             
-            return json.dumps({
+            return {
                 "success": True,
                 "count": len(progress),
                 "progress": progress
-            })
+            }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 # Export all tools
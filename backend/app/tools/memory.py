@@ -1,7 +1,7 @@
 """Memory Tool"""
 
-import json
 from datetime import datetime
+from typing import Any, Dict
 from langchain.tools import tool
 
 from app.core.database import db
@@ -9,7 +9,7 @@ from app.core.vector_store import vector_store
 
 
 @tool
-def store_preference(key: str, value: str) -> str:
+def store_preference(key: str, value: str) -> Dict[str, Any]:
     """Store a user preference.
     
     Args:
@@ -17,7 +17,7 @@ def store_preference(key: str, value: str) -> str:
         value: Preference value (required)
     
     Returns:
-        JSON string with result
+        Dict with result
     """
     try:
         with db.get_connection() as conn:
@@ -29,23 +29,23 @@ def store_preference(key: str, value: str) -> str:
                 (key, value, value)
             )
             
-            return json.dumps({
+            return {
                 "success": True,
                 "message": f"Preference '{key}' stored successfully"
-            })
+            }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def get_preference(key: str) -> str:
+def get_preference(key: str) -> Dict[str, Any]:
     """Get a user preference by key.
     
     Args:
         key: Preference key (required)
     
     Returns:
-        JSON string with preference value
+        Dict with preference value
     """
     try:
         with db.get_connection() as conn:
@@ -54,26 +54,26 @@ def get_preference(key: str) -> str:
             row = cursor.fetchone()
             
             if row:
-                return json.dumps({
+                return {
                     "success": True,
                     "key": key,
                     "value": row[0]
-                })
+                }
             else:
-                return json.dumps({
+                return {
                     "success": False,
                     "error": f"Preference '{key}' not found"
-                })
+                }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def get_all_preferences() -> str:
+def get_all_preferences() -> Dict[str, Any]:
     """Get all user preferences.
     
     Returns:
-        JSON string with all preferences
+        Dict with all preferences
     """
     try:
         with db.get_connection() as conn:
@@ -81,17 +81,17 @@ def get_all_preferences() -> str:
             cursor.execute("SELECT key, value FROM preferences")
             prefs = {row[0]: row[1] for row in cursor.fetchall()}
             
-            return json.dumps({
+            return {
                 "success": True,
                 "count": len(prefs),
                 "preferences": prefs
-            })
+            }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def search_memory(query: str, limit: int = 5) -> str:
+def search_memory(query: str, limit: int = 5) -> Dict[str, Any]:
     """Search across all memory (notes, learning, conversations).
     
     Args:
@@ -99,24 +99,24 @@ def search_memory(query: str, limit: int = 5) -> str:
         limit: Maximum results per type (default: 5)
     
     Returns:
-        JSON string with search results
+        Dict with search results
     """
     try:
         results = vector_store.search_all(query, n_results=limit)
         
         total_count = sum(len(v) for v in results.values())
         
-        return json.dumps({
+        return {
             "success": True,
             "total_count": total_count,
             "results": results
-        })
+        }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def store_conversation(user_input: str, agent_response: str, intent: str = "") -> str:
+def store_conversation(user_input: str, agent_response: str, intent: str = "") -> Dict[str, Any]:
     """Store an important conversation in memory.
     
     Args:
@@ -125,7 +125,7 @@ def store_conversation(user_input: str, agent_response: str, intent: str = "") -
         intent: Detected intent (optional)
     
     Returns:
-        JSON string with result
+        Dict with result
     """
     try:
         # Store in SQLite
@@ -142,12 +142,12 @@ def store_conversation(user_input: str, agent_response: str, intent: str = "") -
         content = f"User: {user_input}\nAssistant: {agent_response}"
         vector_store.add_conversation(conv_id, content, {"intent": intent})
         
-        return json.dumps({
+        return {
             "success": True,
             "message": "Conversation stored in memory"
-        })
+        }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 # Export all tools
@@ -1,15 +1,14 @@
 """Notes Tool"""
 
-import json
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 from langchain.tools import tool
 
 from app.core.vector_store import vector_store
 
 
 @tool
-def save_note(content: str, tags: str = "") -> str:
+def save_note(content: str, tags: str = "") -> Dict[str, Any]:
     """Save a note to memory.
     
     Args:
@@ -17,7 +16,7 @@ def save_note(content: str, tags: str = "") -> str:
         tags: Comma-separated tags (optional)
     
     Returns:
-        JSON string with result
+        Dict with result
     """
     try:
         note_id = f"note_{datetime.now().timestamp()}"
@@ -29,17 +28,17 @@ def save_note(content: str, tags: str = "") -> str:
         
         vector_store.add_note(note_id, content, metadata)
         
-        return json.dumps({
+        return {
             "success": True,
             "note_id": note_id,
             "message": "Note saved successfully"
-        })
+        }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def search_notes(query: str, limit: int = 5) -> str:
+def search_notes(query: str, limit: int = 5) -> Dict[str, Any]:
     """Search for notes by content.
     
     Args:
@@ -47,39 +46,39 @@ def search_notes(query: str, limit: int = 5) -> str:
         limit: Maximum number of results (default: 5)
     
     Returns:
-        JSON string with search results
+        Dict with search results
     """
     try:
         results = vector_store.search_notes(query, n_results=limit)
         
-        return json.dumps({
+        return {
             "success": True,
             "count": len(results),
             "notes": results
-        })
+        }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def delete_note(note_id: str) -> str:
+def delete_note(note_id: str) -> Dict[str, Any]:
     """Delete a note by ID.
     
     Args:
         note_id: Note ID to delete (required)
     
     Returns:
-        JSON string with result
+        Dict with result
     """
     try:
         vector_store.delete_note(note_id)
         
-        return json.dumps({
+        return {
             "success": True,
             "message": f"Note {note_id} deleted successfully"
-        })
+        }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 # Export all tools
@@ -1,16 +1,16 @@
 """Planner Tool"""
 
-import json
 from datetime import datetime, timedelta
 from typing import Dict, Any
 from langchain.tools import tool
 
 from app.core.database import db
 from app.services.ai_service import ai_service
+from app.services.prompt_budget import PromptBuilder, budget_for
 
 
 @tool
-async def create_daily_plan(focus_areas: str, available_hours: str = "8") -> str:
+async def create_daily_plan(focus_areas: str, available_hours: str = "8") -> Dict[str, Any]:
     """Create a daily plan based on tasks and focus areas.
     
     Args:
@@ -18,7 +18,7 @@ async def create_daily_plan(focus_areas: str, available_hours: str = "8") -> str
         available_hours: Hours available today (default: 8)
     
     Returns:
-        JSON string with daily plan
+        Dict with daily plan
     """
     try:
         # Get pending tasks
@@ -38,19 +38,15 @@ async def create_daily_plan(focus_areas: str, available_hours: str = "8") -> str
             )
             tasks = [dict(row) for row in cursor.fetchall()]
         
-        # Generate plan using AI
-        tasks_text = "\n".join([
-            f"- [{t['priority']}] {t['title']}" + (f" (due: {t['due_date']})" if t['due_date'] else "")
-            for t in tasks
-        ])
-        
-        prompt = f"""Create a daily plan for today.
+        # Generate plan using AI; tasks come most urgent first, so the budget
+        # drops the least urgent ones if the list is long
+        prompt_template = """Create a daily plan for today.
 
 Available time: {available_hours} hours
 Focus areas: {focus_areas}
 
 Current pending tasks:
-{tasks_text if tasks else "No pending tasks"}
+{tasks_text}
 
 Generate a structured daily plan with time blocks. Be realistic about time estimates.
 Format as JSON:
@@ -62,31 +58,41 @@ Format as JSON:
     "summary": "Brief summary of the day"
 }}"""
         
-        response = await ai_service.generate_response(prompt)
+        builder = PromptBuilder(budget_for("planning", "planning")).reserve(prompt_template, focus_areas)
+        builder.add("tasks", [
+            f"- [{t['priority']}] {t['title']}" + (f" (due: {t['due_date']})" if t['due_date'] else "")
+            for t in tasks
+        ], priority=10, max_item_tokens=60)
+        tasks_text = "\n".join(builder.build()["tasks"])
+        
+        prompt = prompt_template.format(
+            available_hours=available_hours,
+            focus_areas=focus_areas,
+            tasks_text=tasks_text or "No pending tasks"
+        )
+        output = await ai_service.generate_structured(prompt, stream_keys=("plan",))
+        plan_data = output["data"]
         
-        # Try to parse JSON, fallback to text
-        try:
-            plan_data = json.loads(response)
-            return json.dumps({
+        if isinstance(plan_data, dict):
+            return {
                 "success": True,
                 "plan": plan_data.get("plan", []),
                 "summary": plan_data.get("summary", ""),
                 "focus_areas": focus_areas,
                 "available_hours": available_hours
-            })
-        except:
-            return json.dumps({
-                "success": True,
-                "plan_text": response,
-                "focus_areas": focus_areas
-            })
+            }
+        return {
+            "success": True,
+            "plan_text": output["text"],
+            "focus_areas": focus_areas
+        }
     
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def set_goal(title: str, description: str, category: str = "personal", target_date: str = "") -> str:
+def set_goal(title: str, description: str, category: str = "personal", target_date: str = "") -> Dict[str, Any]:
     """Set a new goal.
     
     Args:
@@ -96,7 +102,7 @@ def set_goal(title: str, description: str, category: str = "personal", target_da
         target_date: Target completion date YYYY-MM-DD (optional)
     
     Returns:
-        JSON string with result
+        Dict with result
     """
     try:
         with db.get_connection() as conn:
@@ -108,24 +114,24 @@ def set_goal(title: str, description: str, category: str = "personal", target_da
             )
             goal_id = cursor.lastrowid
             
-            return json.dumps({
+            return {
                 "success": True,
                 "goal_id": goal_id,
                 "message": f"Goal '{title}' created successfully"
-            })
+            }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def get_goals(status: str = "active") -> str:
+def get_goals(status: str = "active") -> Dict[str, Any]:
     """Get goals by status.
     
     Args:
         status: Filter by status - active, completed, abandoned (default: active)
     
     Returns:
-        JSON string with list of goals
+        Dict with list of goals
     """
     try:
         with db.get_connection() as conn:
@@ -136,13 +142,13 @@ def get_goals(status: str = "active") -> str:
             )
             goals = [dict(row) for row in cursor.fetchall()]
             
-            return json.dumps({
+            return {
                 "success": True,
                 "count": len(goals),
                 "goals": goals
-            })
+            }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 # Export all tools
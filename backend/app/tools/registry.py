@@ -0,0 +1,121 @@
+"""Tool registry with precomputed JSON schemas"""
+
+import inspect
+import re
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+from app.tools.task_manager import task_tools
+from app.tools.planner import planner_tools
+from app.tools.notes import notes_tools
+from app.tools.learning_tracker import learning_tools
+from app.tools.memory import memory_tools
+
+
+# Tool groups and the intent each one serves
+TOOL_GROUPS = {
+    "planning": task_tools + planner_tools,
+    "learning": learning_tools,
+    "remembering": notes_tools + memory_tools,
+}
+
+# Tools the agent calls itself and the model should not see
+INTERNAL_TOOLS = {"store_conversation"}
+
+# Tools that write; a timeout would only abandon the await while the
+# write goes on in its thread, so they run to completion
+WRITE_TOOLS = {
+    "create_task", "update_task_status", "set_goal", "update_learning_progress",
+    "store_preference", "save_note", "delete_note", "store_conversation",
+}
+
+ARG_LINE = re.compile(r"^\s*(\w+):\s*(.+)$")
+
+
+def _parse_docstring(docstring: str) -> Dict[str, Any]:
+    """Split a tool docstring into its summary and per-argument descriptions"""
+    lines = inspect.cleandoc(docstring or "").splitlines()
+    summary = []
+    args = {}
+    section = "summary"
+    for line in lines:
+        stripped = line.strip()
+        if stripped in ("Args:", "Returns:"):
+            section = stripped[:-1].lower()
+            continue
+        if section == "summary" and stripped:
+            summary.append(stripped)
+        elif section == "args":
+            match = ARG_LINE.match(line)
+            if match:
+                args[match.group(1)] = match.group(2).strip()
+    return {"summary": " ".join(summary), "args": args}
+
+
+def build_tool_schema(tool) -> Dict[str, Any]:
+    """Ollama/OpenAI function schema for a LangChain tool
+    
+    Built from the tool's pydantic args schema, with argument descriptions
+    taken from the ``Args:`` section of its docstring.
+    """
+    fn = getattr(tool, "coroutine", None) or getattr(tool, "func", None)
+    doc = _parse_docstring(fn.__doc__ if fn else tool.description)
+    schema = tool.args_schema.schema() if tool.args_schema else {}
+    
+    properties = {}
+    for name, prop in schema.get("properties", {}).items():
+        prop = {key: value for key, value in prop.items() if key != "title"}
+        if name in doc["args"]:
+            prop["description"] = doc["args"][name]
+        properties[name] = prop
+    
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": doc["summary"] or tool.description,
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": schema.get("required", []),
+            },
+        },
+    }
+
+
+class ToolRegistry:
+    """Registered tools by name, with their schemas built once at startup"""
+    
+    def __init__(self, groups: Dict[str, List]):
+        self.tools = {}
+        self.intents = {}
+        for intent, tools in groups.items():
+            for tool in tools:
+                self.tools[tool.name] = tool
+                self.intents[tool.name] = intent
+        
+        self.exported = [name for name in self.tools if name not in INTERNAL_TOOLS]
+        self.schemas = [build_tool_schema(self.tools[name]) for name in self.exported]
+    
+    def get(self, name: str):
+        """Get a tool by name (KeyError if unknown)"""
+        return self.tools[name]
+    
+    def is_exported(self, name: str) -> bool:
+        """Whether the model may call a tool (it is in ``schemas``)"""
+        return name in self.tools and name not in INTERNAL_TOOLS
+    
+    def timeout_for(self, name: str) -> Optional[float]:
+        """Seconds a call may take: the configured override, else the default
+        (None for write tools, which always run to completion)"""
+        if name in settings.tool_timeouts:
+            return settings.tool_timeouts[name]
+        return None if name in WRITE_TOOLS else settings.tool_timeout
+    
+    def intent_of(self, name: str) -> Optional[str]:
+        """Intent served by a tool"""
+        return self.intents.get(name)
+
+
+# Global tool registry
+tool_registry = ToolRegistry(TOOL_GROUPS)
@@ -1,6 +1,5 @@
 """Task Manager Tool"""
 
-import json
 from datetime import datetime
 from typing import Dict, Any, List
 from langchain.tools import tool
@@ -9,7 +8,7 @@ from app.core.database import db
 
 
 @tool
-def create_task(title: str, description: str = "", priority: str = "medium", due_date: str = "") -> str:
+def create_task(title: str, description: str = "", priority: str = "medium", due_date: str = "") -> Dict[str, Any]:
     """Create a new task.
     
     Args:
@@ -19,7 +18,7 @@ def create_task(title: str, description: str = "", priority: str = "medium", due
         due_date: Due date in YYYY-MM-DD format (optional)
     
     Returns:
-        JSON string with task details or error message
+        Dict with task details or error message
     """
     try:
         with db.get_connection() as conn:
@@ -31,17 +30,17 @@ def create_task(title: str, description: str = "", priority: str = "medium", due
             )
             task_id = cursor.lastrowid
             
-            return json.dumps({
+            return {
                 "success": True,
                 "task_id": task_id,
                 "message": f"Task '{title}' created successfully"
-            })
+            }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def update_task_status(task_id: int, status: str) -> str:
+def update_task_status(task_id: int, status: str) -> Dict[str, Any]:
     """Update task status.
     
     Args:
@@ -49,7 +48,7 @@ def update_task_status(task_id: int, status: str) -> str:
         status: New status - pending, in_progress, completed, or cancelled
     
     Returns:
-        JSON string with result
+        Dict with result
     """
     try:
         with db.get_connection() as conn:
@@ -66,25 +65,25 @@ def update_task_status(task_id: int, status: str) -> str:
             )
             
             if cursor.rowcount == 0:
-                return json.dumps({"success": False, "error": f"Task {task_id} not found"})
+                return {"success": False, "error": f"Task {task_id} not found"}
             
-            return json.dumps({
+            return {
                 "success": True,
                 "message": f"Task {task_id} status updated to {status}"
-            })
+            }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def get_tasks(status: str = "") -> str:
+def get_tasks(status: str = "") -> Dict[str, Any]:
     """Get tasks, optionally filtered by status.
     
     Args:
         status: Filter by status - pending, in_progress, completed, cancelled (optional)
     
     Returns:
-        JSON string with list of tasks
+        Dict with list of tasks
     """
     try:
         with db.get_connection() as conn:
@@ -100,21 +99,21 @@ def get_tasks(status: str = "") -> str:
             
             tasks = [dict(row) for row in cursor.fetchall()]
             
-            return json.dumps({
+            return {
                 "success": True,
                 "count": len(tasks),
                 "tasks": tasks
-            })
+            }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 @tool
-def get_pending_tasks() -> str:
+def get_pending_tasks() -> Dict[str, Any]:
     """Get all pending and in-progress tasks.
     
     Returns:
-        JSON string with list of active tasks
+        Dict with list of active tasks
     """
     try:
         with db.get_connection() as conn:
@@ -133,13 +132,13 @@ def get_pending_tasks() -> str:
             
             tasks = [dict(row) for row in cursor.fetchall()]
             
-            return json.dumps({
+            return {
                 "success": True,
                 "count": len(tasks),
                 "tasks": tasks
-            })
+            }
     except Exception as e:
-        return json.dumps({"success": False, "error": str(e)})
+        return {"success": False, "error": str(e)}
 
 
 # Export all tools
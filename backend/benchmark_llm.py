@@ -0,0 +1,168 @@
+"""
+LLM Path Benchmark
+Compare the two-call chat path (detect_intent + generate_response) with the
+single-round-trip combined mode (one structured call for intent + answer).
+With --overhead, compare the native Ollama client with LangChain's ChatOllama
+instead: import time and per-call overhead on one-token generations.
+
+Usage:
+    poetry run python benchmark_llm.py [--runs 3] [--overhead]
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.config import settings
+from app.services.ai_service import ai_service
+from app.agent.nodes import SYSTEM_PROMPT, build_user_prompt
+
+SAMPLE_PROMPTS = [
+    "Plan my day, I have 4 hours for deep work and two meetings",
+    "I want to learn Rust, where should I start?",
+    "Remember that my dentist appointment is on Friday at 3pm",
+    "Make this sound more polite: send me the report now",
+    "Should I take the job offer in Berlin or stay in my current role?",
+    "How are you doing today?",
+]
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(int(p * len(values)), len(values) - 1)]
+
+
+async def two_call(prompt: str):
+    intent = await ai_service.detect_intent(prompt)
+    response = await ai_service.generate_response(build_user_prompt(prompt, [], intent), SYSTEM_PROMPT)
+    return intent, response
+
+
+async def combined(prompt: str):
+    result = await ai_service.respond_with_intent(prompt, SYSTEM_PROMPT)
+    return result["intent"], result["response"]
+
+
+async def run_path(name: str, fn, runs: int):
+    latencies = []
+    intents = {}
+    for _ in range(runs):
+        for prompt in SAMPLE_PROMPTS:
+            start = time.perf_counter()
+            intent, _ = await fn(prompt)
+            latencies.append(time.perf_counter() - start)
+            intents[prompt] = intent
+    return {
+        "name": name,
+        "mean": sum(latencies) / len(latencies),
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "intents": intents,
+    }
+
+
+def import_time(statement: str) -> float:
+    """Seconds an import statement adds on top of app.core, in a fresh interpreter"""
+    code = f"import time, app.core; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=Path(__file__).parent, capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+async def native_call(prompt: str):
+    from app.core.ollama_client import ollama_client
+    await ollama_client.chat(
+        settings.ollama_model, [{"role": "user", "content": prompt}], options={"num_predict": 1}
+    )
+
+
+def langchain_call():
+    from langchain.schema import HumanMessage
+    from langchain_community.chat_models import ChatOllama
+    model = ChatOllama(base_url=settings.ollama_base_url, model=settings.ollama_model, num_predict=1)
+    
+    async def call(prompt: str):
+        await model.agenerate([[HumanMessage(content=prompt)]])
+    return call
+
+
+async def run_overhead(runs: int):
+    print("=" * 80)
+    print(" " * 22 + "ab360 Ollama Client Overhead Benchmark")
+    print("=" * 80)
+    print(f"Model: {settings.ollama_model}, one-token calls: {runs * len(SAMPLE_PROMPTS)}\n")
+    
+    imports = {
+        "native": import_time("import app.core.ollama_client"),
+        "langchain": import_time("from langchain_community.chat_models import ChatOllama"),
+    }
+    
+    clients = {"native": native_call, "langchain": langchain_call()}
+    print(f"{'client':<10} {'import s':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    print("-" * 80)
+    results = {}
+    for name, call in clients.items():
+        await call("warm up")
+        latencies = []
+        for _ in range(runs):
+            for prompt in SAMPLE_PROMPTS:
+                start = time.perf_counter()
+                await call(prompt)
+                latencies.append(time.perf_counter() - start)
+        results[name] = sum(latencies) / len(latencies)
+        print(
+            f"{name:<10} {imports[name]:>9.2f} {results[name] * 1000:>9.1f} "
+            f"{percentile(latencies, 0.50) * 1000:>9.1f} {percentile(latencies, 0.95) * 1000:>9.1f}"
+        )
+    
+    print(f"\nPer-call overhead saved by the native client: {(results['langchain'] - results['native']) * 1000:.1f} ms")
+    print("=" * 80)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark ab360 LLM call paths")
+    parser.add_argument("--runs", type=int, default=3, help="Passes over the sample prompts")
+    parser.add_argument("--overhead", action="store_true", help="Compare the native client with ChatOllama")
+    args = parser.parse_args()
+    
+    if not ai_service.available:
+        print("❌ Ollama is not available, nothing to benchmark")
+        return
+    
+    if args.overhead:
+        await run_overhead(args.runs)
+        return
+    
+    print("=" * 80)
+    print(" " * 25 + "ab360 LLM Path Benchmark")
+    print("=" * 80)
+    print(f"Model: {settings.ollama_model}, prompts: {len(SAMPLE_PROMPTS)}, runs: {args.runs}\n")
+    
+    results = [
+        await run_path("two-call", two_call, args.runs),
+        await run_path("combined", combined, args.runs),
+    ]
+    round_trips = {"two-call": 2, "combined": 1}
+    
+    print(f"{'path':<10} {'LLM calls':>10} {'mean s':>8} {'p50 s':>8} {'p95 s':>8}")
+    print("-" * 80)
+    for r in results:
+        print(f"{r['name']:<10} {round_trips[r['name']]:>10} {r['mean']:>8.2f} {r['p50']:>8.2f} {r['p95']:>8.2f}")
+    
+    agreement = sum(
+        results[0]["intents"][p] == results[1]["intents"][p] for p in SAMPLE_PROMPTS
+    ) / len(SAMPLE_PROMPTS)
+    speedup = results[0]["mean"] / results[1]["mean"] if results[1]["mean"] else 0
+    print(f"\nIntent agreement: {agreement:.0%}")
+    print(f"Combined mode speedup: {speedup:.2f}x")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
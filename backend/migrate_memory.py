@@ -0,0 +1,45 @@
+"""
+Memory Migration
+Copy the per-type ChromaDB collections (notes, learning, conversations)
+into the single unified memory collection.
+
+Usage:
+    poetry run python migrate_memory.py [--drop-legacy]
+
+Then set MEMORY_LAYOUT=unified in .env.
+"""
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.config import settings
+from app.core.vector_store import vector_store
+
+def main():
+    drop_legacy = "--drop-legacy" in sys.argv
+    
+    print("=" * 80)
+    print(" " * 25 + "ab360 Memory Migration")
+    print("=" * 80)
+    print(f"\nTarget collection: {settings.memory_collection}")
+    
+    copied = vector_store.migrate_to_unified(drop_legacy=drop_legacy)
+    
+    for memory_type, count in copied.items():
+        print(f"  • {memory_type}: {count} memories copied")
+    print(f"\nTotal: {sum(copied.values())} memories")
+    
+    if drop_legacy:
+        print("Legacy collections dropped")
+    
+    if settings.memory_layout != "unified":
+        print("\nSet MEMORY_LAYOUT=unified in .env to start using the unified collection.")
+    
+    print("=" * 80)
+    print("✅ Migration complete!")
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Test setup: point the app at throwaway storage and an unreachable Ollama"""
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+# Must run before any ``app`` import: settings are read at import time
+_data_dir = tempfile.mkdtemp(prefix="ab360-tests-")
+os.environ.setdefault("DATABASE_PATH", os.path.join(_data_dir, "ab360.db"))
+os.environ.setdefault("VECTOR_STORE_PATH", os.path.join(_data_dir, "chromadb"))
+os.environ.setdefault("OLLAMA_BASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("TRACE_EXPORT_PATH", "")
+
+
+class FakeTool:
+    """Stands in for a langchain tool: ``ainvoke`` awaits a plain async function"""
+    
+    def __init__(self, run):
+        self.run = run
+    
+    async def ainvoke(self, params):
+        return await self.run(params)
+
+
+@pytest.fixture
+def plan_job(monkeypatch):
+    """Run a daily_plan job against a fake planner tool and return the finished job
+    
+    ``await plan_job(tool)``: ``tool`` is an async function of the job params
+    that replaces ``create_daily_plan``.
+    """
+    from app.services.jobs import job_manager
+    
+    async def run(tool, params=None):
+        monkeypatch.setattr("app.tools.planner.create_daily_plan", FakeTool(tool))
+        job = job_manager.submit("daily_plan", params or {"focus_areas": "writing"})
+        await job_manager._tasks[job["id"]]
+        return job_manager.get(job["id"])
+    
+    return run
@@ -0,0 +1,98 @@
+"""Chat turns queued for admission can be superseded or dropped by their client"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.routes import chat
+from app.services.admission import AdmissionController
+from app.services.turns import TurnCancelled, SUPERSEDED, DISCONNECTED
+
+
+class FakeGraph:
+    """Agent graph whose turns finish only when released"""
+    
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.states = []
+    
+    async def ainvoke(self, state):
+        self.states.append(state)
+        await self.release.wait()
+        return {"final_response": f"answer to {state['user_input']}"}
+
+
+class GoneRequest:
+    async def is_disconnected(self):
+        return True
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    monkeypatch.setattr(settings, "chat_max_in_flight", 1)
+    monkeypatch.setattr(settings, "disconnect_poll_seconds", 0.01)
+    controller = AdmissionController()
+    monkeypatch.setattr(chat, "admission_controller", controller)
+    return controller
+
+
+def test_newer_message_supersedes_a_queued_turn(admission, monkeypatch):
+    async def scenario():
+        graph = FakeGraph()
+        monkeypatch.setattr(chat, "agent_graph", graph)
+        busy = asyncio.create_task(chat.run_chat_turn("hold the slot", "busy"))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(chat.run_chat_turn("first", "s1"))
+        await asyncio.sleep(0.01)
+        newer = asyncio.create_task(chat.run_chat_turn("second", "s1"))
+        await asyncio.sleep(0.01)
+        
+        with pytest.raises(TurnCancelled) as cancelled:
+            await queued
+        assert cancelled.value.reason == SUPERSEDED
+        assert len(admission._waiters) == 1
+        
+        graph.release.set()
+        await busy
+        response = await newer
+        assert response.response == "answer to second"
+        assert [state["user_input"] for state in graph.states] == ["hold the slot", "second"]
+        assert admission.in_flight == 0
+    
+    asyncio.run(scenario())
+
+
+def test_disconnect_cancels_a_queued_turn(admission, monkeypatch):
+    async def scenario():
+        graph = FakeGraph()
+        monkeypatch.setattr(chat, "agent_graph", graph)
+        busy = asyncio.create_task(chat.run_chat_turn("hold the slot", "busy"))
+        await asyncio.sleep(0.01)
+        
+        with pytest.raises(TurnCancelled) as cancelled:
+            await chat.run_chat_turn("hello", "s2", http_request=GoneRequest())
+        assert cancelled.value.reason == DISCONNECTED
+        assert not admission._waiters
+        
+        graph.release.set()
+        await busy
+    
+    asyncio.run(scenario())
+
+
+def test_deadline_starts_at_admission(admission, monkeypatch):
+    async def scenario():
+        graph = FakeGraph()
+        monkeypatch.setattr(chat, "agent_graph", graph)
+        busy = asyncio.create_task(chat.run_chat_turn("hold the slot", "busy"))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(chat.run_chat_turn("later", "s3"))
+        await asyncio.sleep(0.2)
+        admitted_at = time.monotonic()
+        graph.release.set()
+        await asyncio.gather(busy, queued)
+        assert graph.states[1]["deadline"] >= admitted_at + settings.response_slo_seconds - 0.05
+    
+    asyncio.run(scenario())
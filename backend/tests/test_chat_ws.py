@@ -0,0 +1,89 @@
+"""WebSocket chat channel: bad frames, superseded turns, slow clients, broken sends"""
+
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.models import ChatResponse
+from app.routes import chat_ws
+from app.routes.chat_ws import ChatSocket
+
+
+def fake_turns(monkeypatch, calls):
+    async def run_chat_turn(message, session_id=None, http_request=None, on_event=None):
+        calls.append(message)
+        return ChatResponse(response=f"answer to {message}", session_id=session_id)
+    
+    monkeypatch.setattr(chat_ws, "run_chat_turn", run_chat_turn)
+
+
+def make_client(monkeypatch, calls):
+    fake_turns(monkeypatch, calls)
+    app = FastAPI()
+    app.include_router(chat_ws.router)
+    return TestClient(app)
+
+
+def test_non_json_frame_gets_an_error_and_the_socket_stays_open(monkeypatch):
+    calls = []
+    with make_client(monkeypatch, calls).websocket_connect("/api/ws") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json() == {"type": "error", "status": 422, "detail": "Messages must be JSON objects"}
+        ws.send_text("[1, 2]")
+        assert ws.receive_json()["status"] == 422
+        
+        ws.send_json({"type": "chat", "session_id": "s1", "message": "hi"})
+        done = ws.receive_json()
+        assert done["type"] == "done" and done["response"] == "answer to hi"
+
+
+def test_second_message_cancels_a_turn_that_has_not_started(monkeypatch):
+    calls = []
+    fake_turns(monkeypatch, calls)
+    socket = ChatSocket(websocket=None)
+    
+    async def scenario():
+        socket.handle({"type": "chat", "session_id": "s1", "message": "first"})
+        first = socket.turns["s1"]
+        socket.handle({"type": "chat", "session_id": "s1", "message": "second"})
+        await asyncio.sleep(0.01)
+        return first
+    
+    first = asyncio.run(scenario())
+    assert first.cancelled()
+    assert calls == ["second"]
+    events = [socket.outbox.get_nowait() for _ in range(socket.outbox.qsize())]
+    assert events[0] == {"type": "cancelled", "session_id": "s1", "reason": "superseded"}
+    assert events[1]["type"] == "done" and events[1]["response"] == "answer to second"
+
+
+def test_token_events_are_dropped_for_a_slow_client(monkeypatch):
+    monkeypatch.setattr(settings, "ws_max_queued_events", 3)
+    socket = ChatSocket(websocket=None)
+    for i in range(5):
+        socket.send({"type": "token", "content": str(i)})
+    socket.send({"type": "done", "response": "01234"})
+    events = [socket.outbox.get_nowait() for _ in range(socket.outbox.qsize())]
+    assert [event["type"] for event in events] == ["token", "token", "token", "done"]
+
+
+def test_send_failure_ends_the_connection():
+    class BrokenWebSocket:
+        closed_with = None
+        
+        async def receive(self):
+            await asyncio.sleep(3600)
+        
+        async def send_text(self, text):
+            raise RuntimeError("connection reset")
+        
+        async def close(self, code=1000):
+            self.closed_with = code
+    
+    websocket = BrokenWebSocket()
+    socket = ChatSocket(websocket)
+    socket.send({"type": "error", "status": 422, "detail": "x"})
+    asyncio.run(asyncio.wait_for(socket.serve(), 1))
+    assert websocket.closed_with == 1011
@@ -0,0 +1,49 @@
+"""Short lookups answered from SQLite: what takes the fast path and what does not"""
+
+import pytest
+
+from app.agent.executor import ACTION_TOOLS, match_data_query
+
+
+@pytest.mark.parametrize("text, tool_name", [
+    ("What are my tasks?", "get_pending_tasks"),
+    ("Any pending tasks?", "get_pending_tasks"),
+    ("what's pending?", "get_pending_tasks"),
+    ("What is still open?", "get_pending_tasks"),
+    ("what tasks do I have?", "get_pending_tasks"),
+    ("Which tasks are left?", "get_pending_tasks"),
+    ("show me my open tasks", "get_pending_tasks"),
+    ("what are my tasks right now", "get_pending_tasks"),
+    ("What's on my to-do list?", "get_pending_tasks"),
+    ("How is my learning progress?", "get_learning_progress"),
+    ("What are my goals", "get_goals"),
+    ("list active goals", "get_goals"),
+    ("Show me my preferences", "get_all_preferences"),
+])
+def test_lookup_of_own_data_matches(text, tool_name):
+    match = match_data_query(text)
+    assert match is not None
+    assert match[1] == tool_name
+
+
+@pytest.mark.parametrize("text", [
+    "What is a task queue in Celery?",
+    "What are good goals for a junior dev?",
+    "Any ideas for to do today?",
+    "What is my opinion on task queues?",
+    "What are my tasks for tomorrow?",
+    "Any pending tasks this week?",
+    "show me my open tasks for today",
+    "What's pending in the PR queue?",
+    "What are my goals for next year?",
+    "What is learning progress tracking?",
+    "What are preferences in macOS?",
+    "Show me my tasks and help me prioritize them",
+    "Can you plan my tasks for today?",
+])
+def test_general_questions_go_to_the_llm(text):
+    assert match_data_query(text) is None
+
+
+def test_memory_actions_are_not_mapped_to_a_preferences_dump():
+    assert "search_memory_or_store_info" not in ACTION_TOOLS
@@ -0,0 +1,131 @@
+"""Turn deadline: retrieval and generation shrink to fit the time left"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.agent import deadline, executor
+from app.core.config import settings
+from app.core.metrics import Metrics
+from app.services.ai_service import ai_service
+
+
+@pytest.fixture
+def timings(monkeypatch):
+    """Fresh metrics, so expected latencies come only from the test"""
+    fresh = Metrics()
+    monkeypatch.setattr(deadline, "metrics", fresh)
+    return fresh
+
+
+def late(seconds: float):
+    """State whose deadline is ``seconds`` away"""
+    return {"deadline": time.monotonic() + seconds}
+
+
+def test_new_deadline_is_one_slo_away():
+    assert deadline.new_deadline() - time.monotonic() == pytest.approx(settings.response_slo_seconds, abs=0.5)
+
+
+def test_remaining_is_infinite_without_a_deadline_or_when_disabled(monkeypatch):
+    assert deadline.remaining({}) == float("inf")
+    monkeypatch.setattr(settings, "deadline_degradation", False)
+    assert deadline.remaining(late(1.0)) == float("inf")
+
+
+def test_retrieval_shrinks_then_skips_as_time_runs_out(timings):
+    timings.observe("llm.chat", 2.0)
+    timings.observe("node.retrieve_memory", 1.0)
+    
+    assert deadline.retrieval_step(late(10.0)) is None
+    assert deadline.retrieval_step(late(3.5)) == deadline.SHRINK_RETRIEVAL
+    assert deadline.retrieval_step(late(2.5)) == deadline.SKIP_RETRIEVAL
+
+
+def test_retrieval_is_untouched_before_it_has_been_timed(timings):
+    assert deadline.retrieval_step(late(0.1)) is None
+
+
+def test_generation_is_uncapped_with_enough_time(timings):
+    timings.observe("llm.chat", 2.0)
+    assert deadline.generation_limits(late(10.0)) == {"profile": "chat", "num_predict": None, "steps": []}
+
+
+def test_generation_output_is_capped_to_the_decode_speed(timings):
+    timings.observe("llm.chat", 4.0)
+    timings.observe("llm.chat.prompt_eval", 1.0)
+    timings.increment("llm.chat.output_tokens", 100)
+    timings.increment("llm.chat.eval_seconds", 2.0)
+    
+    limits = deadline.generation_limits(late(3.0))
+    assert limits["profile"] == "chat"
+    assert limits["steps"] == [deadline.CAP_OUTPUT_TOKENS]
+    # ~2s left to decode at 50 tokens/s
+    assert 90 <= limits["num_predict"] <= 100
+
+
+def test_very_late_generation_switches_to_the_fast_profile(timings):
+    timings.observe("llm.chat", 10.0)
+    
+    limits = deadline.generation_limits(late(1.0))
+    assert limits["profile"] == "fast"
+    assert limits["steps"] == [deadline.CAP_OUTPUT_TOKENS, deadline.FAST_PROFILE]
+    assert limits["num_predict"] == settings.deadline_min_output_tokens
+    
+    pinned = deadline.generation_limits(late(1.0), allow_fast=False)
+    assert pinned["profile"] == "chat"
+    assert pinned["steps"] == [deadline.CAP_OUTPUT_TOKENS]
+
+
+def test_storage_is_deferred_when_it_would_miss_the_deadline(timings):
+    timings.observe("node.store_conversation", 0.5)
+    assert not deadline.storage_deferred(late(5.0))
+    assert deadline.storage_deferred(late(0.1))
+
+
+def test_tool_loop_stops_calling_tools_when_time_runs_out(timings, monkeypatch):
+    timings.observe("llm.tools", 5.0)
+    calls = []
+    
+    async def chat(messages, tools=None, format=None, profile="tools", num_predict=None):
+        calls.append({"tools": bool(tools), "profile": profile, "num_predict": num_predict})
+        if tools:
+            return {"role": "assistant", "content": "", "tool_calls": [{"function": {"name": "get_pending_tasks", "arguments": {}}}]}
+        return {"role": "assistant", "content": "You have no pending tasks."}
+    
+    async def run_tool(name, arguments):
+        return {"tool_name": name, "success": True, "result": {"tasks": []}}
+    
+    monkeypatch.setattr(ai_service, "chat", chat)
+    monkeypatch.setattr(executor, "run_tool", run_tool)
+    
+    result = asyncio.run(executor.run_tool_loop("What's pending?", "system", state=late(1.0)))
+    
+    # One capped tool round, then a fast final answer instead of more rounds
+    assert [call["tools"] for call in calls] == [True, False]
+    assert calls[0]["num_predict"] == settings.deadline_min_output_tokens
+    assert calls[1]["profile"] == "fast"
+    assert result["response"] == "You have no pending tasks."
+    assert len(result["tool_results"]) == 1
+    assert result["degradations"] == [deadline.CAP_OUTPUT_TOKENS, deadline.FAST_PROFILE]
+
+
+def test_tool_loop_is_unbounded_without_a_deadline(monkeypatch):
+    rounds = []
+    
+    async def chat(messages, tools=None, format=None, profile="tools", num_predict=None):
+        rounds.append(num_predict)
+        if len(rounds) < 3:
+            return {"role": "assistant", "content": "", "tool_calls": [{"function": {"name": "get_pending_tasks", "arguments": {}}}]}
+        return {"role": "assistant", "content": "Done."}
+    
+    async def run_tool(name, arguments):
+        return {"tool_name": name, "success": True, "result": {"tasks": []}}
+    
+    monkeypatch.setattr(ai_service, "chat", chat)
+    monkeypatch.setattr(executor, "run_tool", run_tool)
+    
+    result = asyncio.run(executor.run_tool_loop("What's pending?", "system"))
+    assert rounds == [None, None, None]
+    assert result["degradations"] == []
@@ -0,0 +1,14 @@
+"""Decision analysis: per-option pros and cons always come out as lists"""
+
+import asyncio
+
+from app.services.ai_service import ai_service
+
+
+def test_string_pros_and_cons_become_lists(monkeypatch):
+    async def generate_structured(prompt, system_prompt, profile=None):
+        return {"data": {"pros": "cheap", "cons": None}, "text": ""}
+    
+    monkeypatch.setattr(ai_service, "generate_structured", generate_structured)
+    details = asyncio.run(ai_service._analyze_option("Which car?", "used", ["used", "new"]))
+    assert details == {"option": "used", "pros": ["cheap"], "cons": []}
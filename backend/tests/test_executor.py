@@ -0,0 +1,34 @@
+"""Tool execution: which tools the model may call and how long they may take"""
+
+import asyncio
+
+from app.agent.executor import run_tool
+from app.core.config import settings
+from app.tools import tool_registry
+
+
+def test_internal_tools_are_not_run_for_the_model():
+    result = asyncio.run(run_tool("store_conversation", {"user_input": "hi", "agent_response": "hello"}))
+    assert result["error"] == "Unknown tool: store_conversation"
+    assert "result" not in result
+
+
+def test_unknown_tool_is_rejected():
+    result = asyncio.run(run_tool("rm_rf", {}))
+    assert result == {"tool_name": "rm_rf", "action": None, "error": "Unknown tool: rm_rf"}
+
+
+def test_exported_tools_match_the_schemas():
+    names = {schema["function"]["name"] for schema in tool_registry.schemas}
+    assert names == set(tool_registry.exported)
+    assert "store_conversation" not in names
+
+
+def test_llm_tools_get_a_generation_sized_timeout():
+    for name in ("create_daily_plan", "create_learning_plan"):
+        assert tool_registry.timeout_for(name) > settings.tool_timeout
+
+
+def test_write_tools_are_not_timed_out():
+    assert tool_registry.timeout_for("create_task") is None
+    assert tool_registry.timeout_for("get_pending_tasks") == settings.tool_timeout
@@ -0,0 +1,59 @@
+"""Background jobs: params are checked at submit, tool failures fail the job"""
+
+import asyncio
+import re
+
+import pytest
+
+from app.services import jobs
+from app.services.jobs import job_manager
+from app.services.structured_output import item_sink
+
+
+@pytest.mark.parametrize("kind, params", [
+    ("daily_plan", {}),
+    ("learning_plan", {"difficulty": "hard"}),
+    ("decision_analysis", {"question": "Which one?"}),
+    ("decision_analysis", {"options": ["a", "b"]}),
+    ("rewrite", {"tone": "casual"}),
+])
+def test_missing_params_are_rejected_at_submit(kind, params):
+    with pytest.raises(ValueError, match=f"Invalid params for job '{kind}'"):
+        job_manager.submit(kind, params)
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError, match="Unknown job kind"):
+        job_manager.submit("teleport", {})
+
+
+def test_tool_reporting_failure_fails_the_job(plan_job):
+    async def failing_tool(params):
+        return {"success": False, "error": "model unavailable"}
+    
+    job = asyncio.run(plan_job(failing_tool))
+    assert job["status"] == "failed"
+    assert job["error"] == "model unavailable"
+    assert job["params"] == {"focus_areas": "writing", "available_hours": "8"}
+
+
+def test_partials_are_appended_in_order_with_utc_timestamps(plan_job):
+    blocks = [{"time": f"{hour:02d}:00", "activity": "Write"} for hour in range(9, 14)]
+    
+    async def streaming_tool(params):
+        for block in blocks:
+            item_sink.get()("plan", block)
+        return {"success": True, "plan": blocks}
+    
+    job = asyncio.run(plan_job(streaming_tool))
+    assert job["status"] == "completed"
+    assert job["partial_results"] == blocks
+    # Same format as created_at (SQLite CURRENT_TIMESTAMP), so the three sort together
+    for column in ("created_at", "started_at", "finished_at"):
+        assert re.fullmatch(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}", job[column])
+    assert job["created_at"] <= job["started_at"] <= job["finished_at"]
+
+
+def test_successful_tool_result_is_passed_through():
+    result = {"success": True, "plan": []}
+    assert jobs._tool_result(result) is result
@@ -0,0 +1,100 @@
+"""Streamed JSON arrays: valid JSON of the documented row shape, whatever the batching"""
+
+import asyncio
+import json
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.responses import JSONArrayResponse
+from app.core.serialization import encode_array
+from app.models import Task
+from app.routes import tasks
+
+
+@pytest.mark.parametrize("batches, expected", [
+    ([], []),
+    ([[], []], []),
+    ([[1, 2], [], [3]], [1, 2, 3]),
+    ([[{"a": "ü"}], [{"b": None}]], [{"a": "ü"}, {"b": None}]),
+])
+def test_encode_array_joins_batches_into_one_array(batches, expected):
+    assert json.loads(b"".join(encode_array(batches))) == expected
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(tasks.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 500])
+def test_task_list_streams_rows_of_the_task_shape(client, monkeypatch, batch_size):
+    monkeypatch.setattr(settings, "list_batch_size", batch_size)
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM tasks")
+        for title in ("write", "read", "ship"):
+            conn.execute("INSERT INTO tasks (title, priority) VALUES (?, 'high')", (title,))
+    
+    response = client.get("/api/tasks/")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    rows = response.json()
+    assert sorted(row["title"] for row in rows) == ["read", "ship", "write"]
+    for row in rows:
+        Task(**row)
+    
+    assert client.get("/api/tasks/", params={"status": "completed"}).json() == []
+
+
+def _insert_tasks(*titles):
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM tasks")
+        for title in titles:
+            conn.execute("INSERT INTO tasks (title) VALUES (?)", (title,))
+
+
+def test_closing_row_batches_before_reading_closes_the_connection():
+    _insert_tasks("write")
+    rows = db.iter_rows("SELECT * FROM tasks")
+    conn = rows.conn
+    rows.close()
+    assert list(rows) == []
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_client_disconnect_mid_stream_closes_the_connection():
+    _insert_tasks("write", "read", "ship")
+    rows = db.iter_rows("SELECT * FROM tasks", (), batch_size=1)
+    conn = rows.conn
+    bodies = []
+    
+    async def run():
+        second_chunk = asyncio.Event()
+        
+        async def receive():
+            await second_chunk.wait()
+            return {"type": "http.disconnect"}
+        
+        async def send(message):
+            if message["type"] == "http.response.body":
+                bodies.append(message["body"])
+                if len(bodies) == 2:
+                    second_chunk.set()
+                    await asyncio.sleep(10)  # A slow client; the disconnect cancels this
+        
+        response = JSONArrayResponse(rows)
+        await response({"type": "http"}, receive, send)
+        # Checked while the response is still referenced: closing must not wait for GC
+        return rows.conn
+    
+    assert asyncio.run(run()) is None
+    assert len(bodies) == 2  # "[" and the first row; the rest was never fetched
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
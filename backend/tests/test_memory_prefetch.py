@@ -0,0 +1,137 @@
+"""Memory prefetch: results from partial input are reused only for a close enough message"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.memory_prefetch import MemoryPrefetcher
+
+PARTIAL = "what did I note about the trip"
+FINAL = "What did I note about the trip?"
+
+
+class SearchLog(list):
+    """Texts searched so far; a search waits for ``release``, then takes ``delay`` seconds"""
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    searched = SearchLog()
+    searched.delay = 0.0
+    searched.release = threading.Event()
+    searched.release.set()
+    
+    def search(text, scopes):
+        searched.append(text)
+        searched.release.wait(5)
+        time.sleep(searched.delay)
+        return {policy: ([0.1, 0.2], [{"id": text, "policy": policy}]) for policy in scopes}
+    
+    monkeypatch.setattr(settings, "memory_prefetch", True)
+    monkeypatch.setattr(MemoryPrefetcher, "_search", staticmethod(search))
+    return searched
+
+
+def finished(prefetcher: MemoryPrefetcher, session_id: str):
+    return prefetcher._entries[session_id].task
+
+
+def test_close_final_text_reuses_the_prefetch_once(searches):
+    async def run():
+        prefetcher = MemoryPrefetcher()
+        assert prefetcher.prefetch("s1", PARTIAL)
+        await finished(prefetcher, "s1")
+        first = await prefetcher.take("s1", FINAL, "notes")
+        second = await prefetcher.take("s1", FINAL, "notes")
+        return first, second
+    
+    first, second = asyncio.run(run())
+    assert first == ([0.1, 0.2], [{"id": PARTIAL, "policy": "notes"}])
+    assert second is None  # Consumed: the next message starts over
+
+
+@pytest.mark.parametrize("text, policy", [
+    ("Remind me to buy milk tomorrow", "notes"),  # A different message
+    (FINAL, "none"),  # A policy that was not prefetched
+])
+def test_other_messages_and_policies_miss(searches, text, policy):
+    async def run():
+        prefetcher = MemoryPrefetcher()
+        prefetcher.prefetch("s1", PARTIAL)
+        await finished(prefetcher, "s1")
+        return await prefetcher.take("s1", text, policy)
+    
+    assert asyncio.run(run()) is None
+
+
+def test_stale_results_miss(searches, monkeypatch):
+    monkeypatch.setattr(settings, "prefetch_ttl_seconds", 0.0)
+    
+    async def run():
+        prefetcher = MemoryPrefetcher()
+        prefetcher.prefetch("s1", PARTIAL)
+        await finished(prefetcher, "s1")
+        await asyncio.sleep(0.01)
+        return await prefetcher.take("s1", FINAL, "all")
+    
+    assert asyncio.run(run()) is None
+
+
+@pytest.mark.parametrize("wait, expected_hit", [(True, True), (False, False)])
+def test_take_waits_for_a_running_prefetch_only_when_asked(searches, wait, expected_hit):
+    searches.delay = 0.1
+    
+    async def run():
+        prefetcher = MemoryPrefetcher()
+        prefetcher.prefetch("s1", PARTIAL)
+        await asyncio.sleep(0.02)  # The search is now running
+        return await prefetcher.take("s1", FINAL, "notes", wait=wait)
+    
+    assert (asyncio.run(run()) is not None) == expected_hit
+
+
+def test_newer_input_replaces_the_queued_one(searches):
+    searches.release.clear()
+    
+    async def run():
+        prefetcher = MemoryPrefetcher()
+        prefetcher.prefetch("s1", "plan my week ahead")
+        await asyncio.sleep(0.02)  # First search is blocked mid-run
+        prefetcher.prefetch("s1", "plan my week ahead with")
+        prefetcher.prefetch("s1", "plan my week ahead with gym")
+        searches.release.set()
+        await finished(prefetcher, "s1")
+    
+    asyncio.run(run())
+    assert searches == ["plan my week ahead", "plan my week ahead with gym"]
+
+
+def test_short_repeated_or_disabled_input_is_not_searched(searches, monkeypatch):
+    async def run():
+        prefetcher = MemoryPrefetcher()
+        started = [prefetcher.prefetch("s1", "hi")]
+        started.append(prefetcher.prefetch("s1", PARTIAL))
+        await finished(prefetcher, "s1")
+        started.append(prefetcher.prefetch("s1", PARTIAL + "  "))
+        monkeypatch.setattr(settings, "memory_prefetch", False)
+        started.append(prefetcher.prefetch("s2", PARTIAL))
+        return started
+    
+    assert asyncio.run(run()) == [False, True, False, False]
+    assert searches == [PARTIAL]
+
+
+def test_least_recent_sessions_are_evicted(searches, monkeypatch):
+    monkeypatch.setattr(settings, "prefetch_max_sessions", 2)
+    
+    async def run():
+        prefetcher = MemoryPrefetcher()
+        for session_id in ("s1", "s2", "s3"):
+            prefetcher.prefetch(session_id, f"{PARTIAL} {session_id}")
+        await asyncio.gather(*(entry.task for entry in prefetcher._entries.values()))
+        return list(prefetcher._entries)
+    
+    assert asyncio.run(run()) == ["s2", "s3"]
@@ -0,0 +1,83 @@
+"""Memory re-ranking: distance cut-off, MMR diversity and recency decay"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.memory_ranker import RerankPolicy, policy_for, rerank
+
+
+def memory(id, distance, embedding=None, days_old=None):
+    metadata = {}
+    if days_old is not None:
+        metadata["created_at"] = (datetime.now() - timedelta(days=days_old)).isoformat()
+    return {"id": id, "distance": distance, "embedding": embedding, "metadata": metadata}
+
+
+def policy(**overrides):
+    values = {"top_k": 2, "max_distance": 1.0, "mmr_lambda": 0.5, "recency_half_life_days": 0.0}
+    values.update(overrides)
+    return RerankPolicy(**values)
+
+
+QUERY = [1.0, 0.0, 0.0]
+
+# Two near-duplicates close to the query, and one less relevant but different memory
+CANDIDATES = [
+    memory("a", 0.10, [1.0, 0.05, 0.0]),
+    memory("a-copy", 0.11, [1.0, 0.06, 0.0]),
+    memory("b", 0.50, [0.8, 0.0, 0.6]),
+]
+
+
+def test_mmr_prefers_a_different_memory_over_a_near_duplicate():
+    ranked = rerank(CANDIDATES, policy(), QUERY)
+    assert [m["id"] for m in ranked] == ["a", "b"]
+
+
+def test_pure_relevance_keeps_the_near_duplicate():
+    ranked = rerank(CANDIDATES, policy(mmr_lambda=1.0), QUERY)
+    assert [m["id"] for m in ranked] == ["a", "a-copy"]
+
+
+def test_candidates_beyond_the_distance_cut_off_are_dropped():
+    ranked = rerank(CANDIDATES + [memory("far", 3.0, [0.0, 1.0, 0.0])], policy(top_k=5), QUERY)
+    assert "far" not in [m["id"] for m in ranked]
+    assert len(ranked) == 3
+
+
+def test_results_carry_a_score_and_no_embedding():
+    ranked = rerank(CANDIDATES, policy(), QUERY)
+    assert all("embedding" not in m for m in ranked)
+    assert ranked[0]["score"] == pytest.approx(1.0, abs=0.01)
+
+
+def test_without_embeddings_candidates_rank_by_distance():
+    candidates = [memory("near", 0.2), memory("nearest", 0.1), memory("farther", 0.4)]
+    ranked = rerank(candidates, policy(top_k=3), QUERY)
+    assert [m["id"] for m in ranked] == ["nearest", "near", "farther"]
+    assert ranked[0]["score"] == pytest.approx(1 / 1.1)
+
+
+def test_mismatched_embedding_sizes_fall_back_to_distance():
+    # A collection awaiting re-index can hold vectors from another model
+    candidates = [memory("old-model", 0.3, [1.0, 0.0]), memory("new-model", 0.1, [1.0, 0.0, 0.0])]
+    ranked = rerank(candidates, policy(), QUERY)
+    assert [m["id"] for m in ranked] == ["new-model", "old-model"]
+
+
+def test_recency_decay_lets_a_fresh_memory_overtake_an_old_one():
+    candidates = [memory("old", 0.10, days_old=60), memory("fresh", 0.15, days_old=0)]
+    assert [m["id"] for m in rerank(candidates, policy(top_k=1))] == ["old"]
+    assert [m["id"] for m in rerank(candidates, policy(top_k=1, recency_half_life_days=7.0))] == ["fresh"]
+
+
+def test_nothing_is_kept_for_a_zero_top_k():
+    assert rerank(CANDIDATES, policy(top_k=0), QUERY) == []
+
+
+def test_intent_overrides_apply_on_top_of_the_defaults():
+    remembering = policy_for("remembering")
+    assert remembering.top_k == 5 and remembering.max_distance == 1.4
+    assert policy_for("planning").recency_half_life_days == 7.0
+    assert policy_for("no-such-intent") == policy_for("general")
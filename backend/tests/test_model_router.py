@@ -0,0 +1,76 @@
+"""Model routing: preferred model per call type, fallback on missing, failing or busy models"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.model_router import ModelRouter, call_type_for
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(settings, "ollama_model", "big")
+    monkeypatch.setattr(settings, "model_routes", {"intent": "small"})
+    monkeypatch.setattr(settings, "model_fallbacks", ["backup"])
+    monkeypatch.setattr(settings, "model_max_in_flight", 1)
+    router = ModelRouter()
+    # Fresh list: no /api/tags call during the test
+    router.set_available(["big", "small", "backup"])
+    return router
+
+
+def test_candidates_start_with_the_route_then_fallbacks_then_default(router):
+    assert router.candidates("intent") == ["small", "backup", "big"]
+    assert router.candidates("chat") == ["big", "backup"]
+
+
+def test_profiles_map_to_call_types():
+    assert call_type_for("summary") == "rewrite"
+    assert call_type_for("tools") == "chat"
+    assert call_type_for("no-such-profile") == "chat"
+
+
+def test_preferred_model_is_used_when_available(router):
+    assert asyncio.run(router.select("intent")) == "small"
+
+
+def test_missing_model_falls_back(router):
+    router.set_available(["big", "backup"])
+    assert asyncio.run(router.select("intent")) == "backup"
+
+
+def test_failed_model_cools_down_then_comes_back(router, monkeypatch):
+    monkeypatch.setattr(settings, "model_error_cooldown", 0.05)
+    
+    async def fail():
+        async with router.use("intent"):
+            raise RuntimeError("model crashed")
+    
+    with pytest.raises(RuntimeError):
+        asyncio.run(fail())
+    assert asyncio.run(router.select("intent")) == "backup"
+    assert router.status()["models"]["small"]["cooling_down"] is True
+    
+    time.sleep(0.06)
+    assert asyncio.run(router.select("intent")) == "small"
+
+
+def test_busy_model_falls_back_and_all_busy_queues_on_the_least_loaded(router):
+    async def run():
+        async with router.use("intent") as first:
+            async with router.use("intent") as second:
+                async with router.use("intent") as third:
+                    fourth = await router.select("intent")
+                    return first, second, third, fourth
+    
+    first, second, third, fourth = asyncio.run(run())
+    assert (first, second, third) == ("small", "backup", "big")
+    assert fourth == "small"  # Everything busy: the first of the least loaded
+    assert router._in_flight == {"small": 0, "backup": 0, "big": 0}
+
+
+def test_nothing_available_still_returns_the_preferred_model(router):
+    router.set_available([])
+    assert asyncio.run(router.select("intent")) == "small"
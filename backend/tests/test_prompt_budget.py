@@ -0,0 +1,103 @@
+"""Prompt budget: sections fill by priority, the lowest-value pieces are trimmed first"""
+
+import pytest
+
+from app.agent.nodes import SYSTEM_PROMPT, build_prompt
+from app.core.config import settings
+from app.core.metrics import Metrics
+from app.services import prompt_budget
+from app.services.prompt_budget import PromptBuilder, TokenEstimator, budget_for, token_estimator
+
+
+@pytest.fixture
+def estimator():
+    # Fixed at 4 characters per token: count(text) == len(text) // 4 + 1
+    return TokenEstimator(chars_per_token=4.0)
+
+
+def test_everything_fits_in_a_large_budget(estimator):
+    builder = PromptBuilder(1000, estimator).reserve("system", "question")
+    builder.add("memory", ["one", "two"], priority=1).add("tools", ["data"], priority=2)
+    assert builder.build() == {"tools": ["data"], "memory": ["one", "two"]}
+    assert builder.used == 2 + 3 + 1 + 1 + 2
+
+
+def test_higher_priority_sections_are_filled_first(estimator, monkeypatch):
+    monkeypatch.setattr(prompt_budget, "metrics", Metrics())
+    builder = PromptBuilder(30, estimator)
+    builder.add("memory", ["a" * 40], priority=1, truncate=False)
+    builder.add("tools", ["b" * 40, "c" * 40], priority=2)
+    assert builder.build() == {"tools": ["b" * 40, "c" * 40], "memory": []}
+    assert builder.used == 22
+    assert prompt_budget.metrics.counters["prompt.trimmed_items"] == 1
+
+
+def test_an_item_that_does_not_fit_ends_its_section(estimator):
+    builder = PromptBuilder(20, estimator)
+    builder.add("history", ["x" * 40, "y" * 60, "z"], priority=1, truncate=False)
+    # The newest items come first; once one is dropped, older ones are too
+    assert builder.build() == {"history": ["x" * 40]}
+
+
+def test_the_last_item_is_truncated_into_the_remaining_budget(estimator):
+    builder = PromptBuilder(50, estimator).reserve("r" * 39)
+    builder.add("memory", ["word " * 60, "tail"], priority=1)
+    kept = builder.build()["memory"]
+    assert len(kept) == 1
+    assert kept[0].endswith("word...")
+    assert estimator.count(kept[0]) <= 40
+
+
+def test_small_remainders_are_not_filled_with_truncated_items(estimator):
+    builder = PromptBuilder(20, estimator)
+    builder.add("memory", ["word " * 60], priority=1)
+    assert builder.build() == {"memory": []}
+
+
+def test_items_are_capped_per_section(estimator):
+    builder = PromptBuilder(1000, estimator)
+    builder.add("memory", ["word " * 20], priority=1, max_item_tokens=5)
+    assert builder.build() == {"memory": ["word word..."]}
+
+
+def test_calibration_follows_the_model_within_bounds(estimator):
+    estimator.calibrate(300, 100)
+    assert estimator.chars_per_token == pytest.approx(4.0 + 0.1 * (3.0 - 4.0))
+    estimator.calibrate(10, 5)  # Too short to count
+    assert estimator.chars_per_token == pytest.approx(3.9)
+    estimator.calibrate(10_000, 100)  # Clamped to 8 characters per token
+    assert estimator.chars_per_token == pytest.approx(3.9 + 0.1 * (8.0 - 3.9))
+
+
+def test_budget_uses_the_intent_override(monkeypatch):
+    monkeypatch.setattr(settings, "prompt_token_budget", 1000)
+    monkeypatch.setattr(settings, "prompt_token_budgets", {"general": 600})
+    assert budget_for("general") == 600
+    assert budget_for("planning") == 1000
+    assert budget_for(None) == 1000
+
+
+def test_build_prompt_keeps_tool_data_and_recent_turns_before_memory(monkeypatch):
+    monkeypatch.setattr(token_estimator, "chars_per_token", 4.0)
+    user_input = "What should I do next?"
+    summary = {"role": "system", "content": "Earlier: the user planned a trip."}
+    turns = []
+    for n in range(3):
+        turns += [
+            {"role": "user", "content": f"question {n} " + "q" * 60},
+            {"role": "assistant", "content": f"answer {n} " + "a" * 60},
+        ]
+    tool_line = '- get_pending_tasks: {"tasks":[]}'
+    memories = [{"type": "note", "content": "m" * 100}]
+    
+    reserved = sum(token_estimator.count(text) for text in (SYSTEM_PROMPT, user_input, summary["content"]))
+    newest_pair = token_estimator.count("\n".join(message["content"] for message in turns[-2:]))
+    monkeypatch.setattr(settings, "prompt_token_budgets", {})
+    monkeypatch.setattr(settings, "prompt_token_budget", reserved + token_estimator.count(tool_line) + newest_pair + 5)
+    
+    prompt, history = build_prompt(user_input, memories, tool_lines=[tool_line], history=[summary, *turns])
+    
+    assert tool_line in prompt
+    assert "m" * 100 not in prompt
+    assert prompt.endswith(f"User message: {user_input}")
+    assert history == [summary, *turns[-2:]]
@@ -0,0 +1,95 @@
+"""Online re-indexing: stale collections are rebuilt into a shadow and swapped in"""
+
+import hashlib
+
+import pytest
+from chromadb.api.models.Collection import Collection
+
+from app.core.vector_store import VectorStore
+from app.core.config import settings
+from app.services import reindex
+from app.services.reindex import ReindexJob
+
+
+class HashEmbedding:
+    """Deterministic bag-of-words vectors, so no embedding model is needed"""
+    
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vector = [0.0] * 16
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 16] += 1.0
+            vectors.append(vector)
+        return vectors
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A vector store of its own, with three notes built by an older embedding version"""
+    monkeypatch.setattr(settings, "vector_store_path", str(tmp_path))
+    monkeypatch.setattr(settings, "reindex_batch_size", 2)
+    monkeypatch.setattr(VectorStore, "embedding_function_for", lambda self, model: HashEmbedding())
+    
+    monkeypatch.setattr(settings, "embedding_version", "1")
+    store = VectorStore()
+    for note_id, content in (("n1", "rust ownership"), ("n2", "buy milk"), ("n3", "call mom")):
+        store.add_note(note_id, content)
+    
+    # The configured model moved on: every existing collection is now stale
+    store.embedding_model = (settings.embedding_model, "2")
+    monkeypatch.setattr(reindex, "vector_store", store)
+    return store
+
+
+def run(job: ReindexJob, force: bool = False):
+    status = job.start(force=force)
+    if job._thread is not None:
+        job._thread.join()
+    return status
+
+
+def test_stale_collections_are_rebuilt_and_swapped_in(store):
+    job = ReindexJob()
+    started = run(job)
+    assert started["state"] == "running"
+    assert set(started["collections"]) == {"notes", "learning", "conversations"}
+    
+    assert job.status()["state"] == "completed", job.error
+    assert job.done == job.total == 3
+    notes = store.collections()["notes"]
+    assert store.stamp_of(notes) == (settings.embedding_model, "2")
+    assert sorted(notes.get()["documents"]) == ["buy milk", "call mom", "rust ownership"]
+    assert store.search_notes("rust ownership", n_results=1)[0]["content"] == "rust ownership"
+    # No shadow or retired copy is left behind
+    assert {c.name for c in store.client.list_collections()} == {"notes", "learning", "conversations"}
+
+
+def test_up_to_date_collections_are_left_alone(store):
+    store.embedding_model = store.stamp_of(store.collections()["notes"])
+    job = ReindexJob()
+    assert run(job)["state"] == "up_to_date"
+    assert job._thread is None
+
+
+def test_writes_made_during_the_rebuild_are_caught_up(store, monkeypatch):
+    source_name = store.collections()["notes"].name
+    real_get = Collection.get
+    written = []
+    
+    def get(self, *args, **kwargs):
+        result = real_get(self, *args, **kwargs)
+        # Right after the first batch is read: change one note in place and delete another
+        if kwargs.get("offset") == 0 and self.name == source_name and not written:
+            written.append(True)
+            self.upsert(ids=["n1"], documents=["rust borrowing"], metadatas=[{"type": "note", "created_at": "x"}])
+            self.delete(ids=["n2"])
+        return result
+    
+    monkeypatch.setattr(Collection, "get", get)
+    job = ReindexJob()
+    run(job)
+    
+    assert job.status()["state"] == "completed", job.error
+    notes = store.collections()["notes"].get(ids=["n1", "n2", "n3"])
+    assert dict(zip(notes["ids"], notes["documents"])) == {"n1": "rust borrowing", "n3": "call mom"}
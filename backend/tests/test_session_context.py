@@ -0,0 +1,80 @@
+"""Session context reuse: when a cached Ollama context may continue a conversation"""
+
+import asyncio
+
+import pytest
+
+from app.core.ollama_client import ollama_client
+from app.services.ai_service import ai_service
+from app.services.generation_profiles import profile_for
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record /api/generate calls; each returns a context one token longer than it got"""
+    recorded = []
+    
+    async def generate(model, prompt, system=None, options=None, format=None, context=None):
+        recorded.append({"prompt": prompt, "system": system, "context": context})
+        return {"response": f"reply {len(recorded)}", "context": (context or []) + [len(recorded)]}
+    
+    monkeypatch.setattr(ollama_client, "generate", generate)
+    ai_service._session_contexts.clear()
+    return recorded
+
+
+def turn(prompt, history=None, volatile=False, session_id="s1", profile="chat"):
+    return asyncio.run(ai_service._generate_in_session(
+        "m", prompt, "system", profile_for(profile), session_id, history, volatile=volatile
+    ))[0]
+
+
+def test_clean_exchange_is_continued_next_turn(calls):
+    reply = turn("hi")
+    turn("and then?", [{"role": "user", "content": "hi"}, {"role": "assistant", "content": reply}])
+    assert calls[1]["context"] == [1]
+    assert calls[1]["system"] is None
+    assert calls[1]["prompt"] == "and then?"
+
+
+def test_per_turn_context_is_never_cached(calls):
+    reply = turn("Relevant context from memory:\n- x\n\nUser message: hi", volatile=True)
+    turn("next", [{"role": "user", "content": "hi"}, {"role": "assistant", "content": reply}])
+    assert calls[1]["context"] is None
+    assert calls[1]["prompt"].startswith("Conversation so far:\nUser: hi\nAssistant: reply 1")
+
+
+def test_turn_answered_elsewhere_breaks_the_chain(calls):
+    turn("hi")
+    history = [{"role": "system", "content": "Summary: greetings"}, {"role": "assistant", "content": "You have 2 tasks"}]
+    turn("next", history)
+    assert calls[1]["context"] is None
+    assert "System: Summary: greetings" in calls[1]["prompt"]
+
+
+def test_context_is_capped_at_the_profile_window(calls):
+    reply = turn("hi")
+    ai_service._session_contexts["s1"] = ("m", list(range(2040)), reply)
+    turn("next", [{"role": "assistant", "content": reply}], profile="intent")  # num_ctx 2048
+    assert calls[1]["context"] is None
+
+
+def test_graph_continues_the_session_context_on_the_next_turn(calls, monkeypatch):
+    from app.core.config import settings
+    from app.routes.chat import run_chat_turn
+    
+    async def chat(model, messages, options=None, format=None):
+        return {"message": {"content": "rewriting"}}  # intent: no memory or tools are planned
+    
+    monkeypatch.setattr(ollama_client, "chat", chat)
+    monkeypatch.setattr(ai_service, "available", True)
+    monkeypatch.setattr(settings, "session_context_reuse", True)
+    
+    async def two_turns():
+        await run_chat_turn("Make this friendlier: send the report", "graph-session")
+        await run_chat_turn("Now shorter", "graph-session")
+    
+    asyncio.run(two_turns())
+    assert calls[0]["context"] is None
+    assert calls[1]["context"] == [1]
+    assert calls[1]["prompt"].endswith("User message: Now shorter")
@@ -0,0 +1,44 @@
+"""Session history: turns leave memory only once a saved summary covers them"""
+
+import asyncio
+
+from app.core.config import settings
+from app.services.ai_service import ai_service
+from app.services.session_store import SessionStore
+
+
+async def _append_turns(store, session_id, count):
+    for i in range(count):
+        store.append(session_id, f"question {i}", f"answer {i}")
+        await asyncio.sleep(0)
+    await asyncio.gather(*store._tasks)
+
+
+def test_failed_summary_loses_no_turns(monkeypatch):
+    async def generate_response(prompt, *args, **kwargs):
+        return "Error: Ollama request failed with status 500"
+    
+    monkeypatch.setattr(ai_service, "generate_response", generate_response)
+    store = SessionStore()
+    count = settings.session_max_turns + 5
+    asyncio.run(_append_turns(store, "failing-summary", count))
+    
+    session = store.get("failing-summary")
+    assert session.summary == ""
+    assert [turn.user for turn in session.turns] == [f"question {i}" for i in range(count)]
+    # A restart reloads every unsummarized turn
+    assert len(SessionStore().get("failing-summary").turns) == count
+
+
+def test_summary_replaces_only_the_summarized_turns(monkeypatch):
+    async def generate_response(prompt, *args, **kwargs):
+        return "The user asked several questions."
+    
+    monkeypatch.setattr(ai_service, "generate_response", generate_response)
+    store = SessionStore()
+    asyncio.run(_append_turns(store, "summarized", settings.session_max_turns))
+    
+    session = store.get("summarized")
+    assert session.summary == "The user asked several questions."
+    assert len(session.turns) == settings.session_keep_recent_turns
+    assert session.turns[-1].user == f"question {settings.session_max_turns - 1}"
@@ -0,0 +1,35 @@
+"""Repair of malformed LLM JSON"""
+
+import pytest
+
+from app.services.structured_output import repair_json
+
+
+def test_typographic_quotes_inside_valid_json_are_kept():
+    text = '{"plan": ["a", "b"], "x": "He said “hi” to me"}'
+    assert repair_json(text) == {"plan": ["a", "b"], "x": "He said “hi” to me"}
+
+
+def test_typographic_quotes_inside_repaired_json_are_kept():
+    text = '{"plan": ["a", "b",], "x": "He said “hi” to me",}'
+    assert repair_json(text) == {"plan": ["a", "b"], "x": "He said “hi” to me"}
+
+
+def test_typographic_quotes_as_delimiters_are_repaired():
+    assert repair_json('{“intent”: “general”, "response": “ok”}') == {"intent": "general", "response": "ok"}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('```json\n{"a": 1}\n```', {"a": 1}),
+    ('Here you go: {"a": [1, 2,]} hope it helps', {"a": [1, 2]}),
+    ('{"done": True, "note": None}', {"done": True, "note": None}),
+    ('{"intent": "general", "response": "Hello wor', {"intent": "general", "response": "Hello wor"}),
+    ('{"plan": [{"time": "9:00"}, {"ti', {"plan": [{"time": "9:00"}, {}]}),
+])
+def test_common_malformations_are_repaired(text, expected):
+    assert repair_json(text) == expected
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        repair_json("no json here")
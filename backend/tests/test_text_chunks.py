@@ -0,0 +1,88 @@
+"""Long texts: split at natural boundaries, rewritten concurrently, reassembled in order"""
+
+import asyncio
+import re
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import ai_service
+from app.services.text_chunks import join_chunks, split_text
+
+PARAGRAPHS = [
+    "First paragraph. It has two sentences.",
+    "Second paragraph is short.",
+    "Third paragraph is much longer than the others. It keeps going for a while! "
+    "Does it ever stop? Eventually it does.",
+]
+TEXT = "\n\n".join(PARAGRAPHS)
+
+
+@pytest.mark.parametrize("max_chars", [10, 40, 80, 10_000])
+def test_split_then_join_gives_back_the_text(max_chars):
+    assert join_chunks(split_text(TEXT, max_chars)) == TEXT
+
+
+def test_paragraphs_that_fit_are_kept_whole_and_packed_together():
+    chunks = split_text(TEXT, 70)
+    assert chunks[0] == (f"{PARAGRAPHS[0]}\n\n{PARAGRAPHS[1]}", "\n\n")
+    assert all(len(chunk) <= 70 for chunk, _ in chunks)
+
+
+def test_long_paragraphs_split_at_sentence_ends():
+    chunks = split_text(PARAGRAPHS[2], 50)
+    assert [chunk for chunk, _ in chunks] == [
+        "Third paragraph is much longer than the others.",
+        "It keeps going for a while! Does it ever stop?",
+        "Eventually it does.",
+    ]
+    assert [separator for _, separator in chunks] == ["\n\n", " ", " "]
+
+
+def test_a_sentence_longer_than_the_limit_is_never_cut():
+    sentence = "One very long sentence without any break in it at all."
+    assert split_text(sentence, 10) == [(sentence, "\n\n")]
+
+
+def test_blank_text_has_no_chunks():
+    assert split_text(" \n\n \n", 100) == []
+
+
+def test_chunks_are_rewritten_concurrently_and_emitted_in_order(monkeypatch):
+    monkeypatch.setattr(settings, "rewrite_chunk_chars", 50)
+    monkeypatch.setattr(settings, "rewrite_concurrency", 2)
+    chunks = split_text(TEXT, 50)
+    running = {"now": 0, "peak": 0}
+    
+    async def generate_response(prompt, system_prompt=None, profile="chat", **kwargs):
+        section = re.search(r"\[Section to rewrite\]\n(.*?)(?:\n\n\[Context|$)", prompt, re.S).group(1)
+        index = [chunk for chunk, _ in chunks].index(section)
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        # Later chunks finish first
+        await asyncio.sleep(0.01 * (len(chunks) - index))
+        running["now"] -= 1
+        return section.upper()
+    
+    monkeypatch.setattr(ai_service, "generate_response", generate_response)
+    emitted = []
+    rewritten = asyncio.run(ai_service.rewrite_text(TEXT, "casual", on_chunk=lambda i, chunk: emitted.append(i)))
+    
+    assert len(chunks) > 2
+    assert rewritten == TEXT.upper()
+    assert emitted == list(range(len(chunks)))
+    assert running["peak"] == 2
+
+
+def test_short_text_is_rewritten_in_one_call(monkeypatch):
+    prompts = []
+    
+    async def generate_response(prompt, system_prompt=None, profile="chat", **kwargs):
+        prompts.append(prompt)
+        return "Rewritten."
+    
+    monkeypatch.setattr(ai_service, "generate_response", generate_response)
+    emitted = []
+    assert asyncio.run(ai_service.rewrite_text("Short.", "formal", on_chunk=lambda i, chunk: emitted.append((i, chunk)))) == "Rewritten."
+    assert prompts == ["Short."]
+    assert emitted == [(0, "Rewritten.")]
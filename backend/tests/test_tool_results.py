@@ -0,0 +1,43 @@
+"""Tool results stay dicts from the tool to the prompt, the job row and the API"""
+
+import asyncio
+
+from app.agent.executor import ACTION_TOOLS, execute_actions, format_tool_results, run_tool
+
+
+def test_run_tool_returns_a_structured_result():
+    result = asyncio.run(run_tool("get_pending_tasks", {}, "check_pending_tasks"))
+    assert set(result) == {"tool_name", "action", "result", "duration_ms"}
+    assert result["tool_name"] == "get_pending_tasks"
+    assert result["action"] == "check_pending_tasks"
+    assert isinstance(result["result"], dict) and result["result"]["success"] is True
+    assert isinstance(result["duration_ms"], float)
+
+
+def test_execute_actions_runs_only_mapped_actions():
+    results = asyncio.run(execute_actions(["check_pending_tasks", "general_conversation", "get_learning_progress"]))
+    assert [result["action"] for result in results] == ["check_pending_tasks", "get_learning_progress"]
+    assert all(isinstance(result["result"], dict) for result in results)
+    assert set(ACTION_TOOLS) == {"check_pending_tasks", "get_learning_progress"}
+
+
+def test_tool_results_are_encoded_only_for_the_prompt():
+    lines = format_tool_results([
+        {"tool_name": "get_goals", "result": {"success": True, "goals": []}},
+        {"tool_name": "get_tasks", "error": "get_tasks timed out after 5.0s"},
+    ])
+    assert lines == [
+        '- get_goals: {"success":true,"goals":[]}',
+        "- get_tasks: unavailable (get_tasks timed out after 5.0s)",
+    ]
+
+
+def test_job_result_round_trips_as_a_dict(plan_job):
+    plan = {"success": True, "plan": [{"time": "09:00", "activity": "Write"}], "focus_areas": "writing"}
+    
+    async def plan_tool(params):
+        return plan
+    
+    job = asyncio.run(plan_job(plan_tool))
+    assert job["status"] == "completed"
+    assert job["result"] == plan
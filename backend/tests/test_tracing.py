@@ -0,0 +1,47 @@
+"""Tracing: background work never reports into a finished trace"""
+
+import asyncio
+
+from app.core.tracing import create_background_task, current_trace, tracer
+
+
+def test_background_task_starts_outside_the_trace():
+    async def scenario():
+        finished = asyncio.Event()
+        seen = []
+        
+        async def background():
+            await finished.wait()
+            seen.append(current_trace.get())
+            with tracer.span("late.work") as span:
+                seen.append(span)
+        
+        with tracer.trace("request") as trace:
+            with tracer.span("handler"):
+                task = create_background_task(background())
+                inherited = asyncio.create_task(asyncio.sleep(0, current_trace.get()))
+        finished.set()
+        await task
+        return trace, seen, await inherited
+    
+    trace, seen, inherited = asyncio.run(scenario())
+    assert inherited is trace  # plain tasks do inherit the trace
+    assert seen == [None, None]
+    assert [span.name for span in trace.spans] == ["request", "handler"]
+
+
+def test_job_runs_in_its_own_trace(plan_job):
+    async def plan_tool(params):
+        with tracer.span("tool.work"):
+            return {"success": True, "plan": []}
+    
+    async def scenario():
+        with tracer.trace("POST /api/jobs/") as request_trace:
+            job = await plan_job(plan_tool)
+        return request_trace, job["id"]
+    
+    request_trace, job_id = asyncio.run(scenario())
+    assert [span.name for span in request_trace.spans if span.name == "tool.work"] == []
+    job_trace = next(t for t in tracer._recent if t.root.attributes.get("job_id") == job_id)
+    assert job_trace.root.name == "job daily_plan"
+    assert "tool.work" in [span.name for span in job_trace.spans]
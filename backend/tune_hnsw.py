@@ -0,0 +1,175 @@
+"""
+HNSW Tuning Benchmark
+Build HNSW indexes over a synthetic or exported corpus, measure recall@k
+against brute force and per-query p50/p99 latency, and recommend parameters.
+
+Usage:
+    poetry run python tune_hnsw.py                      # synthetic corpus
+    poetry run python tune_hnsw.py --from-store         # embeddings from ChromaDB
+    poetry run python tune_hnsw.py --corpus vectors.npy # exported embeddings
+"""
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import hnswlib
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+M_VALUES = [8, 16, 32]
+CONSTRUCTION_EF_VALUES = [64, 100, 200]
+SEARCH_EF_VALUES = [10, 20, 50, 100]
+
+
+def synthetic_corpus(size: int, dim: int, clusters: int = 50, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to real sentence embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size=size)
+    vectors = centers[labels] + rng.normal(scale=0.6, size=(size, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def store_corpus() -> np.ndarray:
+    """All embeddings currently stored in the vector store"""
+    from app.core.vector_store import vector_store, MEMORY_TYPES
+    
+    vectors = []
+    for memory_type in MEMORY_TYPES:
+        collection = vector_store._collection_for(memory_type)
+        batch = collection.get(where=vector_store._where_for([memory_type]), include=["embeddings"])
+        vectors.extend(batch["embeddings"] or [])
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def brute_force(corpus: np.ndarray, queries: np.ndarray, k: int, space: str) -> np.ndarray:
+    """Exact top-k ids for each query"""
+    if space == "l2":
+        distances = (
+            np.sum(queries ** 2, axis=1, keepdims=True)
+            - 2 * queries @ corpus.T
+            + np.sum(corpus ** 2, axis=1)
+        )
+    elif space == "cosine":
+        normalized = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        distances = 1 - (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ normalized.T
+    else:  # ip
+        distances = 1 - queries @ corpus.T
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(int(p * len(values)), len(values) - 1)]
+
+
+def benchmark(corpus: np.ndarray, queries: np.ndarray, k: int, space: str):
+    """Run the parameter grid and return one result per configuration"""
+    truth = brute_force(corpus, queries, k, space)
+    results = []
+    
+    for m, construction_ef in itertools.product(M_VALUES, CONSTRUCTION_EF_VALUES):
+        index = hnswlib.Index(space=space, dim=corpus.shape[1])
+        index.init_index(max_elements=len(corpus), ef_construction=construction_ef, M=m)
+        index.set_num_threads(1)
+        
+        start = time.perf_counter()
+        index.add_items(corpus, np.arange(len(corpus)))
+        build_s = time.perf_counter() - start
+        
+        for search_ef in SEARCH_EF_VALUES:
+            index.set_ef(max(search_ef, k))
+            latencies = []
+            hits = 0
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                labels, _ = index.knn_query(query, k=k)
+                latencies.append(time.perf_counter() - start)
+                hits += len(set(labels[0]) & set(expected))
+            
+            results.append({
+                "m": m,
+                "construction_ef": construction_ef,
+                "search_ef": search_ef,
+                "recall": hits / (len(queries) * k),
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "build_s": build_s,
+            })
+    return results
+
+
+def recommend(results, target_recall: float):
+    """Fastest (p99) configuration meeting the recall target, else the most accurate"""
+    meeting = [r for r in results if r["recall"] >= target_recall]
+    if meeting:
+        return min(meeting, key=lambda r: (r["p99_ms"], r["m"], r["construction_ef"]))
+    return max(results, key=lambda r: (r["recall"], -r["p99_ms"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune HNSW parameters for ab360 memory")
+    parser.add_argument("--from-store", action="store_true", help="Use embeddings from the vector store")
+    parser.add_argument("--corpus", help="Path to a .npy file of embeddings")
+    parser.add_argument("--size", type=int, default=5000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="Synthetic embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=9, help="Results per query (recall@k)")
+    parser.add_argument("--space", default="l2", choices=["l2", "cosine", "ip"])
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    args = parser.parse_args()
+    
+    if args.corpus:
+        corpus = np.load(args.corpus).astype(np.float32)
+        source = args.corpus
+    elif args.from_store:
+        corpus = store_corpus()
+        source = "vector store"
+    else:
+        corpus = synthetic_corpus(args.size, args.dim)
+        source = "synthetic"
+    
+    if len(corpus) <= args.k:
+        print(f"❌ Corpus too small ({len(corpus)} vectors) for k={args.k}")
+        return
+    
+    # Queries: perturbed corpus samples, so each has true near neighbours
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(corpus), size=min(args.queries, len(corpus)), replace=False)
+    queries = corpus[picks] + rng.normal(scale=0.05, size=(len(picks), corpus.shape[1])).astype(np.float32)
+    
+    print("=" * 80)
+    print(" " * 25 + "ab360 HNSW Tuning Benchmark")
+    print("=" * 80)
+    print(f"Corpus: {source} ({len(corpus)} x {corpus.shape[1]}), queries: {len(queries)}, "
+          f"k: {args.k}, space: {args.space}\n")
+    
+    results = benchmark(corpus, queries, args.k, args.space)
+    
+    print(f"{'M':>4} {'c_ef':>6} {'s_ef':>6} {'recall':>8} {'p50 ms':>8} {'p99 ms':>8} {'build s':>8}")
+    print("-" * 80)
+    for r in results:
+        print(f"{r['m']:>4} {r['construction_ef']:>6} {r['search_ef']:>6} {r['recall']:>8.3f} "
+              f"{r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['build_s']:>8.2f}")
+    
+    best = recommend(results, args.target_recall)
+    print("\n" + "=" * 80)
+    if best["recall"] >= args.target_recall:
+        print(f"✅ Recommended (fastest with recall@{args.k} >= {args.target_recall}):")
+    else:
+        print(f"⚠️  No configuration reached recall {args.target_recall}; most accurate:")
+    print(f"   recall={best['recall']:.3f}  p50={best['p50_ms']:.3f}ms  p99={best['p99_ms']:.3f}ms\n")
+    print("Add to .env (applies to newly created collections):")
+    print(f"  HNSW_SPACE={args.space}")
+    print(f"  HNSW_M={best['m']}")
+    print(f"  HNSW_CONSTRUCTION_EF={best['construction_ef']}")
+    print(f"  HNSW_SEARCH_EF={best['search_ef']}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,11 +14,12 @@ def main():
     print("=" * 80)
     print(" " * 25 + "ChromaDB Data Viewer")
     print("=" * 80)
+    print(f"Layout: {'unified' if vector_store.unified else 'separate'}")
     
     # Notes Collection
     print("\n📝 NOTES COLLECTION")
     print("-" * 80)
-    notes = vector_store.notes_collection.get()
+    notes = vector_store.get_memories("note")
     if notes['ids']:
         print(f"Total notes: {len(notes['ids'])}\n")
         for i, note_id in enumerate(notes['ids'][:10]):  # Show first 10
@@ -34,7 +35,7 @@ def main():
     # Learning Collection
     print("\n📚 LEARNING COLLECTION")
     print("-" * 80)
-    learning = vector_store.learning_collection.get()
+    learning = vector_store.get_memories("learning")
     if learning['ids']:
         print(f"Total learning items: {len(learning['ids'])}\n")
         for i, item_id in enumerate(learning['ids'][:10]):
@@ -50,7 +51,7 @@ def main():
     # Conversations Collection
     print("\n💬 CONVERSATIONS COLLECTION")
     print("-" * 80)
-    conversations = vector_store.conversations_collection.get()
+    conversations = vector_store.get_memories("conversation")
     if conversations['ids']:
         print(f"Total conversations: {len(conversations['ids'])}\n")
         for i, conv_id in enumerate(conversations['ids'][:10]):
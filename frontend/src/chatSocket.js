@@ -0,0 +1,84 @@
+// One WebSocket shared by every chat view, multiplexing sessions by session_id.
+// Turns stream progress and tokens back as they run; closing a view cancels its turn.
+
+const WS_URL = 'ws://localhost:8000/api/ws'
+const RECONNECT_DELAY_MS = 1000
+const MAX_RECONNECT_DELAY_MS = 10000
+
+let socket = null
+let reconnectDelay = RECONNECT_DELAY_MS
+const outbox = []
+// session_id -> { onProgress, onToken, onDone, onCancelled, onError }
+const handlers = new Map()
+
+const connect = () => {
+  if (socket && socket.readyState <= WebSocket.OPEN) return socket
+
+  socket = new WebSocket(WS_URL)
+
+  socket.onopen = () => {
+    reconnectDelay = RECONNECT_DELAY_MS
+    while (outbox.length) socket.send(outbox.shift())
+  }
+
+  socket.onmessage = (event) => {
+    const data = JSON.parse(event.data)
+    const session = handlers.get(data.session_id)
+    // A superseded turn's handlers were already replaced by the newer turn's
+    if (!session || data.reason === 'superseded') return
+
+    if (data.type === 'progress') session.onProgress?.(data)
+    else if (data.type === 'token') session.onToken?.(data.content)
+    else {
+      handlers.delete(data.session_id)
+      if (data.type === 'done') session.onDone?.(data)
+      else if (data.type === 'cancelled') session.onCancelled?.(data.reason)
+      else if (data.type === 'error') session.onError?.(data)
+    }
+  }
+
+  socket.onclose = () => {
+    socket = null
+    // The server cancels a closed connection's turns, so they fail here too
+    for (const [sessionId, session] of handlers) {
+      handlers.delete(sessionId)
+      session.onError?.({ status: 0, detail: 'Connection lost' })
+    }
+    setTimeout(connect, reconnectDelay)
+    reconnectDelay = Math.min(reconnectDelay * 2, MAX_RECONNECT_DELAY_MS)
+  }
+
+  return socket
+}
+
+const send = (message) => {
+  const payload = JSON.stringify(message)
+  const ws = connect()
+  if (ws.readyState === WebSocket.OPEN) ws.send(payload)
+  else outbox.push(payload)
+}
+
+// Start a turn; a newer message in the same session supersedes the running one
+export const sendChat = (sessionId, message, sessionHandlers) => {
+  handlers.set(sessionId, sessionHandlers)
+  send({ type: 'chat', session_id: sessionId, message })
+}
+
+// Stop the session's running turn (its handlers are dropped right away)
+export const cancelChat = (sessionId) => {
+  if (!handlers.delete(sessionId)) return
+  send({ type: 'cancel', session_id: sessionId })
+}
+
+// Let the backend start memory retrieval while the user is still typing
+export const prefetch = (sessionId, text) => {
+  send({ type: 'prefetch', session_id: sessionId, text })
+}
+
+// Short label for a progress event, or null if there is nothing to show
+export const progressLabel = (event) => {
+  if (event.tools?.length) return `Using ${event.tools.join(', ')}…`
+  if (event.node === 'retrieve_memory' && event.memories) return `Recalled ${event.memories} memories…`
+  if (event.intent) return `Intent: ${event.intent}…`
+  return null
+}
@@ -1,11 +1,9 @@
 import { useState, useRef, useEffect } from 'react'
-import axios from 'axios'
 import ReactMarkdown from 'react-markdown'
 import remarkGfm from 'remark-gfm'
+import { sendChat, cancelChat, progressLabel } from '../chatSocket'
 import '../styles/AssistantWidget.css'
 
-const API_URL = 'http://localhost:8000'
-
 function AssistantWidget() {
   const [isExpanded, setIsExpanded] = useState(false)
   const [messages, setMessages] = useState([
@@ -16,7 +14,8 @@ function AssistantWidget() {
   ])
   const [input, setInput] = useState('')
   const [isLoading, setIsLoading] = useState(false)
-  const [sessionId, setSessionId] = useState(null)
+  const [progress, setProgress] = useState(null)
+  const [sessionId] = useState(() => crypto.randomUUID())
   const messagesEndRef = useRef(null)
   
   // Draggable state for chat window
@@ -46,54 +45,74 @@ function AssistantWidget() {
     scrollToBottom()
   }, [messages])
 
+  // Unmounting cancels the running turn, which stops its generation
+  useEffect(() => {
+    return () => cancelChat(sessionId)
+  }, [sessionId])
+
   const toggleExpand = () => {
     setIsExpanded(!isExpanded)
     if (!isExpanded) {
       setChatPosition({ x: 0, y: 0 }) // Reset chat position when opening
+    } else {
+      cancelChat(sessionId) // Nobody is watching the answer any more
     }
   }
 
-  const handleSend = async () => {
+  // Replace the streaming assistant message (the last one)
+  const updateReply = (update) => {
+    setMessages(prev => [...prev.slice(0, -1), { ...prev[prev.length - 1], ...update }])
+  }
+
+  const handleSend = () => {
     if (!input.trim() || isLoading) return
 
     const userMessage = input.trim()
     setInput('')
     
-    setMessages(prev => [...prev, { role: 'user', content: userMessage }])
+    setMessages(prev => [
+      ...prev,
+      { role: 'user', content: userMessage },
+      { role: 'assistant', content: '', pending: true }
+    ])
     setIsLoading(true)
+    setProgress(null)
 
-    try {
-      const response = await axios.post(`${API_URL}/api/chat`, {
-        message: userMessage,
-        session_id: sessionId
-      })
-
-      if (!sessionId) {
-        setSessionId(response.data.session_id)
-      }
-
-      setMessages(prev => [
-        ...prev,
-        {
-          role: 'assistant',
-          content: response.data.response,
-          intent: response.data.intent,
-          tool_calls: response.data.tool_calls
-        }
-      ])
-    } catch (error) {
-      console.error('Error sending message:', error)
-      setMessages(prev => [
-        ...prev,
-        {
-          role: 'assistant',
-          content: 'Sorry, I encountered an error. Please make sure the backend is running on port 8000.',
-          error: true
-        }
-      ])
-    } finally {
+    const finish = () => {
       setIsLoading(false)
+      setProgress(null)
     }
+
+    sendChat(sessionId, userMessage, {
+      onProgress: (event) => setProgress(prev => progressLabel(event) ?? prev),
+      onToken: (content) => {
+        setMessages(prev => {
+          const reply = prev[prev.length - 1]
+          return [...prev.slice(0, -1), { ...reply, content: reply.content + content }]
+        })
+      },
+      onDone: (data) => {
+        updateReply({
+          content: data.response,
+          intent: data.intent,
+          tool_calls: data.tool_calls,
+          pending: false
+        })
+        finish()
+      },
+      onCancelled: finish,
+      onError: (error) => {
+        console.error('Error sending message:', error)
+        updateReply({
+          content: error.status === 429 || error.status === 503
+            ? `I'm busy right now, please try again in ${error.retry_after} seconds.`
+            : 'Sorry, I encountered an error. Please make sure the backend is running on port 8000.',
+          error: true,
+          pending: false
+        })
+        finish()
+      }
+    })
   }
 
   const handleKeyPress = (e) => {
@@ -308,7 +327,7 @@ function AssistantWidget() {
           </div>
 
           <div className="chat-messages">
-            {messages.map((message, index) => (
+            {messages.filter(message => message.content).map((message, index) => (
               <div key={index} className={`message message-${message.role}`}>
                 <div className="message-avatar">
                   {message.role === 'user' ? (
@@ -365,7 +384,7 @@ function AssistantWidget() {
               </div>
             ))}
             
-            {isLoading && (
+            {isLoading && !messages[messages.length - 1].content && (
               <div className="message message-assistant">
                 <div className="message-avatar">
                   <div className="avatar-ai">
@@ -382,6 +401,7 @@ function AssistantWidget() {
                     <span></span>
                     <span></span>
                   </div>
+                  {progress && <div className="message-badges">{progress}</div>}
                 </div>
               </div>
             )}
@@ -1,8 +1,8 @@
 import { useState, useRef, useEffect } from 'react'
-import axios from 'axios'
+import { sendChat, cancelChat, prefetch, progressLabel } from '../chatSocket'
 import '../styles/ChatWindow.css'
 
-const API_URL = 'http://localhost:8000'
+const PREFETCH_DELAY_MS = 300
 
 function ChatWindow({ onClose }) {
   const [messages, setMessages] = useState([
@@ -13,8 +13,10 @@ function ChatWindow({ onClose }) {
   ])
   const [input, setInput] = useState('')
   const [isLoading, setIsLoading] = useState(false)
-  const [sessionId, setSessionId] = useState(null)
+  const [progress, setProgress] = useState(null)
+  const [sessionId] = useState(() => crypto.randomUUID())
   const messagesEndRef = useRef(null)
+  const prefetchTimer = useRef(null)
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
@@ -24,49 +26,78 @@ function ChatWindow({ onClose }) {
     scrollToBottom()
   }, [messages])
 
-  const handleSend = async () => {
+  // Closing the window cancels the running turn, which stops its generation
+  useEffect(() => {
+    return () => cancelChat(sessionId)
+  }, [sessionId])
+
+  // Let the backend start memory retrieval while the user is still typing
+  const schedulePrefetch = (text) => {
+    clearTimeout(prefetchTimer.current)
+    prefetchTimer.current = setTimeout(() => prefetch(sessionId, text), PREFETCH_DELAY_MS)
+  }
+
+  // Replace the streaming assistant message (the last one)
+  const updateReply = (update) => {
+    setMessages(prev => [...prev.slice(0, -1), { ...prev[prev.length - 1], ...update }])
+  }
+
+  const handleInputChange = (e) => {
+    setInput(e.target.value)
+    schedulePrefetch(e.target.value)
+  }
+
+  const handleSend = () => {
     if (!input.trim() || isLoading) return
 
     const userMessage = input.trim()
     setInput('')
+    clearTimeout(prefetchTimer.current)
     
-    // Add user message
-    setMessages(prev => [...prev, { role: 'user', content: userMessage }])
+    // Add user message, and the assistant message tokens stream into
+    setMessages(prev => [
+      ...prev,
+      { role: 'user', content: userMessage },
+      { role: 'assistant', content: '', pending: true }
+    ])
     setIsLoading(true)
+    setProgress(null)
 
-    try {
-      const response = await axios.post(`${API_URL}/api/chat`, {
-        message: userMessage,
-        session_id: sessionId
-      })
-
-      if (!sessionId) {
-        setSessionId(response.data.session_id)
-      }
-
-      // Add assistant response
-      setMessages(prev => [
-        ...prev,
-        {
-          role: 'assistant',
-          content: response.data.response,
-          intent: response.data.intent,
-          tool_calls: response.data.tool_calls
-        }
-      ])
-    } catch (error) {
-      console.error('Error sending message:', error)
-      setMessages(prev => [
-        ...prev,
-        {
-          role: 'assistant',
-          content: 'Sorry, I encountered an error. Please make sure the backend is running on port 8000.',
-          error: true
-        }
-      ])
-    } finally {
+    const finish = () => {
       setIsLoading(false)
+      setProgress(null)
     }
+
+    sendChat(sessionId, userMessage, {
+      onProgress: (event) => setProgress(prev => progressLabel(event) ?? prev),
+      onToken: (content) => {
+        setMessages(prev => {
+          const reply = prev[prev.length - 1]
+          return [...prev.slice(0, -1), { ...reply, content: reply.content + content }]
+        })
+      },
+      onDone: (data) => {
+        updateReply({
+          content: data.response,
+          intent: data.intent,
+          tool_calls: data.tool_calls,
+          pending: false
+        })
+        finish()
+      },
+      onCancelled: finish,
+      onError: (error) => {
+        console.error('Error sending message:', error)
+        updateReply({
+          content: error.status === 429 || error.status === 503
+            ? `I'm busy right now, please try again in ${error.retry_after} seconds.`
+            : 'Sorry, I encountered an error. Please make sure the backend is running on port 8000.',
+          error: true,
+          pending: false
+        })
+        finish()
+      }
+    })
   }
 
   const handleKeyPress = (e) => {
@@ -88,7 +119,7 @@ function ChatWindow({ onClose }) {
       </div>
 
       <div className="chat-messages">
-        {messages.map((message, index) => (
+        {messages.filter(message => message.content).map((message, index) => (
           <div key={index} className={`message message-${message.role}`}>
             <div className="message-avatar">
               {message.role === 'user' ? '👤' : '🤖'}
@@ -109,7 +140,7 @@ function ChatWindow({ onClose }) {
           </div>
         ))}
         
-        {isLoading && (
+        {isLoading && !messages[messages.length - 1].content && (
           <div className="message message-assistant">
             <div className="message-avatar">🤖</div>
             <div className="message-content">
@@ -118,6 +149,7 @@ function ChatWindow({ onClose }) {
                 <span></span>
                 <span></span>
               </div>
+              {progress && <div className="message-meta">{progress}</div>}
             </div>
           </div>
         )}
@@ -130,7 +162,7 @@ function ChatWindow({ onClose }) {
           <textarea
             className="chat-input"
             value={input}
-            onChange={(e) => setInput(e.target.value)}
+            onChange={handleInputChange}
             onKeyPress={handleKeyPress}
             placeholder="Ask me anything..."
             rows="1"